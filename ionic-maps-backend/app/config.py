@@ -9,18 +9,53 @@ class Settings(BaseSettings):
     database_name: str = Field("ionic_maps", validation_alias="DATABASE_NAME")
     kitchy_database_name: str = Field("Kitchy", validation_alias="KITCHY_DATABASE_NAME")
     muelle_database_name: str = Field("muelle", validation_alias="MUELLE_DATABASE_NAME")
+    mongo_max_pool_size: int = Field(100, validation_alias="MONGO_MAX_POOL_SIZE")
+    mongo_min_pool_size: int = Field(0, validation_alias="MONGO_MIN_POOL_SIZE")
+    mongo_max_idle_time_ms: int = Field(0, validation_alias="MONGO_MAX_IDLE_TIME_MS")  # 0 = sin límite
+    mongo_slow_query_ms: int = Field(100, validation_alias="MONGO_SLOW_QUERY_MS")
     
     # OpenWeatherMap
     openweather_api_key: str = Field("", validation_alias="OPENWEATHER_API_KEY")
+    weather_cache_ttl: int = Field(600, validation_alias="WEATHER_CACHE_TTL")  # segundos
+    weather_cache_size: int = Field(4096, validation_alias="WEATHER_CACHE_SIZE")
+    weather_geohash_precision: int = Field(5, validation_alias="WEATHER_GEOHASH_PRECISION")  # ~5 km
+    
+    # Índice local de POIs (GeoJSON exportado de OSM, p. ej. con osmium export)
+    poi_dataset_path: str = Field("", validation_alias="POI_DATASET_PATH")
+    
+    # Nominatim: 1 req/s en total según su política de uso. El límite es por
+    # proceso, así que con N workers hay que poner 1/N
+    nominatim_rate_per_second: float = Field(1.0, validation_alias="NOMINATIM_RATE_PER_SECOND")
     
     # OSRM
     osrm_base_url: str = Field("https://router.project-osrm.org", validation_alias="OSRM_BASE_URL")
     
+    # Subsistemas activos en este despliegue: maps, kitchy, muelle, translator
+    # (un worker solo de mapas no importa OCR, navegador ni traductor)
+    enabled_subsystems: str = Field("maps,kitchy,muelle,translator", validation_alias="ENABLED_SUBSYSTEMS")
+    
     # Server
     host: str = Field("0.0.0.0", validation_alias="HOST")
     port: int = Field(8000, validation_alias="PORT")
     debug: bool = Field(True, validation_alias="DEBUG")
     
+    # Trazas por request (Server-Timing siempre; traza completa en /debug/traces para una muestra)
+    trace_sample_rate: float = Field(0.0, validation_alias="TRACE_SAMPLE_RATE")  # 0.0 - 1.0
+    trace_buffer_size: int = Field(200, validation_alias="TRACE_BUFFER_SIZE")
+    
+    # Control de admisión de endpoints caros: requests simultáneos y en cola por carril
+    admission_browser_concurrency: int = Field(2, validation_alias="ADMISSION_BROWSER_CONCURRENCY")
+    admission_browser_queue: int = Field(4, validation_alias="ADMISSION_BROWSER_QUEUE")
+    admission_vision_concurrency: int = Field(4, validation_alias="ADMISSION_VISION_CONCURRENCY")
+    admission_vision_queue: int = Field(8, validation_alias="ADMISSION_VISION_QUEUE")
+    admission_translate_concurrency: int = Field(1, validation_alias="ADMISSION_TRANSLATE_CONCURRENCY")
+    admission_translate_queue: int = Field(2, validation_alias="ADMISSION_TRANSLATE_QUEUE")
+    admission_max_wait: float = Field(30.0, validation_alias="ADMISSION_MAX_WAIT")  # segundos en cola
+    
+    # Pub/sub entre workers ("memory" o "redis")
+    pubsub_backend: str = Field("memory", validation_alias="PUBSUB_BACKEND")
+    pubsub_url: str = Field("redis://localhost:6379/0", validation_alias="PUBSUB_URL")
+    
     # AI Services
     kitchy_gemini_api_key: str = Field("", validation_alias="KITCHY_GEMINI_API_KEY")
     muelle_gemini_api_key: str = Field("", validation_alias="MUELLE_GEMINI_API_KEY")
@@ -1,10 +1,134 @@
 import sys
-from typing import Optional
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 from app.config import get_settings
+from app.utils import metrics
 
 settings = get_settings()
 
+mongo_command_seconds = metrics.histogram(
+    "mongo_command_duration_seconds",
+    "Latencia de comandos de MongoDB por base, colección y comando",
+    ["database", "collection", "command"]
+)
+mongo_command_failures = metrics.counter(
+    "mongo_command_failures_total",
+    "Comandos de MongoDB fallidos por base, colección y comando",
+    ["database", "collection", "command"]
+)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    Mide cada comando que el driver envía a MongoDB
+
+    pymongo llama a estos métodos desde sus hilos (motor ejecuta el driver
+    en un pool), por eso el estado compartido va protegido con un lock. Los
+    comandos más lentos que MONGO_SLOW_QUERY_MS se guardan (últimos
+    SLOW_SAMPLES) para GET /metrics/mongo/slow.
+
+    De cada comando solo se guarda su forma (claves y tipos, sin valores ni
+    los documentos de inserts/updates): se calcula en el hilo del driver y
+    el endpoint no expone datos de usuarios.
+    """
+
+    IGNORED = {"hello", "ismaster", "isMaster", "ping", "endSessions", "saslStart", "saslContinue"}
+    PAYLOAD_FIELDS = {"documents", "updates", "deletes", "lsid", "$clusterTime", "txnNumber"}
+    SLOW_SAMPLES = 100
+    SHAPE_KEYS = 20   # Claves por nivel en la forma del comando
+    SHAPE_DEPTH = 4
+
+    def __init__(self, slow_ms: int):
+        self.slow_seconds = slow_ms / 1000
+        self.slow: deque = deque(maxlen=self.SLOW_SAMPLES)
+        self._pending: Dict[Tuple[int, int], Tuple[str, str, str, dict]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _shape(cls, value, depth: int = 0):
+        """Forma acotada de un valor: claves y nombres de tipo, nunca los valores"""
+        if isinstance(value, dict):
+            if depth >= cls.SHAPE_DEPTH:
+                return "{...}"
+            keys = list(value)
+            shape = {key: cls._shape(value[key], depth + 1) for key in keys[:cls.SHAPE_KEYS]}
+            if len(keys) > cls.SHAPE_KEYS:
+                shape["..."] = f"{len(keys) - cls.SHAPE_KEYS} claves más"
+            return shape
+        if isinstance(value, (list, tuple)):
+            if not value or depth >= cls.SHAPE_DEPTH:
+                return f"[{len(value)}]"
+            return [cls._shape(value[0], depth + 1), f"x{len(value)}"]
+        return type(value).__name__
+
+    @classmethod
+    def _summary(cls, event: monitoring.CommandStartedEvent) -> dict:
+        command = event.command
+        summary = {
+            key: cls._shape(value, 1) for key, value in command.items()
+            if key != event.command_name and key not in cls.PAYLOAD_FIELDS
+        }
+        for key in cls.PAYLOAD_FIELDS & command.keys():
+            payload = command[key]
+            if isinstance(payload, (list, tuple)):
+                summary[key] = f"[{len(payload)}]"
+        return summary
+
+    @staticmethod
+    def _collection(event: monitoring.CommandStartedEvent) -> str:
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        return target if isinstance(target, str) else ""
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        if event.command_name in self.IGNORED:
+            return
+        with self._lock:
+            self._pending[(event.request_id, event.operation_id)] = (
+                event.database_name, self._collection(event), event.command_name, self._summary(event)
+            )
+
+    def _finish(self, event, failed: bool):
+        with self._lock:
+            pending = self._pending.pop((event.request_id, event.operation_id), None)
+        if pending is None:
+            return
+
+        database, collection, command, summary = pending
+        seconds = event.duration_micros / 1e6
+        mongo_command_seconds.observe(seconds, database=database, collection=collection, command=command)
+        if failed:
+            mongo_command_failures.inc(database=database, collection=collection, command=command)
+
+        if seconds >= self.slow_seconds:
+            self.slow.append({
+                "at": time.time(),
+                "database": database,
+                "collection": collection,
+                "command": command,
+                "duration_ms": round(seconds * 1000, 1),
+                "failed": failed,
+                "shape": summary,
+            })
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event, failed=True)
+
+    def slow_queries(self) -> List[dict]:
+        """Comandos lentos más recientes primero"""
+        return list(reversed(self.slow))
+
+
+command_metrics = CommandMetrics(settings.mongo_slow_query_ms)
+
 
 class Database:
     client: Optional[AsyncIOMotorClient] = None
@@ -19,7 +143,11 @@ async def connect_to_mongo():
         # Añadimos un timeout corto (2 segundos) para que no se quede colgado
         db.client = AsyncIOMotorClient(
             settings.mongodb_url, 
-            serverSelectionTimeoutMS=2000
+            serverSelectionTimeoutMS=2000,
+            maxPoolSize=settings.mongo_max_pool_size,
+            minPoolSize=settings.mongo_min_pool_size,
+            maxIdleTimeMS=settings.mongo_max_idle_time_ms or None,
+            event_listeners=[command_metrics]
         )
         # Intentamos una operación rápida para verificar la conexión
         await db.client.admin.command('ping')
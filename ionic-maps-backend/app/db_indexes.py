@@ -0,0 +1,193 @@
+"""
+Registro de índices de MongoDB y auditoría de planes de consulta
+
+Todos los índices se declaran aquí y se crean al arrancar (lifespan) con
+ensure_indexes(). Crear un índice que ya existe no hace nada.
+
+    python -m app.db_indexes --apply     # crear índices
+    python -m app.db_indexes --audit     # explain() de las consultas de cada servicio
+
+La auditoría ejecuta explain() sobre la forma de cada consulta de los
+servicios (AUDIT_QUERIES) y marca las que terminan en COLLSCAN. Al añadir
+una consulta nueva a un servicio, añade aquí su forma y, si hace falta,
+su índice.
+"""
+import argparse
+import asyncio
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import IndexModel
+from app.config import get_settings
+from app.database import connect_to_mongo, close_mongo_connection, get_database
+
+settings = get_settings()
+
+MAPS = None  # Base por defecto (DATABASE_NAME)
+KITCHY = settings.kitchy_database_name
+
+Keys = List[Tuple[str, int]]
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: Keys
+    database: Optional[str] = MAPS
+    options: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class AuditQuery:
+    service: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[Keys] = None
+    database: Optional[str] = MAPS
+
+
+INDEXES: List[IndexSpec] = [
+    # ---- Mapas ----
+    IndexSpec("trips", [("created_at", -1)]),
+    IndexSpec("incidents", [("is_active", 1), ("created_at", -1), ("expires_at", 1)]),
+    IndexSpec("convoys", [("code", 1), ("is_active", 1)]),
+    IndexSpec("convoys", [("is_active", 1), ("members.last_update", 1)]),  # Barrido de presencia
+    # Caché persistente de NominatimGateway: caduca a los 7 días
+    IndexSpec("geocode_cache", [("created_at", 1)], options={"expireAfterSeconds": 7 * 24 * 3600}),
+    IndexSpec("models", [("name", 1)]),
+
+    # ---- Muelle (logística) ----
+    IndexSpec("caitlyn_knowledge", [("domain", 1)]),
+    IndexSpec("caitlyn_routes", [("route_key", 1)]),
+
+    # ---- Kitchy ----
+    IndexSpec("caitlyn_knowledge", [("pattern_signature", 1), ("type", 1)], KITCHY),
+    IndexSpec("caitlyn_knowledge", [("recipe_key", 1), ("type", 1)], KITCHY),
+    IndexSpec("marketcontexts", [("tipo", 1), ("fecha", -1)], KITCHY),
+    IndexSpec("marketcontexts", [("tipo", 1), ("timestamp", -1)], KITCHY),
+    IndexSpec("market_sources", [("tipo", 1)], KITCHY),
+    IndexSpec("caitlyn_vision", [("type", 1), ("ruc", 1)], KITCHY),
+    IndexSpec("caitlyn_vision", [("type", 1), ("invoice_text", 1), ("negocio_id", 1)], KITCHY),
+    IndexSpec("shopping_history", [("item_name", 1), ("negocio_id", 1)], KITCHY),
+]
+
+
+# Forma de las consultas de cada servicio (los valores son de ejemplo)
+AUDIT_QUERIES: List[AuditQuery] = [
+    AuditQuery("TripService.get_all_trips", "trips", {}, [("created_at", -1)]),
+    AuditQuery("IncidentService.get_active_incidents", "incidents",
+               {"is_active": True, "expires_at": {"$gt": datetime.utcnow()}}, [("created_at", -1)]),
+    AuditQuery("ConvoyService.join_convoy", "convoys", {"code": "ABC123", "is_active": True}),
+    AuditQuery("ConvoyPresenceService.sweep", "convoys",
+               {"is_active": True, "members.last_update": {"$lt": datetime.utcnow()}}),
+    AuditQuery("MLService.load_model", "models", {"name": "route_predictor"}),
+    AuditQuery("NominatimGateway (caducidad TTL)", "geocode_cache", {"created_at": {"$lt": datetime.utcnow()}}),
+    AuditQuery("ScheduleHunterService.cazar_itinerarios", "caitlyn_knowledge", {"domain": "searates"}),
+    AuditQuery("LogisticsService.get_itineraries", "caitlyn_routes", {"route_key": "miami|||manzanillo"}),
+    AuditQuery("BusinessService (patrones)", "caitlyn_knowledge",
+               {"pattern_signature": "x", "type": "strategic_advice"}, database=KITCHY),
+    AuditQuery("BusinessService (recetas)", "caitlyn_knowledge",
+               {"recipe_key": "x", "type": "recipe_suggestion"}, database=KITCHY),
+    AuditQuery("BusinessService (contexto de mercado)", "marketcontexts",
+               {"tipo": "FUEL"}, [("fecha", -1)], KITCHY),
+    AuditQuery("MarketService (caché 12 h)", "marketcontexts",
+               {"tipo": "FUEL", "timestamp": {"$gt": 0}}, [("timestamp", -1)], KITCHY),
+    AuditQuery("MarketService (fuentes aprendidas)", "market_sources", {"tipo": "FUEL"}, database=KITCHY),
+    AuditQuery("CaitlynVisionService.get_layout_by_ruc", "caitlyn_vision",
+               {"type": "invoice_layout", "ruc": "x"}, database=KITCHY),
+    AuditQuery("CaitlynVisionService (alias)", "caitlyn_vision",
+               {"type": "product_alias", "invoice_text": "x", "negocio_id": "x"}, database=KITCHY),
+    AuditQuery("ShoppingService.save_historical_price", "shopping_history",
+               {"item_name": "x", "negocio_id": "x"}, database=KITCHY),
+]
+
+
+async def ensure_indexes() -> int:
+    """Crear los índices del registro (agrupados por colección). Devuelve cuántos se aplicaron"""
+    if get_database() is None:
+        return 0
+
+    grouped: Dict[Tuple[Optional[str], str], List[IndexModel]] = {}
+    for spec in INDEXES:
+        grouped.setdefault((spec.database, spec.collection), []).append(IndexModel(spec.keys, **spec.options))
+
+    applied = 0
+    for (database, collection), models in grouped.items():
+        try:
+            await get_database(database)[collection].create_indexes(models)
+            applied += len(models)
+        except Exception as e:
+            # Un índice existente con otras opciones no debe impedir el arranque
+            print(f"⚠️ No se pudieron crear los índices de {collection}: {e}")
+    return applied
+
+
+def _stages(plan: dict):
+    """Etapas de un plan de explain() (recorriendo inputStage/inputStages)"""
+    yield plan.get("stage")
+    if "inputStage" in plan:
+        yield from _stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        yield from _stages(child)
+
+
+async def audit() -> List[dict]:
+    """explain() de cada consulta registrada; marca las que hacen COLLSCAN"""
+    report = []
+    for query in AUDIT_QUERIES:
+        cursor = get_database(query.database)[query.collection].find(query.filter)
+        if query.sort:
+            cursor = cursor.sort(query.sort)
+        try:
+            explain = await cursor.limit(1).explain()
+            winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+            # En colecciones time-series / SBE el plan va dentro de queryPlan
+            stages = [s for s in _stages(winning.get("queryPlan", winning)) if s]
+            report.append({"service": query.service, "collection": query.collection,
+                           "stages": stages, "collscan": "COLLSCAN" in stages})
+        except Exception as e:
+            report.append({"service": query.service, "collection": query.collection,
+                           "stages": [], "collscan": False, "error": str(e)})
+    return report
+
+
+async def _main(apply: bool, run_audit: bool) -> int:
+    await connect_to_mongo()
+    if get_database() is None:
+        print("❌ Sin conexión a MongoDB")
+        return 2
+
+    try:
+        if apply:
+            print(f"📇 Índices aplicados: {await ensure_indexes()}")
+
+        if not run_audit:
+            return 0
+
+        flagged = 0
+        for row in await audit():
+            if "error" in row:
+                mark = "⚠️ "
+            elif row["collscan"]:
+                mark = "❌"
+                flagged += 1
+            else:
+                mark = "✅"
+            detail = row.get("error") or " > ".join(row["stages"])
+            print(f"{mark} {row['service']:<45} {row['collection']:<20} {detail}")
+
+        print(f"\n{flagged} consulta(s) con COLLSCAN" if flagged else "\nNinguna consulta hace COLLSCAN")
+        return 1 if flagged else 0
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índices de MongoDB y auditoría de planes de consulta")
+    parser.add_argument("--apply", action="store_true", help="Crear los índices del registro")
+    parser.add_argument("--audit", action="store_true", help="explain() de las consultas y marcar COLLSCAN")
+    args = parser.parse_args()
+    if not (args.apply or args.audit):
+        parser.error("indica --apply y/o --audit")
+    sys.exit(asyncio.run(_main(args.apply, args.audit)))
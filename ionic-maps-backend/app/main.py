@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import os
@@ -7,12 +8,31 @@ from dotenv import load_dotenv
 # Cargar variables de entorno al inicio absoluto
 load_dotenv()
 
-from app.database import connect_to_mongo, close_mongo_connection
-from app.services.ai.ml_service import MLService
-from app.routers import routes, incidents, trips, weather, favorites, settings, convoy, agent, translator, scraper
+from app.database import connect_to_mongo, close_mongo_connection, command_metrics
+from app.db_indexes import ensure_indexes
+from app.services.core.pubsub import pubsub
+from app.subsystems import enabled_subsystems, include_routers
 from app.config import get_settings
+from app.utils import metrics
+from app.utils.http import close_http_client
+from app.utils.responses import FastJSONResponse
+from app.utils.cached_collection import CachedCollection
+from app.utils.tracing import TracingMiddleware, recent_traces
+from app.utils.admission import AdmissionLimiter
 
 app_settings = get_settings()
+SUBSYSTEMS = enabled_subsystems()
+MAPS_ENABLED = "maps" in SUBSYSTEMS
+
+if MAPS_ENABLED:
+    # Modelo ML (sklearn/pandas) y tareas en segundo plano de mapas
+    from app.services.ai.ml_service import MLService
+    from app.services.maps.speed_profile_service import SpeedProfileService
+    from app.services.maps.trip_trace_service import TripTraceService
+    from app.services.maps.convoy_live_service import convoy_hub
+    from app.services.maps.convoy_presence_service import ConvoyPresenceService
+    from app.services.core.poi_index_service import PoiIndexService
+    from app.services.core.autocomplete_service import AutocompleteService
 
 
 @asynccontextmanager
@@ -20,12 +40,32 @@ async def lifespan(app: FastAPI):
     """Gestionar ciclo de vida de la aplicación"""
     # Startup
     await connect_to_mongo()
-    await MLService.load_model()
+    if MAPS_ENABLED:
+        await MLService.load_model()
+        await SpeedProfileService.load()
+        await TripTraceService.ensure_collection()
+    await ensure_indexes()
+    await pubsub.start()
+    if MAPS_ENABLED:
+        await PoiIndexService.reload()
+        await AutocompleteService.load()
+        SpeedProfileService.start()
+        convoy_hub.start()
+        ConvoyPresenceService.start()
+    CachedCollection.start_watchers()
     print("🚀 API iniciada correctamente")
     
     yield
     
     # Shutdown
+    if MAPS_ENABLED:
+        await SpeedProfileService.stop()
+        await ConvoyPresenceService.stop()
+    await CachedCollection.stop_watchers()
+    if MAPS_ENABLED:
+        await convoy_hub.stop()
+    await pubsub.stop()
+    await close_http_client()
     await close_mongo_connection()
     print("👋 API detenida")
 
@@ -43,7 +83,8 @@ app = FastAPI(
     - 📊 **Entrenamiento**: El modelo aprende de tus viajes reales
     """,
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # CORS
@@ -55,28 +96,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Trazas por request (la más externa: mide también los demás middlewares)
+app.add_middleware(TracingMiddleware)
+
 from fastapi import WebSocket, WebSocketDisconnect
 from app.services.core.socket_service import socket_manager
 
-# Routers
-app.include_router(trips.router)
-app.include_router(weather.router)
-app.include_router(routes.router)
-app.include_router(incidents.router)
-app.include_router(favorites.router)
-app.include_router(settings.router)
-app.include_router(convoy.router)
-app.include_router(agent.router)
-app.include_router(translator.router)
-app.include_router(scraper.router, prefix="/api/scraper")
+# Routers (solo los de los subsistemas activos: ENABLED_SUBSYSTEMS)
+include_routers(app, SUBSYSTEMS)
 
 @app.websocket("/ws/caitlyn")
 async def websocket_endpoint(websocket: WebSocket):
     await socket_manager.connect(websocket)
     try:
         while True:
-            # Esperamos cualquier mensaje del cliente o simplemente mantenemos vivo el socket
-            await websocket.receive_text()
+            # Suscripciones a tópicos ({"action": "subscribe", "topic": "job:..."}) o keepalive
+            await socket_manager.handle_client_message(websocket, await websocket.receive_text())
     except WebSocketDisconnect:
         socket_manager.disconnect(websocket)
     except Exception as e:
@@ -108,11 +143,42 @@ async def health():
     
     return {
         "status": "healthy",
-        "ml_model_trained": MLService.is_trained,
+        "subsystems": SUBSYSTEMS,
+        "ml_model_trained": MLService.is_trained if MAPS_ENABLED else False,
         "trips_registered": trips_count
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Métricas en formato Prometheus"""
+    return metrics.render_latest()
+
+
+@app.get("/metrics/mongo/slow")
+async def get_slow_mongo_commands():
+    """Últimos comandos de MongoDB más lentos que MONGO_SLOW_QUERY_MS"""
+    return {
+        "threshold_ms": app_settings.mongo_slow_query_ms,
+        "commands": command_metrics.slow_queries()
+    }
+
+
+@app.get("/metrics/admission")
+async def get_admission_stats():
+    """Ocupación y cola de cada carril de endpoints caros"""
+    return AdmissionLimiter.stats()
+
+
+@app.get("/debug/traces")
+async def get_recent_traces(limit: int = 50):
+    """Trazas muestreadas (TRACE_SAMPLE_RATE) con el desglose de cada etapa"""
+    return {
+        "sample_rate": app_settings.trace_sample_rate,
+        "traces": recent_traces(limit)
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
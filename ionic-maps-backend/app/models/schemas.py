@@ -1,4 +1,6 @@
-from pydantic import BaseModel, Field
+import math
+import time
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -82,17 +84,48 @@ class RouteRequest(BaseModel):
     end_name: Optional[str] = None
 
 
+class RouteWeatherSample(BaseModel):
+    offset_seconds: float  # Tiempo estimado desde la salida
+    location: LatLng
+    fraction: float  # Fracción del viaje que representa la muestra
+    weather: WeatherInfo
+
+
 class RouteInfo(BaseModel):
     distance: float  # metros
     duration: float  # segundos (OSRM base)
     predicted_duration: float  # segundos (con ML)
     coordinates: List[List[float]]  # [lng, lat]
     weather: Optional[WeatherInfo] = None
+    weather_along_route: List[RouteWeatherSample] = []  # Pronóstico a la hora de paso
     incidents_on_route: List[Incident] = []
     confidence: float = 0.0  # Confianza de la predicción (0-1)
     factors: dict = {}  # Factores que afectan el tiempo
 
 
+class BestDepartureRequest(RouteRequest):
+    departure_from: Optional[datetime] = None  # Inicio de la ventana (por defecto ahora)
+    window_hours: int = Field(24, ge=1, le=72)
+    slot_minutes: int = Field(15, ge=5, le=120)
+    top_n: int = Field(3, ge=1, le=20)
+
+
+class DepartureSlot(BaseModel):
+    departure_time: datetime
+    arrival_time: datetime
+    predicted_duration: float  # segundos
+    adjustment_factor: float
+
+
+class BestDepartureResult(BaseModel):
+    distance: float  # metros
+    duration: float  # segundos (OSRM base)
+    confidence: float
+    slots_evaluated: int
+    best_slots: List[DepartureSlot]
+    slots: List[DepartureSlot]  # Todas las franjas en orden cronológico
+
+
 # ============== VIAJES (para entrenar ML) ==============
 class TripCreate(BaseModel):
     start: LatLng
@@ -113,6 +146,44 @@ class TripCreate(BaseModel):
     incident_types: List[str] = []
 
 
+class TripBulkRow(TripCreate):
+    """Fila de carga masiva (NDJSON); created_at permite cargar históricos"""
+    created_at: Optional[datetime] = None
+
+
+class TripBulkResult(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    errors: List[dict] = []  # [{"line": n, "error": "..."}] (truncado)
+    errors_truncated: bool = False
+
+
+TRACE_MIN_TIMESTAMP = 946684800    # 2000-01-01
+TRACE_MAX_CLOCK_SKEW = 86400       # segundos por delante del reloj del servidor
+
+
+class TraceUpload(BaseModel):
+    """Traza GPS de un viaje: lista de [lat, lng, timestamp_unix_segundos]"""
+    points: List[List[float]] = Field(..., min_length=1)
+
+    @field_validator("points")
+    @classmethod
+    def _check_points(cls, points: List[List[float]]) -> List[List[float]]:
+        max_timestamp = time.time() + TRACE_MAX_CLOCK_SKEW
+        for i, p in enumerate(points):
+            if len(p) != 3:
+                raise ValueError(f"Punto {i}: debe ser [lat, lng, timestamp]")
+            lat, lng, ts = p
+            if not all(math.isfinite(v) for v in p):
+                raise ValueError(f"Punto {i}: valores no finitos")
+            if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+                raise ValueError(f"Punto {i}: coordenadas fuera de rango")
+            if not TRACE_MIN_TIMESTAMP <= ts <= max_timestamp:
+                raise ValueError(f"Punto {i}: timestamp fuera de rango (segundos Unix)")
+        return points
+
+
 class Trip(BaseModel):
     id: str = Field(alias="_id")
     start: LatLng
@@ -228,6 +299,18 @@ class ConvoyUpdate(BaseModel):
     location: LatLng
 
 
+class ConvoyDestination(BaseModel):
+    user_id: str  # Solo el anfitrión puede fijar el destino
+    destination: LatLng
+
+
+class MemberEta(BaseModel):
+    user_id: str
+    eta_seconds: Optional[float] = None    # None si OSRM no encontró ruta
+    distance_meters: Optional[float] = None
+    arrival_time: Optional[datetime] = None
+
+
 class Convoy(BaseModel):
     id: str = Field(alias="_id")
     code: str  # Código corto de 4-6 caracteres
@@ -235,6 +318,8 @@ class Convoy(BaseModel):
     created_at: datetime
     is_active: bool = True
     members: List[ConvoyMember] = []
+    destination: Optional[LatLng] = None
+    etas: List[MemberEta] = []  # Calculadas por ConvoyEtaService (no se persisten)
 
     class Config:
         populate_by_name = True
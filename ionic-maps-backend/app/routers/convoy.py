@@ -1,6 +1,10 @@
-from fastapi import APIRouter, HTTPException, Request, Body
-from app.models.schemas import Convoy, ConvoyCreate, ConvoyJoin, ConvoyUpdate
+import json
+from fastapi import APIRouter, HTTPException, Request, Response, Body, WebSocket, WebSocketDisconnect
+from app.models.schemas import Convoy, ConvoyCreate, ConvoyDestination, ConvoyJoin, ConvoyUpdate, LatLng
 from app.services.maps.convoy_service import ConvoyService
+from app.services.maps.convoy_live_service import convoy_hub
+from app.services.maps.location_gate import location_gate
+from app.services.maps.convoy_eta_service import ConvoyEtaService
 
 from app.database import get_database
 
@@ -9,6 +13,11 @@ router = APIRouter(prefix="/convoy", tags=["convoy"])
 def get_service(request: Request) -> ConvoyService:
     return ConvoyService(get_database())
 
+def with_etas(convoy: Convoy) -> Convoy:
+    """Adjuntar las últimas ETAs calculadas (caché de ConvoyEtaService)"""
+    convoy.etas = ConvoyEtaService.get_etas(convoy.id)
+    return convoy
+
 @router.post("/create", response_model=Convoy)
 async def create_convoy(
     data: ConvoyCreate,
@@ -27,27 +36,134 @@ async def join_convoy(
     result = await service.join_convoy(data)
     if not result:
         raise HTTPException(status_code=404, detail="Convoy no encontrado o inactivo")
+    
+    # Avisar a los miembros conectados por WebSocket (en cualquier worker)
+    convoy = result["convoy"]
+    member = next(m for m in convoy.members if m.user_id == result["user_id"])
+    await convoy_hub.add_member(convoy.id, member)
     return result
 
 @router.post("/{convoy_id}/update", response_model=Convoy)
 async def update_location(
     convoy_id: str,
     data: ConvoyUpdate,
+    request: Request,
+    response: Response
+):
+    """
+    Actualiza la ubicación del miembro
+    
+    Los fixes redundantes se descartan sin escribir. El header
+    X-Next-Update-Interval (ms) indica cada cuánto enviar el siguiente.
+    """
+    # Convoy con canal en vivo: se actualiza en memoria (sin DB)
+    if convoy_hub.is_live(convoy_id):
+        result = await convoy_hub.update_location(convoy_id, data.user_id, data.location)
+        if not result:
+            raise HTTPException(status_code=404, detail="Convoy o miembro no encontrado")
+        convoy = result["live"].to_model()
+    else:
+        service = get_service(request)
+        result = await service.update_member_location(convoy_id, data.user_id, data.location)
+        if not result:
+            raise HTTPException(status_code=404, detail="Convoy o miembro no encontrado")
+        convoy = result["convoy"]
+        if result["accepted"]:
+            # Otros workers pueden tener este convoy en vivo
+            member = next(m for m in convoy.members if m.user_id == data.user_id)
+            await convoy_hub.relay_location(convoy_id, data.user_id, data.location, member.last_update)
+    
+    if result["accepted"]:
+        ConvoyEtaService.on_member_moved(convoy_id, data.user_id, data.location)
+    response.headers["X-Next-Update-Interval"] = str(result["next_update_ms"])
+    return with_etas(convoy)
+
+@router.post("/{convoy_id}/destination", response_model=Convoy)
+async def set_destination(
+    convoy_id: str,
+    data: ConvoyDestination,
     request: Request
 ):
+    """Fija el destino común y calcula las ETAs de todos los miembros"""
     service = get_service(request)
-    result = await service.update_member_location(convoy_id, data.user_id, data.location)
-    if not result:
-        raise HTTPException(status_code=404, detail="Convoy o miembro no encontrado")
-    return result
+    result = await service.set_destination(convoy_id, data.user_id, data.destination)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Convoy no encontrado")
+    if result is False:
+        raise HTTPException(status_code=403, detail="Solo el anfitrión puede fijar el destino")
+    
+    await convoy_hub.set_destination(convoy_id, data.destination)
+    convoy = convoy_hub.get_convoy(convoy_id) or await service.get_convoy(convoy_id)
+    ConvoyEtaService.forget(convoy_id)
+    await ConvoyEtaService.refresh(convoy)
+    return with_etas(convoy)
+
+@router.get("/stats/gate")
+async def get_gate_stats():
+    """Updates de ubicación aceptados vs descartados por el gate"""
+    return location_gate.stats()
 
 @router.get("/{convoy_id}", response_model=Convoy)
 async def get_convoy_status(
     convoy_id: str,
     request: Request
 ):
+    live = convoy_hub.get_convoy(convoy_id)
+    if live:
+        return with_etas(live)
+    
     service = get_service(request)
     result = await service.get_convoy(convoy_id)
     if not result:
         raise HTTPException(status_code=404, detail="Convoy no encontrado")
-    return result
+    return with_etas(result)
+
+@router.websocket("/{convoy_id}/ws")
+async def convoy_channel(websocket: WebSocket, convoy_id: str, user_id: str):
+    """
+    Canal en tiempo real del convoy (?user_id=...)
+    
+    - Al conectar: {"type": "snapshot", "convoy": {...}}
+    - Cliente -> servidor: {"type": "location", "lat": .., "lng": ..}
+    - Servidor -> cliente: {"type": "member_update", "user_id", "lat", "lng", ...}
+      {"type": "member_joined", "member": {...}}, {"type": "member_status", ...},
+      {"type": "destination", "destination": {...}}
+      y {"type": "etas", "etas": [...]} al recalcular las ETAs al destino
+    - Servidor -> cliente: {"type": "rate", "next_update_ms": ..} cuando cambia
+      el intervalo recomendado de envío
+    - Servidor -> cliente: {"type": "error", "detail": ..} si un mensaje no es
+      válido; se ignora y el canal sigue abierto
+    """
+    if not await convoy_hub.connect(convoy_id, user_id, websocket):
+        await websocket.close(code=4404)
+        return
+    
+    last_rate = None
+    try:
+        while True:
+            text = await websocket.receive_text()
+            # Un frame malformado no debe cerrar el canal del miembro
+            try:
+                message = json.loads(text)
+                if not isinstance(message, dict) or message.get("type") != "location":
+                    continue
+                location = LatLng(lat=message["lat"], lng=message["lng"])
+            except (ValueError, KeyError, TypeError) as e:
+                await websocket.send_text(json.dumps({"type": "error", "detail": f"Mensaje inválido: {e}"}))
+                continue
+
+            try:
+                result = await convoy_hub.update_location(convoy_id, user_id, location)
+                if result and result["accepted"]:
+                    ConvoyEtaService.on_member_moved(convoy_id, user_id, location)
+                if result and result["next_update_ms"] != last_rate:
+                    last_rate = result["next_update_ms"]
+                    await convoy_hub.send_rate(convoy_id, user_id, last_rate)
+            except Exception as e:
+                print(f"⚠️ Error procesando ubicación del convoy: {e}")
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"❌ Error en canal de convoy: {e}")
+    finally:
+        await convoy_hub.disconnect(convoy_id, user_id, websocket)
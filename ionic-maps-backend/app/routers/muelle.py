@@ -0,0 +1,44 @@
+import uuid
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel
+from typing import Optional
+from fastapi.responses import JSONResponse
+from app.services.logistics.logistics_service import LogisticsService
+from app.services.core.socket_service import socket_manager
+from app.services.ai.scraper_ai_service import ScraperAIService
+from app.utils.admission import browser_lane, vision_lane
+
+# Muelle (logística): mismas rutas /agent/* que antes de separar los subsistemas
+router = APIRouter(prefix="/agent", tags=["Muelle"])
+
+class LogisticsRequest(BaseModel):
+    origin: str
+    destination: str
+    arrival_date: Optional[str] = None
+    job_id: Optional[str] = None  # El progreso se publica solo en el tópico job:<job_id> de /ws/caitlyn
+
+class DocumentParseRequest(BaseModel):
+    imagen: str # base64 del documento
+
+@router.post("/logistics", dependencies=[Depends(browser_lane.slot)])
+async def get_logistics_itineraries(request: LogisticsRequest):
+    """
+    Endpoint para buscar itinerarios reales usando Playwright + EasyOCR.
+    
+    El progreso solo llega a los suscriptores de job:<job_id> en /ws/caitlyn:
+    el cliente genera el job_id, se suscribe y después llama con él. Sin
+    job_id se genera uno (devuelto en la respuesta) y nadie ve el progreso.
+    """
+    job_id = request.job_id or uuid.uuid4().hex
+    with socket_manager.topic(f"job:{job_id}"):
+        result = await LogisticsService.get_itineraries(request.origin, request.destination, request.arrival_date)
+    result["job_id"] = job_id
+    return JSONResponse(content=result)
+
+@router.post("/logistics/parse-doc", dependencies=[Depends(vision_lane.slot)])
+async def parse_logistics_doc(request: DocumentParseRequest):
+    """
+    Lee un documento logístico (PDF o Imagen) para auto-completar Origen y Destino.
+    """
+    result = await ScraperAIService.parse_logistics_document(request.imagen)
+    return JSONResponse(content={"success": True, "data": result})
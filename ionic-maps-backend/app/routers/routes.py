@@ -1,18 +1,44 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
 from typing import List
+from datetime import datetime, timedelta
+import numpy as np
 from app.models.schemas import (
     RouteRequest,
     RouteInfo,
-    Incident
+    Incident,
+    BestDepartureRequest,
+    BestDepartureResult,
+    DepartureSlot
 )
 from app.services.maps.routing_service import RoutingService
 from app.services.core.weather_service import WeatherService
+from app.services.maps.route_weather_service import RouteWeatherService
 from app.services.maps.incident_service import IncidentService
 from app.services.ai.ml_service import MLService
+from app.services.maps.speed_profile_service import SpeedProfileService
+from app.services.maps.route_stats_service import RouteStatsService
+from app.services.maps.trip_service import TripService
+from app.utils.holidays import holiday_mask
+from app.utils.responses import FastJSONResponse
 
 router = APIRouter(prefix="/routes", tags=["Rutas"])
 
 
+async def _get_route_history(request: RouteRequest):
+    """Agregados históricos de la ruta para la hora actual (None si no hay)"""
+    now = datetime.now()
+    try:
+        return await RouteStatsService.get_stats(
+            TripService.route_hash(request.start, request.end),
+            now.hour,
+            now.weekday() >= 5
+        )
+    except Exception as e:
+        print(f"⚠️ Error leyendo historial de ruta: {e}")
+        return None
+
+
 @router.post("/calculate", response_model=RouteInfo)
 async def calculate_route(request: RouteRequest):
     """
@@ -24,8 +50,8 @@ async def calculate_route(request: RouteRequest):
     - Información del clima
     - Incidencias en la ruta
     """
-    # Obtener ruta base de OSRM
-    route_data = await RoutingService.get_route(request.start, request.end)
+    # Obtener ruta base de OSRM (con nodos para los perfiles de velocidad)
+    route_data = await RoutingService.get_route(request.start, request.end, annotations=True)
     
     if not route_data:
         raise HTTPException(status_code=404, detail="No se encontró ruta")
@@ -35,11 +61,14 @@ async def calculate_route(request: RouteRequest):
     distance = route["distance"]
     coordinates = route["geometry"]["coordinates"]
     
-    # Obtener clima
-    weather = await WeatherService.get_weather(request.start.lat, request.start.lng)
-    
-    # Obtener incidencias en la ruta
-    incidents = await IncidentService.get_incidents_on_route(coordinates)
+    # Clima (origen y pronóstico a lo largo de la ruta), incidencias e
+    # historial de la ruta en la franja actual, todo en paralelo
+    weather, weather_along_route, incidents, route_history = await asyncio.gather(
+        WeatherService.get_weather(request.start.lat, request.start.lng),
+        RouteWeatherService.along_route(coordinates, base_duration),
+        IncidentService.get_incidents_on_route(coordinates),
+        _get_route_history(request)
+    )
     
     # Predecir tiempo con ML
     incident_severities = [inc.severity.value for inc in incidents]
@@ -50,21 +79,108 @@ async def calculate_route(request: RouteRequest):
         weather_condition=weather.condition.value if weather else "clear",
         temperature=weather.temperature if weather else 25.0,
         incident_count=len(incidents),
-        incident_severities=incident_severities
+        incident_severities=incident_severities,
+        route_history=route_history,
+        route_weather=RouteWeatherService.segments(weather_along_route)
     )
+    predicted_duration = prediction.predicted_duration
+    
+    # ETA por segmento con los perfiles históricos de velocidad
+    segments = RoutingService.route_segments(route)
+    if segments:
+        now = datetime.now()
+        covered_seconds, uncovered_seconds, coverage = SpeedProfileService.estimate_eta(
+            *segments, SpeedProfileService.hour_of_week(now.weekday(), now.hour)
+        )
+        if coverage > 0:
+            # Segmentos con historial: tiempo aprendido; el resto: OSRM con el ajuste del ML
+            ml_factor = predicted_duration / base_duration if base_duration > 0 else 1.0
+            predicted_duration = covered_seconds + uncovered_seconds * ml_factor
+            prediction.factors_applied["segment_eta"] = covered_seconds + uncovered_seconds
+            prediction.factors_applied["segment_coverage"] = coverage
     
     return RouteInfo(
         distance=distance,
         duration=base_duration,
-        predicted_duration=prediction.predicted_duration,
+        predicted_duration=predicted_duration,
         coordinates=coordinates,
         weather=weather,
+        weather_along_route=weather_along_route,
         incidents_on_route=incidents,
         confidence=prediction.confidence,
         factors=prediction.factors_applied
     )
 
 
+@router.post("/best-departure", response_model=BestDepartureResult)
+async def best_departure(request: BestDepartureRequest):
+    """
+    Calcular la mejor hora de salida dentro de una ventana de tiempo
+
+    Evalúa la duración predicha para cada franja (por defecto cada 15 minutos
+    durante 24 horas) con una sola llamada al modelo ML.
+    """
+    route_data = await RoutingService.get_route(request.start, request.end)
+
+    if not route_data:
+        raise HTTPException(status_code=404, detail="No se encontró ruta")
+
+    route = route_data["routes"][0]
+    base_duration = route["duration"]
+    distance = route["distance"]
+
+    weather = await WeatherService.get_weather(request.start.lat, request.start.lng)
+    incidents = await IncidentService.get_incidents_on_route(route["geometry"]["coordinates"])
+
+    # Franjas de salida: redondear el inicio a la siguiente franja completa
+    slot = np.timedelta64(request.slot_minutes, "m")
+    departure_from = request.departure_from or datetime.now()
+    if departure_from.tzinfo is not None:
+        # Hora local naive, como datetime.now(): numpy pasaría a UTC y correría hora, día y feriado
+        departure_from = departure_from.astimezone().replace(tzinfo=None)
+    origin = np.datetime64(departure_from, "m")
+    first = origin + (-(origin - np.datetime64(0, "m")) % slot)
+    departures = first + np.arange(request.window_hours * 60 // request.slot_minutes) * slot
+
+    # Features de calendario calculadas de forma vectorizada
+    hours = departures.astype("datetime64[h]").astype(int) % 24
+    days_of_week = (departures.astype("datetime64[D]").astype(int) + 3) % 7  # 1970-01-01 fue jueves
+    holidays = holiday_mask(departures)
+
+    factors, confidence = MLService.predict_batch(
+        base_duration=base_duration,
+        distance=distance,
+        hours=hours,
+        days_of_week=days_of_week,
+        holidays=holidays,
+        weather_condition=weather.condition.value if weather else "clear",
+        temperature=weather.temperature if weather else 25.0,
+        incident_count=len(incidents),
+        incident_severities=[inc.severity.value for inc in incidents]
+    )
+    predicted = base_duration * factors
+
+    slots = [
+        DepartureSlot(
+            departure_time=departure,
+            arrival_time=departure + timedelta(seconds=float(duration)),
+            predicted_duration=float(duration),
+            adjustment_factor=float(factor)
+        )
+        for departure, duration, factor in zip(departures.astype(datetime), predicted, factors)
+    ]
+    best = np.argsort(predicted, kind="stable")[:request.top_n]
+
+    return BestDepartureResult(
+        distance=distance,
+        duration=base_duration,
+        confidence=confidence,
+        slots_evaluated=len(slots),
+        best_slots=[slots[i] for i in best],
+        slots=slots
+    )
+
+
 @router.post("/alternatives")
 async def get_alternative_routes(request: RouteRequest):
     """
@@ -76,6 +192,7 @@ async def get_alternative_routes(request: RouteRequest):
         raise HTTPException(status_code=404, detail="No se encontraron rutas")
     
     weather = await WeatherService.get_weather(request.start.lat, request.start.lng)
+    route_history = await _get_route_history(request)
     
     alternatives = []
     
@@ -94,7 +211,9 @@ async def get_alternative_routes(request: RouteRequest):
             weather_condition=weather.condition.value if weather else "clear",
             temperature=weather.temperature if weather else 25.0,
             incident_count=len(incidents),
-            incident_severities=incident_severities
+            incident_severities=incident_severities,
+            # El historial corresponde a la ruta habitual (principal)
+            route_history=route_history if i == 0 else None
         )
         
         alternatives.append({
@@ -112,11 +231,12 @@ async def get_alternative_routes(request: RouteRequest):
     # Ordenar por tiempo predicho
     alternatives.sort(key=lambda x: x["predicted_duration"])
     
-    return {
+    # Dict crudo directo a JSON: las coordenadas completas no pasan por jsonable_encoder
+    return FastJSONResponse({
         "weather": weather,
         "alternatives": alternatives,
         "recommended_index": alternatives[0]["index"] if alternatives else 0
-    }
+    })
 
 
 @router.post("/predict-external")
@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from app.scrapers.docs_scraper_service import DocsScraperService
 
-router = APIRouter()
+router = APIRouter(prefix="/api/scraper")
 
 class DocsRequest(BaseModel):
     source_lang: str
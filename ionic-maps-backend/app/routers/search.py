@@ -0,0 +1,31 @@
+from fastapi import APIRouter
+from typing import Any, Dict, List, Optional
+from app.services.core.search_service import SearchService
+from app.services.core.poi_index_service import PoiIndexService
+from app.services.core.autocomplete_service import AutocompleteService
+
+router = APIRouter(prefix="/search", tags=["Búsqueda"])
+
+
+@router.get("/nearby")
+async def find_nearby(query: str, lat: float, lng: float, radius_km: float = 5.0, limit: int = 5) -> List[Dict[str, Any]]:
+    """Buscar lugares cercanos (índice local de POIs, Nominatim como respaldo)"""
+    return await SearchService.find_nearby_places(query, lat, lng, radius_km, limit)
+
+
+@router.get("/autocomplete")
+async def autocomplete(q: str, lat: Optional[float] = None, lng: Optional[float] = None, limit: int = 8) -> List[Dict[str, Any]]:
+    """Sugerencias de destino por prefijo (favoritos, destinos frecuentes, lugares buscados y POIs)"""
+    return AutocompleteService.complete(q, lat, lng, limit)
+
+
+@router.get("/poi/stats")
+async def get_poi_stats():
+    """Estado del índice local de POIs"""
+    return PoiIndexService.stats()
+
+
+@router.post("/poi/reload")
+async def reload_poi_index():
+    """Reconstruir el índice de POIs desde POI_DATASET_PATH sin cortar las búsquedas"""
+    return await PoiIndexService.reload()
@@ -1,7 +1,7 @@
 import os
 import logging
 import httpx
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
 import json
 from pydantic import BaseModel
 from typing import Optional
@@ -9,6 +9,8 @@ from app.services.translator.verso_translator import HybridTranslator
 from app.services.translator.github_reader import GitHubRepoReader, GitHubReaderError
 from app.services.translator.verso_cache import VersoCache
 from app.config import get_settings
+from app.utils.responses import FastJSONResponse
+from app.utils.admission import translate_lane
 
 router = APIRouter(prefix="/api/translator", tags=["translator"])
 
@@ -34,14 +36,6 @@ class TranslateRepoRequest(BaseModel):
     branch: Optional[str] = None
 
 
-class FileTranslation(BaseModel):
-    path: str
-    language: str
-    original: str
-    translated: str
-    method: str
-
-
 class TranslateResponse(BaseModel):
     result: str
     source_lang: str
@@ -98,8 +92,14 @@ async def translate_code(req: TranslateRequest):
     )
 
 
-@router.post("/translate-repo")
-async def translate_repo(req: TranslateRepoRequest):
+@router.post("/translate-repo", dependencies=[Depends(translate_lane.slot)])
+async def translate_repo(req: TranslateRepoRequest, include_original: bool = True):
+    """
+    Traducir todos los archivos de un repositorio
+
+    Con include_original=false no se devuelve el código fuente de cada
+    archivo (el cliente ya lo tiene), lo que reduce la respuesta a la mitad.
+    """
     try:
         files = await github_reader.list_files(req.repo_url)
     except GitHubReaderError as e:
@@ -110,14 +110,14 @@ async def translate_repo(req: TranslateRepoRequest):
     if not files:
         raise HTTPException(400, "No se encontraron archivos traducibles en el repositorio")
 
-    translations: list[FileTranslation] = []
+    translations: list[dict] = []
 
     for f in files:
         if req.source_lang and f.language.upper() != req.source_lang.upper():
-            translations.append(FileTranslation(
+            translations.append(dict(
                 path=f.path,
                 language=f.language,
-                original=f.content,
+                original=f.content if include_original else None,
                 translated=f"# SKIPPED: language {f.language} != {req.source_lang}",
                 method="skipped",
             ))
@@ -130,30 +130,30 @@ async def translate_repo(req: TranslateRepoRequest):
                 target_lang=req.target_lang,
                 target_version=req.target_version,
             )
-            translations.append(FileTranslation(
+            translations.append(dict(
                 path=f.path,
                 language=f.language,
-                original=f.content,
+                original=f.content if include_original else None,
                 translated=result["result"],
                 method=result["method"],
             ))
         except Exception as e:
-            translations.append(FileTranslation(
+            translations.append(dict(
                 path=f.path,
                 language=f.language,
-                original=f.content,
+                original=f.content if include_original else None,
                 translated=f"# ERROR: {str(e)}",
                 method="error",
             ))
 
-    return {
+    return FastJSONResponse({
         "repo_url": req.repo_url,
         "total_files": len(files),
-        "translated": len([t for t in translations if t.method not in ("skipped", "error")]),
-        "skipped": len([t for t in translations if t.method == "skipped"]),
-        "errors": len([t for t in translations if t.method == "error"]),
+        "translated": len([t for t in translations if t["method"] not in ("skipped", "error")]),
+        "skipped": len([t for t in translations if t["method"] == "skipped"]),
+        "errors": len([t for t in translations if t["method"] == "error"]),
         "files": translations,
-    }
+    })
 
 
 @router.get("/languages")
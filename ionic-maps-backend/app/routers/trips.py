@@ -1,8 +1,12 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-from app.models.schemas import Trip, TripCreate
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import ValidationError
+from typing import List, Literal
+import zlib
+from app.models.schemas import Trip, TripCreate, TripBulkRow, TripBulkResult, TraceUpload
 from app.services.maps.trip_service import TripService
+from app.services.maps.trip_trace_service import TripTraceService
 from app.services.ai.ml_service import MLService
+from app.utils.responses import FastJSONResponse
 
 router = APIRouter(prefix="/trips", tags=["Viajes"])
 
@@ -17,6 +21,84 @@ async def save_trip(trip: TripCreate):
     return await TripService.save_trip(trip=trip)
 
 
+BULK_CHUNK_SIZE = 2000     # Filas validadas por insert_many
+BULK_MAX_ERRORS = 1000     # Errores devueltos en la respuesta
+
+
+@router.post("/bulk", response_model=TripBulkResult)
+async def save_trips_bulk(request: Request):
+    """
+    Carga masiva de viajes en NDJSON (un TripBulkRow por línea)
+    
+    Acepta el cuerpo plano o comprimido con gzip (Content-Encoding: gzip).
+    El cuerpo se procesa en streaming por bloques, así que sirve para cargar
+    millones de viajes históricos. Devuelve los errores por número de línea.
+    """
+    gzipped = "gzip" in request.headers.get("content-encoding", "") or \
+        "gzip" in request.headers.get("content-type", "")
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+    
+    received = inserted = failed = 0
+    errors: List[dict] = []
+    chunk: list = []
+    pending = b""
+    line_no = 0
+    
+    def add_error(line: int, message: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < BULK_MAX_ERRORS:
+            errors.append({"line": line, "error": message})
+    
+    def parse(raw: bytes):
+        nonlocal line_no, received
+        line_no += 1
+        raw = raw.strip()
+        if not raw:
+            return
+        received += 1
+        try:
+            chunk.append((line_no, TripBulkRow.model_validate_json(raw)))
+        except ValidationError as e:
+            add_error(line_no, "; ".join(
+                f"{'.'.join(str(p) for p in err['loc']) or 'json'}: {err['msg']}" for err in e.errors()
+            ))
+    
+    async def flush():
+        nonlocal inserted
+        count, write_errors = await TripService.save_trips_bulk(chunk)
+        inserted += count
+        for err in write_errors:
+            add_error(err["line"], err["error"])
+        chunk.clear()
+    
+    try:
+        async for data in request.stream():
+            if decompressor:
+                data = decompressor.decompress(data)
+            *lines, pending = (pending + data).split(b"\n")
+            for raw in lines:
+                parse(raw)
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                await flush()
+        
+        if decompressor:
+            pending += decompressor.flush()
+        for raw in pending.split(b"\n"):
+            parse(raw)
+        await flush()
+    except zlib.error as e:
+        raise HTTPException(status_code=400, detail=f"Cuerpo gzip inválido: {e}")
+    
+    return TripBulkResult(
+        received=received,
+        inserted=inserted,
+        failed=failed,
+        errors=errors,
+        errors_truncated=failed > len(errors)
+    )
+
+
 @router.get("/count")
 async def get_trips_count():
     """Obtener cantidad de viajes registrados"""
@@ -33,18 +115,44 @@ async def get_trips_count():
 async def get_trips(limit: int = 100):
     """Obtener viajes registrados"""
     trips = await TripService.get_all_trips(limit=limit)
-    return {"trips": trips, "count": len(trips)}
+    return FastJSONResponse({"trips": trips, "count": len(trips)})
+
+
+@router.post("/{trip_id}/trace")
+async def upload_trace(trip_id: str, trace: TraceUpload):
+    """
+    Subir la traza GPS de un viaje (opcional)
+    
+    Se guarda comprimida (deltas + varint) en la colección time-series
+    `trip_traces`. Se puede llamar varias veces para enviarla por partes.
+    """
+    if not await TripService.trip_exists(trip_id):
+        raise HTTPException(status_code=404, detail="Viaje no encontrado")
+    return await TripTraceService.save_trace(trip_id, trace.points)
+
+
+@router.get("/{trip_id}/trace")
+async def get_trace(trip_id: str):
+    """Obtener la traza GPS decodificada de un viaje"""
+    trace = await TripTraceService.get_trace(trip_id)
+    if not trace:
+        raise HTTPException(status_code=404, detail="El viaje no tiene traza")
+    return trace
 
 
 @router.post("/train")
-async def train_model():
+async def train_model(engine: Literal["gbr", "hist"] = "gbr", limit: int = 5000):
     """
     Entrenar modelo ML con los viajes registrados
     
     Requiere al menos 10 viajes
+    
+    - engine=gbr: modelo clásico (rápido para pocos datos)
+    - engine=hist: HistGradientBoosting con validación temporal en paralelo,
+      búsqueda de hiperparámetros y error sobre holdout (recomendado para 1M+ viajes)
     """
-    trips = await TripService.get_all_trips(limit=5000)
-    result = await MLService.train_model(trips)
+    trips = await TripService.get_training_trips(limit=limit)
+    result = await MLService.train_model(trips, engine=engine)
     
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["message"])
@@ -8,9 +8,21 @@ from app.scrapers.som_utils import SOM_JS
 from app.scrapers.port_utils import extraer_busqueda, detectar_sitio, sitio_soporta_locode
 from app.services.core.socket_service import socket_manager
 from app.database import get_database
+from app.utils.cached_collection import CachedCollection
+from app.utils.tracing import traced
 
 settings = get_settings()
 
+
+async def _load_knowledge(domain: str):
+    return await get_database().caitlyn_knowledge.find_one({"domain": domain})
+
+
+# Selectores aprendidos por sitio ("modo bala"): se leen en cada búsqueda y cambian rara vez
+knowledge_cache = CachedCollection(
+    "caitlyn_knowledge", _load_knowledge, ttl=3600, collection="caitlyn_knowledge", key_field="domain"
+)
+
 class ScheduleHunterService:
     @staticmethod
     async def _emit_log(message: str):
@@ -19,6 +31,7 @@ class ScheduleHunterService:
         await socket_manager.broadcast(message)
 
     @classmethod
+    @traced("scraper_browser")
     async def cazar_itinerarios(cls, origen: str, destino: str, arrival_date: str = None, target_url: str = "https://www.searates.com/freight/", screenshot_name: str = "ultima_busqueda.png"):
         await cls._emit_log(f"🤖 [CAITLYN] Iniciando misión de caza: {origen} -> {destino} (Fecha: {arrival_date})")
         
@@ -93,7 +106,7 @@ class ScheduleHunterService:
                     
                     # --- NAVEGACIÓN INTELIGENTE (AGENTIC VISION CON CACHÉ) ---
                     db = get_database()
-                    knowledge = await db.caitlyn_knowledge.find_one({"domain": site_name})
+                    knowledge = await knowledge_cache.get(site_name)
                     used_cache = False
                     
                     if knowledge and knowledge.get("origin_selector") and knowledge.get("dest_selector") and knowledge.get("button_selector"):
@@ -198,6 +211,7 @@ class ScheduleHunterService:
                                     {"$set": new_knowledge},
                                     upsert=True
                                 )
+                                knowledge_cache.invalidate(site_name)
                                 await cls._emit_log(f"🧠 [CAITLYN] ¡Aprendizaje guardado en BD para futuras búsquedas en {site_name}! Se usarán selectores la próxima vez.")
                                 
                         except Exception as e:
@@ -1,5 +1,7 @@
 import os
 import json
+import asyncio
+import threading
 from typing import Optional, List, Dict
 from app.database import get_database
 from rapidfuzz import process, fuzz
@@ -25,6 +27,7 @@ class CaitlynVisionService:
     
     COLLECTION_NAME = "caitlyn_vision"
     _reader = None
+    _reader_lock = threading.Lock()  # El OCR corre en hilos: un solo modelo cargado
 
     @classmethod
     def _get_reader(cls):
@@ -32,9 +35,10 @@ class CaitlynVisionService:
         if not EASYOCR_AVAILABLE:
             return None
             
-        if cls._reader is None:
-            # Optimizamos para CPU si no hay GPU disponible
-            cls._reader = easyocr.Reader(['es', 'en'], gpu=False)
+        with cls._reader_lock:
+            if cls._reader is None:
+                # Optimizamos para CPU si no hay GPU disponible
+                cls._reader = easyocr.Reader(['es', 'en'], gpu=False)
         return cls._reader
 
     @classmethod
@@ -242,23 +246,12 @@ class CaitlynVisionService:
         return productos
 
     @classmethod
-    async def blind_scan_invoice(cls, base64_image: str) -> Dict:
-        """
-        MODO SUPERVIVENCIA: Lee toda la foto cuando Gemini falla.
-        Aplica preprocesamiento de imagen antes del OCR para máxima calidad.
-        Busca RUC, Totales y Nombres de forma ciega.
-        """
+    def _blind_ocr(cls, base64_image: str) -> Optional[str]:
+        """Texto completo de la imagen (None si EasyOCR no está disponible)"""
         img = cls._base64_to_cv2(base64_image)
         reader = cls._get_reader()
-
         if reader is None:
-            return {
-                "success": False,
-                "metodo": "blind_local_scan",
-                "productos": [],
-                "fiscal": {},
-                "error": "EasyOCR no está disponible en este servidor."
-            }
+            return None
 
         # Preprocesar la imagen para mejorar la calidad del OCR
         processed = cls._preprocess_for_ocr(img)
@@ -274,7 +267,26 @@ class CaitlynVisionService:
             adjust_contrast=0.7,    # Ajuste de contraste EasyOCR
             width_ths=0.7,          # Ancho mínimo para agrupar
         )
-        full_text = "\n".join(text_data)
+        return "\n".join(text_data)
+
+    @classmethod
+    async def blind_scan_invoice(cls, base64_image: str) -> Dict:
+        """
+        MODO SUPERVIVENCIA: Lee toda la foto cuando Gemini falla.
+        Aplica preprocesamiento de imagen antes del OCR para máxima calidad.
+        Busca RUC, Totales y Nombres de forma ciega.
+        """
+        # Carga del modelo, preprocesado y OCR son CPU puro: fuera del event loop
+        full_text = await asyncio.to_thread(cls._blind_ocr, base64_image)
+
+        if full_text is None:
+            return {
+                "success": False,
+                "metodo": "blind_local_scan",
+                "productos": [],
+                "fiscal": {},
+                "error": "EasyOCR no está disponible en este servidor."
+            }
 
         print(f"🕵️‍♀️ Caitlyn 'Escaneo Ciego' detectó: {full_text[:150]}...")
 
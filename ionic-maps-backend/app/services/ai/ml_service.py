@@ -1,13 +1,17 @@
 import os
 import io
+import time
+import asyncio
 import joblib
 import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Union
 from app.database import get_database
 from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.preprocessing import LabelEncoder
+from app.services.ai.training_engine import HistTrainingEngine
+from app.utils.tracing import traced
 from app.models.schemas import (
     PredictionFeatures, 
     PredictionResult, 
@@ -54,6 +58,11 @@ class MLService:
         22: 0.95, 23: 0.9,
     }
     
+    # Historial por ruta (RouteStatsService): peso del prior en la mezcla
+    # factor = (n * media_historial + K * factor_base) / (n + K)
+    ROUTE_HISTORY_PRIOR = 5
+    ROUTE_HISTORY_MIN_COUNT = 3
+    
     INCIDENT_SEVERITY_FACTORS = {
         "low": 1.05,
         "medium": 1.15,
@@ -96,8 +105,15 @@ class MLService:
             print(f"❌ Error cargando modelo: {e}")
     
     @classmethod
-    async def train_model(cls, trips: List[dict]) -> dict:
-        """Entrenar modelo con datos de viajes históricos"""
+    async def train_model(cls, trips: List[dict], engine: str = "gbr") -> dict:
+        """
+        Entrenar modelo con datos de viajes históricos
+        
+        engine:
+            - "gbr": GradientBoostingRegressor clásico (MAE sobre entrenamiento)
+            - "hist": HistGradientBoosting multinúcleo con CV temporal en paralelo,
+              búsqueda de hiperparámetros y MAE sobre holdout (ver HistTrainingEngine)
+        """
         if len(trips) < 10:
             return {
                 "success": False,
@@ -108,6 +124,9 @@ class MLService:
         try:
             # Preparar datos
             df = pd.DataFrame(trips)
+            if engine == "hist" and 'created_at' in df.columns:
+                # La validación temporal necesita los viajes en orden cronológico
+                df = df.sort_values('created_at', kind='stable').reset_index(drop=True)
             
             # Features
             features = [
@@ -128,19 +147,27 @@ class MLService:
                 df['temperature'] = df['temperature'].fillna(25.0)
                 features.append('temperature')
             
-            X = df[features].values
+            X = df[features].to_numpy(dtype=float)
             
             # Target: ratio real vs estimado (qué tanto se desvía)
             y = df['actual_duration'].values / df['estimated_duration'].values
             
             # Entrenar modelo
-            cls.model = GradientBoostingRegressor(
-                n_estimators=100,
-                max_depth=5,
-                learning_rate=0.1,
-                random_state=42
-            )
-            cls.model.fit(X, y)
+            engine_report = {}
+            if engine == "hist":
+                report = await asyncio.to_thread(HistTrainingEngine.train, X, y)
+                cls.model = report.pop("model")
+                engine_report = report
+            else:
+                started = time.perf_counter()
+                cls.model = GradientBoostingRegressor(
+                    n_estimators=100,
+                    max_depth=5,
+                    learning_rate=0.1,
+                    random_state=42
+                )
+                cls.model.fit(X, y)
+                engine_report = {"train_time_s": round(time.perf_counter() - started, 3)}
             cls.is_trained = True
             
             # Guardar en MongoDB para persistencia en la nube
@@ -174,16 +201,21 @@ class MLService:
             predictions = cls.model.predict(X)
             mae = np.mean(np.abs(predictions - y))
             
-            return {
+            result = {
                 "success": True,
                 "message": "Modelo entrenado exitosamente",
+                "engine": engine,
                 "trips_count": len(trips),
                 "mae": float(mae),
-                "feature_importance": dict(zip(
+                **engine_report
+            }
+            # HistGradientBoosting no expone importancias por impureza
+            if hasattr(cls.model, "feature_importances_"):
+                result["feature_importance"] = dict(zip(
                     features,
                     [float(x) for x in cls.model.feature_importances_]
                 ))
-            }
+            return result
             
         except Exception as e:
             return {
@@ -193,6 +225,7 @@ class MLService:
             }
     
     @classmethod
+    @traced("ml")
     def predict(
         cls,
         base_duration: float,
@@ -203,9 +236,18 @@ class MLService:
         day_of_week: Optional[int] = None,
         is_holiday: bool = False,
         incident_count: int = 0,
-        incident_severities: List[str] = []
+        incident_severities: List[str] = [],
+        route_history: Optional[dict] = None,
+        route_weather: Optional[List[Tuple[float, str]]] = None
     ) -> PredictionResult:
-        """Predecir tiempo de viaje ajustado"""
+        """
+        Predecir tiempo de viaje ajustado
+        
+        route_history: {count, mean, variance} del ratio real/estimado de esta
+        ruta en la franja actual (ver RouteStatsService)
+        route_weather: [(fracción del viaje, condición)] por tramo, con el
+        pronóstico a la hora de paso (ver RouteWeatherService)
+        """
         
         now = datetime.now()
         if hour is None:
@@ -255,6 +297,22 @@ class MLService:
                 incident_count, incident_severities
             )
         
+        if route_history and route_history["count"] >= cls.ROUTE_HISTORY_MIN_COUNT:
+            adjustment_factor, confidence = cls._blend_route_history(
+                adjustment_factor, confidence, route_history
+            )
+            factors_applied["route_history"] = route_history["mean"]
+            factors_applied["route_history_count"] = route_history["count"]
+        
+        if route_weather:
+            # Sustituir el efecto del clima en el origen por el promedio de los tramos
+            total = sum(fraction for fraction, _ in route_weather)
+            segment_factor = sum(
+                fraction * cls._weather_factor(condition) for fraction, condition in route_weather
+            ) / total
+            adjustment_factor *= segment_factor / cls._weather_factor(weather_condition)
+            factors_applied["route_weather"] = segment_factor
+        
         predicted_duration = base_duration * adjustment_factor
         
         return PredictionResult(
@@ -264,6 +322,99 @@ class MLService:
             confidence=confidence,
             factors_applied=factors_applied
         )
+
+    @classmethod
+    @traced("ml")
+    def predict_batch(
+        cls,
+        base_duration: Union[float, np.ndarray],
+        distance: Union[float, np.ndarray],
+        hours: np.ndarray,
+        days_of_week: np.ndarray,
+        holidays: np.ndarray,
+        weather_condition: str = "clear",
+        temperature: float = 25.0,
+        incident_count: int = 0,
+        incident_severities: List[str] = []
+    ) -> Tuple[np.ndarray, float]:
+        """
+        Predecir factores de ajuste para muchas franjas horarias de una misma ruta
+        (o, pasando arreglos en base_duration/distance, para muchas rutas)
+
+        Construye la matriz de features completa y hace una sola llamada al modelo
+        (o aplica las heurísticas de forma vectorizada).
+
+        Returns:
+            (factores de ajuste por franja, confianza)
+        """
+        hours = np.asarray(hours, dtype=int)
+        days_of_week = np.asarray(days_of_week, dtype=int)
+        holidays = np.asarray(holidays, dtype=bool)
+        is_weekend = days_of_week >= 5
+        n = len(hours)
+
+        if cls.is_trained and cls.model is not None:
+            try:
+                columns = [
+                    np.broadcast_to(np.asarray(distance, dtype=float), n),
+                    np.broadcast_to(np.asarray(base_duration, dtype=float), n),
+                    hours,
+                    days_of_week,
+                    is_weekend.astype(int),
+                    holidays.astype(int),
+                    np.full(n, int(incident_count > 0))
+                ]
+
+                if cls.weather_encoder:
+                    try:
+                        weather_encoded = cls.weather_encoder.transform([weather_condition])[0]
+                    except:
+                        weather_encoded = 0
+                    columns.append(np.full(n, weather_encoded))
+
+                columns.append(np.full(n, temperature))
+
+                factors = cls.model.predict(np.column_stack(columns).astype(float))
+                return np.asarray(factors, dtype=float), 0.8
+            except Exception as e:
+                print(f"Error en predicción ML por lotes: {e}")
+
+        # Heurísticas vectorizadas (mismas reglas que _heuristic_prediction)
+        hour_table = np.array([cls.HOUR_FACTORS.get(h, 1.0) for h in range(24)])
+        hour_factor = hour_table[hours % 24]
+        hour_factor = np.where(is_weekend, 1.0 + (hour_factor - 1.0) * 0.5, hour_factor)
+        hour_factor = np.where(holidays, 0.9, hour_factor)
+
+        _, _, scalar_factors = cls._heuristic_prediction(
+            0, weather_condition, False, False, incident_count, incident_severities
+        )
+        constant_factor = scalar_factors["weather"] * scalar_factors.get("incidents", 1.0)
+
+        return hour_factor * constant_factor, 0.5
+
+    @classmethod
+    def _blend_route_history(
+        cls,
+        factor: float,
+        confidence: float,
+        route_history: dict
+    ) -> Tuple[float, float]:
+        """Mezclar el factor base con el historial de la ruta (shrinkage)"""
+        n = route_history["count"]
+        weight = n / (n + cls.ROUTE_HISTORY_PRIOR)
+        blended = weight * route_history["mean"] + (1 - weight) * factor
+        
+        # Más viajes y menos dispersión => más confianza (máx. 0.95)
+        spread = min(route_history["variance"] ** 0.5, 1.0)
+        history_confidence = 0.95 * weight * (1 - spread)
+        return blended, max(confidence, history_confidence)
+    
+    @classmethod
+    def _weather_factor(cls, weather_condition: str) -> float:
+        try:
+            return cls.WEATHER_FACTORS.get(WeatherCondition(weather_condition), 1.0)
+        except ValueError:
+            return 1.0
     
     @classmethod
     def _heuristic_prediction(
@@ -290,11 +441,7 @@ class MLService:
         total_factor *= hour_factor
         
         # Factor por clima
-        try:
-            weather_enum = WeatherCondition(weather_condition)
-            weather_factor = cls.WEATHER_FACTORS.get(weather_enum, 1.0)
-        except:
-            weather_factor = 1.0
+        weather_factor = cls._weather_factor(weather_condition)
         factors["weather"] = weather_factor
         total_factor *= weather_factor
         
@@ -7,6 +7,7 @@ import cohere
 from PIL import Image
 import io
 from app.config import get_settings, GEMINI_MODELS, COHERE_MODELS
+from app.utils.tracing import traced
 
 class ScraperAIService:
     """
@@ -29,9 +30,10 @@ class ScraperAIService:
         settings = get_settings()
         if not settings.cohere_api_key:
             raise ValueError("No se encontró COHERE_API_KEY en .env")
-        return cohere.ClientV2(api_key=settings.cohere_api_key)
+        return cohere.AsyncClientV2(api_key=settings.cohere_api_key)
 
     @classmethod
+    @traced("llm")
     async def get_som_target(cls, screenshot_bytes: bytes, instructions: str) -> dict:
         """
         Envía la captura de pantalla con las etiquetas numéricas a Gemini.
@@ -77,6 +79,7 @@ class ScraperAIService:
         raise Exception("❌ Todos los modelos de Gemini fallaron en el escaneo visual.")
 
     @classmethod
+    @traced("llm")
     async def extract_schedules_json(cls, raw_text: str) -> list:
         """
         Envía el texto sucio de los resultados a Cohere.
@@ -116,8 +119,8 @@ class ScraperAIService:
         for model_name in COHERE_MODELS:
             print(f"🤖 [ScraperAI - Cohere] Intentando con modelo: {model_name}")
             try:
-                # Usar ClientV2 para soporte de chat
-                response = co_client.chat(
+                # AsyncClientV2: chat sin bloquear el event loop
+                response = await co_client.chat(
                     model=model_name,
                     messages=[{"role": "user", "content": prompt}],
                     temperature=0.0
@@ -140,6 +143,7 @@ class ScraperAIService:
         raise Exception("❌ Todos los modelos de Cohere fallaron en la extracción de texto.")
 
     @classmethod
+    @traced("llm")
     async def parse_logistics_document(cls, base64_image: str) -> dict:
         """
         Extrae Origen y Destino a partir de la foto de un documento (Packing List, Factura).
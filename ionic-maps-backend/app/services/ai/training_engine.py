@@ -0,0 +1,110 @@
+import time
+import itertools
+import numpy as np
+from typing import List, Optional
+from joblib import Parallel, delayed
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.model_selection import TimeSeriesSplit
+
+
+class HistTrainingEngine:
+    """
+    Motor de entrenamiento escalable para el predictor de rutas
+
+    - HistGradientBoostingRegressor (binning + OpenMP, apto para 1M+ filas)
+    - Validación K-fold respetando el orden temporal (TimeSeriesSplit)
+    - Folds x candidatos evaluados en paralelo en procesos (joblib/loky)
+    - Búsqueda pequeña de hiperparámetros con early stopping como presupuesto
+    - Holdout final con los viajes más recientes
+    """
+
+    N_SPLITS = 4
+    HOLDOUT_FRACTION = 0.1
+    MAX_ITER = 300          # Presupuesto de árboles por candidato
+    N_ITER_NO_CHANGE = 10   # Paciencia del early stopping
+
+    PARAM_GRID = {
+        "learning_rate": [0.05, 0.1],
+        "max_leaf_nodes": [15, 31],
+        "l2_regularization": [0.0, 1.0],
+    }
+
+    @classmethod
+    def _candidates(cls) -> List[dict]:
+        keys = list(cls.PARAM_GRID)
+        return [dict(zip(keys, values)) for values in itertools.product(*cls.PARAM_GRID.values())]
+
+    @classmethod
+    def _build(cls, params: dict, max_iter: Optional[int] = None) -> HistGradientBoostingRegressor:
+        return HistGradientBoostingRegressor(
+            max_iter=max_iter or cls.MAX_ITER,
+            early_stopping=max_iter is None,
+            n_iter_no_change=cls.N_ITER_NO_CHANGE,
+            validation_fraction=0.1,
+            random_state=42,
+            **params
+        )
+
+    @classmethod
+    def _evaluate_fold(cls, params: dict, X: np.ndarray, y: np.ndarray, train_idx, test_idx) -> tuple:
+        model = cls._build(params)
+        model.fit(X[train_idx], y[train_idx])
+        mae = float(np.mean(np.abs(model.predict(X[test_idx]) - y[test_idx])))
+        return mae, int(model.n_iter_)
+
+    @classmethod
+    def train(cls, X: np.ndarray, y: np.ndarray, n_jobs: int = -1) -> dict:
+        """
+        Entrenar con X, y ya ordenados cronológicamente (más antiguo primero)
+
+        Returns:
+            dict con el modelo final, MAE de validación cruzada y de holdout,
+            mejores hiperparámetros y tiempos
+        """
+        started = time.perf_counter()
+
+        holdout_size = max(1, int(len(y) * cls.HOLDOUT_FRACTION))
+        X_train, y_train = X[:-holdout_size], y[:-holdout_size]
+        X_holdout, y_holdout = X[-holdout_size:], y[-holdout_size:]
+
+        # 1. Búsqueda de hiperparámetros con CV temporal en paralelo
+        n_splits = min(cls.N_SPLITS, max(2, len(y_train) // 50))
+        folds = list(TimeSeriesSplit(n_splits=n_splits).split(X_train))
+        candidates = cls._candidates()
+
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(cls._evaluate_fold)(params, X_train, y_train, train_idx, test_idx)
+            for params in candidates
+            for train_idx, test_idx in folds
+        )
+
+        scores = []
+        for i, params in enumerate(candidates):
+            fold_results = results[i * n_splits:(i + 1) * n_splits]
+            scores.append({
+                "params": params,
+                "cv_mae": float(np.mean([mae for mae, _ in fold_results])),
+                "n_iter": int(np.median([n_iter for _, n_iter in fold_results])),
+            })
+        best = min(scores, key=lambda s: s["cv_mae"])
+        search_time = time.perf_counter() - started
+
+        # 2. Error de generalización sobre los viajes más recientes
+        model = cls._build(best["params"], max_iter=best["n_iter"])
+        model.fit(X_train, y_train)
+        holdout_mae = float(np.mean(np.abs(model.predict(X_holdout) - y_holdout)))
+
+        # 3. Modelo final con todos los datos y el número de árboles elegido
+        model = cls._build(best["params"], max_iter=best["n_iter"])
+        model.fit(X, y)
+
+        return {
+            "model": model,
+            "cv_mae": best["cv_mae"],
+            "holdout_mae": holdout_mae,
+            "best_params": {**best["params"], "max_iter": best["n_iter"]},
+            "candidates_evaluated": len(candidates),
+            "folds": n_splits,
+            "search_time_s": round(search_time, 3),
+            "train_time_s": round(time.perf_counter() - started, 3),
+        }
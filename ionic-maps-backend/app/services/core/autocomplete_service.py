@@ -0,0 +1,199 @@
+import bisect
+import math
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+from app.database import get_database
+from app.services.core.poi_index_service import PoiIndexService, normalize_text, word_suffixes
+
+
+class AutocompleteService:
+    """
+    Autocompletado de destinos en memoria (una consulta por tecla)
+
+    Fuentes propias del usuario: favoritos, destinos de viajes (end_name) y
+    lugares ya geocodificados por Nominatim. Se indexan en una lista ordenada
+    de claves (cada palabra del nombre hasta el final) y se consultan por
+    prefijo con bisect; los POIs locales aportan el resto.
+
+    Puntuación = (1 + log(1 + popularidad)) / (1 + distancia / DISTANCE_SCALE_KM).
+    El índice se actualiza en cada escritura (favoritos, viajes, geocodificación).
+    """
+
+    FAVORITE_WEIGHTS = {"home": 50.0, "work": 50.0, "favorite": 20.0, "other": 10.0}
+    DESTINATION_WEIGHT = 3.0  # Por cada viaje terminado en ese destino
+    GEOCODED_WEIGHT = 1.0
+    DISTANCE_SCALE_KM = 5.0
+    MAX_SCAN = 5000  # Claves revisadas como máximo por consulta (prefijos de 1 letra)
+    MIN_POI_PREFIX = 3  # Con menos letras solo se sugieren lugares propios
+
+    # Fuente que se muestra cuando un nombre viene de varias
+    SOURCE_RANK = {"favorite": 3, "destination": 2, "geocoded": 1}
+
+    _entries: Dict[str, dict] = {}          # nombre normalizado -> entrada
+    _keys: List[Tuple[str, str]] = []       # (sufijo, nombre normalizado), ordenada
+
+    # ============== ESCRITURA ==============
+
+    @classmethod
+    def _add(cls, name: Optional[str], lat: float, lng: float, source: str, weight: float):
+        normalized = normalize_text(name or "")
+        if not normalized:
+            return
+
+        entry = cls._entries.get(normalized)
+        if entry is None:
+            cls._entries[normalized] = {
+                "name": name, "lat": lat, "lng": lng, "source": source, "popularity": weight
+            }
+            for suffix in word_suffixes(normalized):
+                bisect.insort(cls._keys, (suffix, normalized))
+            return
+
+        entry["popularity"] += weight
+        if cls.SOURCE_RANK[source] >= cls.SOURCE_RANK[entry["source"]]:
+            entry.update(name=name, lat=lat, lng=lng, source=source)
+
+    @classmethod
+    def _subtract(cls, name: Optional[str], weight: float):
+        normalized = normalize_text(name or "")
+        entry = cls._entries.get(normalized)
+        if entry is None:
+            return
+
+        entry["popularity"] -= weight
+        if entry["popularity"] > 0:
+            return
+
+        del cls._entries[normalized]
+        for suffix in word_suffixes(normalized):
+            i = bisect.bisect_left(cls._keys, (suffix, normalized))
+            if i < len(cls._keys) and cls._keys[i] == (suffix, normalized):
+                del cls._keys[i]
+
+    @classmethod
+    def _favorite_weight(cls, favorite: dict) -> float:
+        favorite_type = favorite.get("type")
+        return cls.FAVORITE_WEIGHTS.get(getattr(favorite_type, "value", favorite_type), 10.0)
+
+    @classmethod
+    def on_favorite_added(cls, favorite: dict):
+        location = favorite.get("location") or {}
+        cls._add(favorite.get("name"), location.get("lat"), location.get("lng"), "favorite", cls._favorite_weight(favorite))
+
+    @classmethod
+    def on_favorite_removed(cls, favorite: dict):
+        cls._subtract(favorite.get("name"), cls._favorite_weight(favorite))
+
+    @classmethod
+    def on_trip_saved(cls, end_name: Optional[str], end: dict):
+        cls._add(end_name, end["lat"], end["lng"], "destination", cls.DESTINATION_WEIGHT)
+
+    @classmethod
+    def on_places_geocoded(cls, results: List[dict]):
+        """Resultados crudos (jsonv2) recién obtenidos de Nominatim"""
+        for item in results:
+            try:
+                cls._add(item.get("display_name"), float(item["lat"]), float(item["lon"]), "geocoded", cls.GEOCODED_WEIGHT)
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    # ============== CARGA INICIAL ==============
+
+    @classmethod
+    async def load(cls):
+        """Construir el índice desde MongoDB (favoritos, destinos y caché de geocodificación)"""
+        cls._entries, cls._keys = {}, []
+        db = get_database()
+        if db is None:
+            return
+
+        try:
+            async for favorite in db.favorites.find({}, {"name": 1, "location": 1, "type": 1}):
+                cls.on_favorite_added(favorite)
+
+            pipeline = [
+                {"$match": {"end_name": {"$nin": [None, ""]}}},
+                {"$group": {
+                    "_id": "$end_name",
+                    "trips": {"$sum": 1},
+                    "lat": {"$last": "$end.lat"},
+                    "lng": {"$last": "$end.lng"}
+                }}
+            ]
+            async for row in db.trips.aggregate(pipeline):
+                cls._add(row["_id"], row["lat"], row["lng"], "destination", cls.DESTINATION_WEIGHT * row["trips"])
+
+            async for doc in db.geocode_cache.find({}, {"results": 1}):
+                cls.on_places_geocoded(doc.get("results") or [])
+        except Exception as e:
+            print(f"⚠️ Error cargando el índice de autocompletado: {e}", file=sys.stderr)
+
+        print(f"🔤 Autocompletado listo: {len(cls._entries)} lugares propios", file=sys.stderr)
+
+    # ============== CONSULTA ==============
+
+    @classmethod
+    def _score(cls, popularity: float, distance_km: Optional[float]) -> float:
+        proximity = 1.0 if distance_km is None else 1.0 / (1.0 + distance_km / cls.DISTANCE_SCALE_KM)
+        return (1.0 + math.log1p(max(popularity, 0.0))) * proximity
+
+    @staticmethod
+    def _distance_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+        dlat = math.radians(lat2 - lat1)
+        dlng = math.radians(lng2 - lng1)
+        a = math.sin(dlat / 2) ** 2 + \
+            math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng / 2) ** 2
+        return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+    @classmethod
+    def complete(
+        cls,
+        query: str,
+        lat: Optional[float] = None,
+        lng: Optional[float] = None,
+        limit: int = 8
+    ) -> List[Dict[str, Any]]:
+        prefix = normalize_text(query)
+        if not prefix:
+            return []
+        located = lat is not None and lng is not None
+
+        candidates: Dict[str, Dict[str, Any]] = {}
+        start = bisect.bisect_left(cls._keys, (prefix,))
+        for suffix, normalized in cls._keys[start:start + cls.MAX_SCAN]:
+            if not suffix.startswith(prefix):
+                break
+            if normalized in candidates:
+                continue
+            entry = cls._entries[normalized]
+            distance = cls._distance_km(lat, lng, entry["lat"], entry["lng"]) if located else None
+            candidates[normalized] = {
+                "name": entry["name"],
+                "lat": entry["lat"],
+                "lng": entry["lng"],
+                "source": entry["source"],
+                "distance_km": None if distance is None else round(distance, 3),
+                "score": cls._score(entry["popularity"], distance),
+            }
+
+        pois = PoiIndexService.complete(prefix, lat, lng, limit) if len(prefix) >= cls.MIN_POI_PREFIX else []
+        for poi in pois:
+            normalized = normalize_text(poi["name"])
+            if normalized not in candidates:
+                candidates[normalized] = {
+                    "name": poi["name"],
+                    "lat": poi["lat"],
+                    "lng": poi["lng"],
+                    "source": "poi",
+                    "distance_km": poi["distance_km"],
+                    "score": cls._score(0.0, poi["distance_km"]),
+                }
+
+        ranked = sorted(candidates.values(), key=lambda c: c["score"], reverse=True)[:limit]
+        for item in ranked:
+            item["score"] = round(item["score"], 4)
+        return ranked
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {"entries": len(cls._entries), "keys": len(cls._keys)}
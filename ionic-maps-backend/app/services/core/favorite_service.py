@@ -3,6 +3,23 @@ from typing import List, Optional
 from bson import ObjectId
 from app.database import get_database
 from app.models.schemas import FavoritePlace, FavoritePlaceCreate, FavoriteType
+from app.services.core.autocomplete_service import AutocompleteService
+from app.utils.cached_collection import CachedCollection
+
+
+async def _load_favorites(_key=None) -> List[dict]:
+    db = get_database()
+    cursor = db.favorites.find().sort("created_at", -1)
+    favs = await cursor.to_list(length=100)
+    for f in favs:
+        f["_id"] = str(f["_id"])
+    return favs
+
+
+favorites_cache: CachedCollection[List[dict]] = CachedCollection(
+    "favorites", _load_favorites, ttl=60, maxsize=1, collection="favorites"
+)
+
 
 class FavoriteService:
     @staticmethod
@@ -23,6 +40,9 @@ class FavoriteService:
                     }}
                 )
                 updated = await db.favorites.find_one({"_id": existing["_id"]})
+                AutocompleteService.on_favorite_removed(existing)
+                AutocompleteService.on_favorite_added(updated)
+                favorites_cache.invalidate()
                 updated["_id"] = str(updated["_id"])
                 return updated
 
@@ -33,23 +53,25 @@ class FavoriteService:
         result = await db.favorites.insert_one(new_favorite)
         created = await db.favorites.find_one({"_id": result.inserted_id})
         if created:
+            AutocompleteService.on_favorite_added(created)
+            favorites_cache.invalidate()
             created["_id"] = str(created["_id"])
         return created
 
     @staticmethod
     async def get_favorites() -> List[dict]:
-        db = get_database()
-        cursor = db.favorites.find().sort("created_at", -1)
-        favs = await cursor.to_list(length=100)
-        for f in favs:
-            f["_id"] = str(f["_id"])
-        return favs
+        # Copias: quien llama puede modificar los dicts sin tocar la caché
+        return [dict(f) for f in await favorites_cache.get()]
 
     @staticmethod
     async def delete_favorite(favorite_id: str) -> bool:
         db = get_database()
-        result = await db.favorites.delete_one({"_id": ObjectId(favorite_id)})
-        return result.deleted_count > 0
+        deleted = await db.favorites.find_one_and_delete({"_id": ObjectId(favorite_id)})
+        if deleted is None:
+            return False
+        AutocompleteService.on_favorite_removed(deleted)
+        favorites_cache.invalidate()
+        return True
 
     @staticmethod
     async def get_by_id(favorite_id: str) -> Optional[dict]:
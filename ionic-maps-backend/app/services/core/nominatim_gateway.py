@@ -0,0 +1,180 @@
+import asyncio
+import itertools
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.config import get_settings
+from app.database import get_database
+from app.services.core.autocomplete_service import AutocompleteService
+from app.utils.http import get_http_client
+from app.utils.ttl_cache import TTLCache
+
+settings = get_settings()
+
+
+class TokenBucket:
+    """Limitador de tasa: `rate` tokens por segundo, hasta `burst` acumulados"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class NominatimGateway:
+    """
+    Único punto de salida hacia Nominatim
+
+    La política de uso de nominatim.openstreetmap.org es 1 req/s. Todas las
+    búsquedas pasan por aquí:
+    - Caché en memoria (TTL + LRU) y persistente en MongoDB (geocode_cache).
+    - Búsquedas idénticas en curso se unen en una sola petición.
+    - Las que faltan esperan en una cola con prioridad (las interactivas
+      primero) que se vacía al ritmo de un token bucket.
+    """
+
+    BASE_URL = "https://nominatim.openstreetmap.org/search"
+    USER_AGENT = "IonicNotif-App/1.0"
+
+    MAX_QUEUE = 100
+    WAIT_TIMEOUT = 15.0             # segundos máximos esperando turno + respuesta
+    CACHE_TTL = 24 * 3600           # memoria
+    COLLECTION = "geocode_cache"    # MongoDB (caduca por índice TTL, ver app/db_indexes.py)
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+    def __init__(self):
+        self.cache = TTLCache("nominatim", ttl=self.CACHE_TTL, maxsize=4096)
+        # El límite es por proceso: con N workers, NOMINATIM_RATE_PER_SECOND = 1/N
+        self.bucket = TokenBucket(settings.nominatim_rate_per_second)
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._worker: Optional[asyncio.Task] = None
+        self._sequence = itertools.count()
+
+    def _ensure_worker(self):
+        # Arranque perezoso: también se usa desde el servidor MCP, sin lifespan
+        if self._worker is not None and not self._worker.done():
+            return
+
+        loop = asyncio.get_running_loop()
+        if self._worker is not None:
+            reason = "cancelado" if self._worker.cancelled() else repr(self._worker.exception())
+            print(f"⚠️ Worker de Nominatim detenido ({reason}), reiniciando", file=sys.stderr)
+        # La cola se conserva para no dejar colgadas las búsquedas ya encoladas;
+        # solo se crea de nuevo si es la primera vez o cambió el event loop
+        if self._queue is None or self._worker is None or self._worker.get_loop() is not loop:
+            self._queue = asyncio.PriorityQueue()
+        self._worker = loop.create_task(self._run())
+        self._worker.add_done_callback(self._on_worker_done)
+
+    def _on_worker_done(self, worker: asyncio.Task):
+        # Si murió por un error, reiniciar ya: la cola puede tener búsquedas esperando
+        if not worker.cancelled() and worker is self._worker:
+            self._ensure_worker()
+
+    async def search(self, key: str, params: Dict[str, Any], priority: int = INTERACTIVE) -> List[dict]:
+        """
+        Resultados crudos (jsonv2) de Nominatim para `params`
+
+        `key` identifica la búsqueda normalizada: dos llamadas con la misma
+        clave comparten caché y petición.
+        """
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        future = self._inflight.get(key)
+        if future is None:
+            pending = await self._load_persistent_or_enqueue(key, params, priority)
+            if not isinstance(pending, asyncio.Future):
+                return pending  # Resultado de la caché persistente (o cola llena)
+            future = pending
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Nominatim saturado, búsqueda '{key}' sin respuesta a tiempo", file=sys.stderr)
+            return []
+
+    async def _load_persistent_or_enqueue(self, key: str, params: Dict[str, Any], priority: int):
+        """Resultados de MongoDB si existen; si no, el future de la petición encolada"""
+        db = get_database()
+        if db is not None:
+            try:
+                doc = await db[self.COLLECTION].find_one({"_id": key}, {"results": 1})
+                if doc is not None:
+                    self.cache.set(key, doc["results"])
+                    return doc["results"]
+            except Exception as e:
+                print(f"⚠️ Error leyendo geocode_cache: {e}", file=sys.stderr)
+
+        # Otra corrutina pudo encolarla mientras leíamos la DB
+        if key in self._inflight:
+            return self._inflight[key]
+
+        self._ensure_worker()
+        if self._queue.qsize() >= self.MAX_QUEUE:
+            print("⚠️ Cola de Nominatim llena, búsqueda descartada", file=sys.stderr)
+            return []
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._queue.put_nowait((priority, next(self._sequence), key, params, future))
+        return future
+
+    async def _run(self):
+        while True:
+            _, _, key, params, future = await self._queue.get()
+            try:
+                await self.bucket.acquire()
+                results = await self._fetch(params)
+                self.cache.set(key, results)
+                future.set_result(results)
+                AutocompleteService.on_places_geocoded(results)
+                await self._store(key, results)
+            except Exception as e:
+                print(f"Error en búsqueda Nominatim: {e}", file=sys.stderr)
+                if not future.done():
+                    future.set_result([])  # No se cachea: se reintentará
+            finally:
+                self._inflight.pop(key, None)
+                if not future.done():
+                    future.set_result([])  # El worker muere: no dejar colgado a quien espera
+
+    async def _fetch(self, params: Dict[str, Any]) -> List[dict]:
+        response = await get_http_client().get(
+            self.BASE_URL, params=params, headers={"User-Agent": self.USER_AGENT}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def _store(self, key: str, results: List[dict]):
+        db = get_database()
+        if db is None:
+            return
+        try:
+            await db[self.COLLECTION].update_one(
+                {"_id": key},
+                {"$set": {"results": results, "created_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"⚠️ Error guardando geocode_cache: {e}", file=sys.stderr)
+
+
+# Instancia única por proceso (ver NOMINATIM_RATE_PER_SECOND)
+nominatim_gateway = NominatimGateway()
@@ -0,0 +1,338 @@
+import asyncio
+import bisect
+import gzip
+import json
+import os
+import sys
+import time
+import unicodedata
+import numpy as np
+from typing import Any, Dict, List, Optional
+from sklearn.neighbors import BallTree
+from app.config import get_settings
+
+settings = get_settings()
+
+EARTH_RADIUS_KM = 6371.0
+
+# Claves OSM que definen la categoría de un POI (en orden de preferencia)
+OSM_CATEGORY_KEYS = ("amenity", "shop", "tourism", "healthcare", "leisure", "office", "craft")
+
+# Alias en español de los tipos OSM más buscados
+TYPE_ALIASES = {
+    "pharmacy": "farmacia",
+    "chemist": "farmacia",
+    "fuel": "gasolinera bomba",
+    "hospital": "hospital",
+    "clinic": "clinica",
+    "doctors": "medico",
+    "dentist": "dentista",
+    "restaurant": "restaurante comida",
+    "fast_food": "comida rapida",
+    "cafe": "cafe cafeteria",
+    "supermarket": "supermercado",
+    "convenience": "minisuper tienda",
+    "bank": "banco",
+    "atm": "cajero",
+    "hotel": "hotel",
+    "parking": "estacionamiento parqueo",
+    "car_repair": "taller mecanico",
+    "police": "policia",
+    "bakery": "panaderia",
+    "hardware": "ferreteria",
+}
+
+STOPWORDS = {"cerca", "cercana", "cercano", "de", "del", "la", "el", "los", "las", "en", "un", "una", "mas", "a", "al"}
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas, sin tildes y con espacios simples ("Farmacía  Arrocha" -> "farmacia arrocha")"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.split())
+
+
+def _trigrams(text: str) -> set:
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def word_suffixes(text: str) -> List[str]:
+    """Claves de prefijo de un nombre: desde cada palabra hasta el final"""
+    words = text.split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class _PoiSnapshot:
+    """Índices inmutables de un dataset: se reemplazan enteros al recargar"""
+
+    def __init__(self, pois: List[Dict[str, Any]], source: str):
+        self.pois = pois
+        self.source = source
+        self.loaded_at = time.time()
+
+        coords = np.array([[p["lat"], p["lng"]] for p in pois], dtype=float).reshape(-1, 2)
+        self.radians = np.radians(coords)
+        self.tree = BallTree(self.radians, metric="haversine") if len(pois) else None
+
+        postings: Dict[str, List[int]] = {}
+        for i, poi in enumerate(pois):
+            for gram in _trigrams(poi["search_text"]):
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+        # Índice de prefijos para autocompletado: claves ordenadas + id paralelo
+        suffixes = sorted(
+            (suffix, i) for i, poi in enumerate(pois) for suffix in word_suffixes(normalize_text(poi["name"]))
+        )
+        self.prefix_keys = [suffix for suffix, _ in suffixes]
+        self.prefix_ids = np.array([i for _, i in suffixes], dtype=np.int32)
+
+
+class PoiIndexService:
+    """
+    Índice local de POIs (extracto OSM en GeoJSON)
+
+    - Proximidad: BallTree con distancia haversine.
+    - Texto: índice invertido de trigramas sobre nombre, tipo OSM y su
+      alias en español ("farmacia" encuentra amenity=pharmacy).
+
+    SearchService lo consulta antes que Nominatim. La recarga construye un
+    índice nuevo en un hilo y lo intercambia de una vez: las búsquedas en
+    curso siguen usando el anterior.
+    """
+
+    MIN_TRIGRAM_MATCH = 0.6          # Fracción de trigramas de la consulta que debe contener el POI
+    TEXT_FIRST_MAX_POSTINGS = 20000  # Por encima, filtrar primero por distancia
+
+    _snapshot: Optional[_PoiSnapshot] = None
+    _reload_lock: Optional[asyncio.Lock] = None
+    _initial_load: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _parse_feature(feature: dict) -> Optional[Dict[str, Any]]:
+        geometry = feature.get("geometry") or {}
+        props = feature.get("properties") or {}
+        name = props.get("name")
+        if not name or not geometry.get("coordinates"):
+            return None
+
+        if geometry.get("type") == "Point":
+            lng, lat = geometry["coordinates"][:2]
+        else:
+            # Áreas (edificios, parqueos): promedio de sus vértices
+            flat = np.array(list(_flatten_points(geometry["coordinates"])), dtype=float)
+            if not len(flat):
+                return None
+            lng, lat = flat.mean(axis=0)[:2]
+
+        category = next((key for key in OSM_CATEGORY_KEYS if props.get(key)), props.get("category", "place"))
+        poi_type = props.get(category) if category in OSM_CATEGORY_KEYS else props.get("type", "")
+        alias = TYPE_ALIASES.get(poi_type, "")
+
+        return {
+            "name": name,
+            "lat": float(lat),
+            "lng": float(lng),
+            "type": poi_type,
+            "category": category,
+            "search_text": normalize_text(f"{name} {poi_type.replace('_', ' ')} {alias}"),
+        }
+
+    @classmethod
+    def _build(cls, path: str) -> _PoiSnapshot:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+
+        pois = [poi for poi in map(cls._parse_feature, data.get("features", [])) if poi]
+        return _PoiSnapshot(pois, path)
+
+    @classmethod
+    async def reload(cls, path: Optional[str] = None) -> dict:
+        """(Re)construir el índice desde el GeoJSON y activarlo sin cortar el servicio"""
+        path = path or settings.poi_dataset_path
+        if not path:
+            return {"loaded": False, "reason": "POI_DATASET_PATH no configurado"}
+        if not os.path.exists(path):
+            return {"loaded": False, "reason": f"No existe {path}"}
+
+        if cls._reload_lock is None:
+            cls._reload_lock = asyncio.Lock()
+        async with cls._reload_lock:
+            start = time.perf_counter()
+            try:
+                snapshot = await asyncio.to_thread(cls._build, path)
+            except Exception as e:
+                # Se mantiene el índice anterior
+                print(f"⚠️ No se pudo cargar el índice de POIs: {e}", file=sys.stderr)
+                return {"loaded": False, "reason": str(e)}
+            cls._snapshot = snapshot  # Intercambio atómico
+            elapsed = time.perf_counter() - start
+
+        print(f"📍 Índice de POIs cargado: {len(snapshot.pois)} lugares en {elapsed:.1f}s", file=sys.stderr)
+        return {"loaded": True, "pois": len(snapshot.pois), "build_time_s": round(elapsed, 2)}
+
+    @classmethod
+    def ensure_loaded(cls):
+        """Lanzar la carga inicial en segundo plano (el servidor MCP no tiene lifespan)"""
+        if cls._snapshot is None and cls._initial_load is None and settings.poi_dataset_path:
+            cls._initial_load = asyncio.create_task(cls.reload())
+
+    @classmethod
+    def stats(cls) -> dict:
+        snapshot = cls._snapshot
+        if snapshot is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "pois": len(snapshot.pois),
+            "trigrams": len(snapshot.postings),
+            "source": snapshot.source,
+            "loaded_at": snapshot.loaded_at,
+        }
+
+    @classmethod
+    def complete(
+        cls,
+        prefix: str,
+        lat: Optional[float] = None,
+        lng: Optional[float] = None,
+        limit: int = 8
+    ) -> List[Dict[str, Any]]:
+        """POIs cuyo nombre (o alguna de sus palabras) empieza por `prefix`, los más cercanos primero"""
+        snapshot = cls._snapshot
+        if snapshot is None or not prefix:
+            return []
+
+        lo = bisect.bisect_left(snapshot.prefix_keys, prefix)
+        hi = bisect.bisect_left(snapshot.prefix_keys, prefix + "\uffff")
+        ids = snapshot.prefix_ids[lo:hi]
+        if not len(ids):
+            return []
+
+        # Un POI aparece una vez por palabra que coincide: se piden de más y se deduplican al final
+        wanted = min(len(ids), limit * 2)
+        if lat is None or lng is None:
+            ids, distances = ids[:wanted], np.zeros(wanted)
+        else:
+            distances = cls._distances(snapshot, ids, np.radians([lat, lng]))
+            nearest = np.argpartition(distances, wanted - 1)[:wanted]
+            nearest = nearest[np.argsort(distances[nearest])]
+            ids, distances = ids[nearest], distances[nearest] * EARTH_RADIUS_KM
+
+        results, seen = [], set()
+        for i, distance in zip(ids.tolist(), distances.tolist()):
+            if i in seen:
+                continue
+            seen.add(i)
+            poi = snapshot.pois[i]
+            results.append({
+                **{k: poi[k] for k in ("name", "lat", "lng", "type", "category")},
+                "distance_km": None if lat is None or lng is None else round(distance, 3),
+            })
+        return results[:limit]
+
+    @staticmethod
+    def _query_trigrams(query: str) -> set:
+        return _trigrams(" ".join(w for w in normalize_text(query).split() if w not in STOPWORDS))
+
+    @classmethod
+    def _matches(cls, postings: List[np.ndarray], grams: int, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Ids con suficientes trigramas de la consulta
+
+        Sin `ids` se recorren las listas completas; con `ids` (POIs ya
+        filtrados por distancia) solo se buscan esos en cada lista ordenada.
+        """
+        needed = cls.MIN_TRIGRAM_MATCH * grams
+        if ids is None:
+            if not postings:
+                return np.zeros(0, dtype=np.int32)
+            ids, counts = np.unique(np.concatenate(postings), return_counts=True)
+            return ids[counts >= needed]
+
+        counts = np.zeros(len(ids), dtype=np.int32)
+        for posting in postings:
+            positions = np.minimum(np.searchsorted(posting, ids), len(posting) - 1)
+            counts += posting[positions] == ids
+        return ids[counts >= needed]
+
+    @staticmethod
+    def _distances(snapshot: _PoiSnapshot, ids: np.ndarray, center: np.ndarray) -> np.ndarray:
+        """Distancia haversine (radianes) desde el centro a cada POI"""
+        points = snapshot.radians[ids]
+        dlat = points[:, 0] - center[0]
+        dlng = points[:, 1] - center[1]
+        a = np.sin(dlat / 2) ** 2 + np.cos(center[0]) * np.cos(points[:, 0]) * np.sin(dlng / 2) ** 2
+        return 2 * np.arcsin(np.sqrt(a))
+
+    @classmethod
+    def search(
+        cls,
+        query: str,
+        lat: float,
+        lng: float,
+        radius_km: float = 5.0,
+        limit: int = 5
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        POIs que coinciden con `query` dentro del radio, del más cercano al más lejano
+
+        Consultas específicas ("arrocha") filtran primero por texto; las
+        genéricas ("farmacia"), cuyas listas de trigramas son enormes,
+        filtran primero por distancia con el BallTree.
+
+        Returns:
+            None si no hay índice cargado (el llamador debe usar Nominatim)
+        """
+        snapshot = cls._snapshot
+        if snapshot is None or snapshot.tree is None:
+            return None
+
+        center = np.radians([lat, lng])
+        radius = radius_km / EARTH_RADIUS_KM
+        grams = cls._query_trigrams(query)
+        postings = [snapshot.postings[g] for g in grams if g in snapshot.postings]
+
+        if grams and sum(len(p) for p in postings) <= cls.TEXT_FIRST_MAX_POSTINGS:
+            ids = cls._matches(postings, len(grams))
+            distances = cls._distances(snapshot, ids, center)
+            inside = distances <= radius
+            ids, distances = ids[inside], distances[inside]
+        else:
+            ids, distances = snapshot.tree.query_radius(center[None, :], r=radius, return_distance=True)
+            ids, distances = ids[0], distances[0]
+            if grams:
+                order = np.argsort(ids)
+                ids, distances = ids[order], distances[order]
+                keep = np.isin(ids, cls._matches(postings, len(grams), ids), assume_unique=True)
+                ids, distances = ids[keep], distances[keep]
+
+        order = np.argsort(distances)[:limit]
+        ids, distances = ids[order], distances[order]
+
+        results = []
+        for i, distance in zip(ids, distances):
+            poi = snapshot.pois[i]
+            results.append({
+                "name": poi["name"],
+                "lat": poi["lat"],
+                "lng": poi["lng"],
+                "type": poi["type"],
+                "category": poi["category"],
+                "distance_km": round(float(distance) * EARTH_RADIUS_KM, 3),
+            })
+        return results
+
+
+def _flatten_points(coordinates):
+    """Vértices [lng, lat] de cualquier geometría GeoJSON anidada"""
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        yield coordinates
+        return
+    for item in coordinates:
+        yield from _flatten_points(item)
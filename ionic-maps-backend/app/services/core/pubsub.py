@@ -0,0 +1,240 @@
+"""
+Pub/sub entre workers para los canales en tiempo real
+
+    pubsub.subscribe("caitlyn", handler)     # handler(data: str) async
+    await pubsub.publish("caitlyn", "hola")
+
+Backends (PUBSUB_BACKEND):
+- "memory": en proceso; suficiente con un solo worker.
+- "redis": broker que hable el protocolo RESP (Redis, Valkey, KeyDB o el
+  broker local de app.services.core.pubsub_broker). Cada worker entrega
+  primero a sus propios sockets y luego reenvía al broker; los mensajes
+  que vuelven con su propio origen se ignoran.
+"""
+import asyncio
+import json
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+from app.config import get_settings
+
+Handler = Callable[[str], Awaitable[None]]
+
+
+# ============== PROTOCOLO RESP (subconjunto) ==============
+
+def encode_command(*args) -> bytes:
+    """Codificar un comando como arreglo RESP de bulk strings"""
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    """Leer una respuesta RESP (+ - : $ *). Los bulk strings se devuelven como bytes"""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Conexión con el broker cerrada")
+    kind, payload = line[:1], line[1:-2]
+
+    if kind == b"+":
+        return payload.decode()
+    if kind == b"-":
+        raise RuntimeError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(payload)
+        if count < 0:
+            return None
+        return [await read_reply(reader) for _ in range(count)]
+    raise ValueError(f"Respuesta RESP inválida: {line!r}")
+
+
+# ============== BACKENDS ==============
+
+class MemoryPubSub:
+    """Entrega en el mismo proceso (un solo worker)"""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+
+    def subscribe(self, channel: str, handler: Handler):
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def _deliver(self, channel: str, data: str):
+        for handler in list(self._handlers.get(channel, [])):
+            try:
+                await handler(data)
+            except Exception as e:
+                print(f"⚠️ Error entregando mensaje de '{channel}': {e}")
+
+    async def publish(self, channel: str, data: str):
+        await self._deliver(channel, data)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class RedisPubSub(MemoryPubSub):
+    """
+    Broker RESP compartido entre workers
+
+    Usa una conexión para publicar y otra para la suscripción, que se
+    reconecta sola. Si el broker no está disponible los mensajes siguen
+    llegando a los sockets de este worker: la copia remota se descarta tras
+    PUBLISH_TIMEOUT y no se vuelve a intentar conectar hasta que pase el
+    backoff, así un broker caído no frena cada publish.
+    """
+
+    RECONNECT_DELAY = 1.0
+    MAX_RECONNECT_DELAY = 30.0
+    PUBLISH_TIMEOUT = 1.0  # Conexión, AUTH y respuesta de cada PUBLISH
+
+    def __init__(self, url: str):
+        super().__init__()
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.origin = uuid.uuid4().hex[:12]  # Identifica a este worker
+
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._publish_lock = asyncio.Lock()
+        self._publish_delay = self.RECONNECT_DELAY
+        self._publish_retry_at = 0.0  # time.monotonic() antes del cual no se redial
+        self._listen_task: Optional[asyncio.Task] = None
+
+    async def _open(self):
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.PUBLISH_TIMEOUT
+        )
+        if self.password:
+            try:
+                writer.write(encode_command("AUTH", self.password))
+                await writer.drain()
+                await asyncio.wait_for(read_reply(reader), self.PUBLISH_TIMEOUT)
+            except BaseException:
+                writer.close()
+                raise
+        return reader, writer
+
+    def subscribe(self, channel: str, handler: Handler):
+        new_channel = channel not in self._handlers
+        super().subscribe(channel, handler)
+        # Si ya escuchamos, no hace falta esperar a la reconexión
+        if new_channel and self._listen_task is not None:
+            asyncio.create_task(self._restart_listener())
+
+    async def _restart_listener(self):
+        await self._stop_listener()
+        await self.start()
+
+    async def publish(self, channel: str, data: str):
+        await self._deliver(channel, data)
+
+        # Broker caído hace poco: la entrega local ya se hizo, la remota se descarta
+        if self._writer is None and time.monotonic() < self._publish_retry_at:
+            return
+
+        envelope = json.dumps({"o": self.origin, "d": data})
+        async with self._publish_lock:
+            if self._writer is None and time.monotonic() < self._publish_retry_at:
+                return
+            # Una conexión ya abierta puede estar muerta sin saberlo: un reintento con una nueva
+            attempts = 2 if self._writer is not None else 1
+            for attempt in range(attempts):
+                try:
+                    if self._writer is None:
+                        self._reader, self._writer = await self._open()
+                    self._writer.write(encode_command("PUBLISH", channel, envelope))
+                    await asyncio.wait_for(self._publish_reply(), self.PUBLISH_TIMEOUT)
+                    self._publish_delay = self.RECONNECT_DELAY
+                    return
+                except Exception as e:
+                    self._close_publisher()
+                    if attempt == attempts - 1:
+                        self._publish_retry_at = time.monotonic() + self._publish_delay
+                        print(
+                            f"⚠️ No se pudo publicar en el broker ({e!r}), "
+                            f"sin copia remota durante {self._publish_delay:.0f}s"
+                        )
+                        self._publish_delay = min(self._publish_delay * 2, self.MAX_RECONNECT_DELAY)
+
+    async def _publish_reply(self):
+        await self._writer.drain()
+        await read_reply(self._reader)
+
+    def _close_publisher(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _listen(self):
+        delay = self.RECONNECT_DELAY
+        while True:
+            writer = None
+            try:
+                reader, writer = await self._open()
+                writer.write(encode_command("SUBSCRIBE", *self._handlers))
+                await writer.drain()
+                print(f"📡 Pub/sub conectado a {self.host}:{self.port}")
+                delay = self.RECONNECT_DELAY
+
+                while True:
+                    reply = await read_reply(reader)
+                    if not isinstance(reply, list) or reply[0] != b"message":
+                        continue
+                    envelope = json.loads(reply[2])
+                    if envelope["o"] != self.origin:
+                        await self._deliver(reply[1].decode(), envelope["d"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Pub/sub desconectado ({e}), reintentando en {delay:.0f}s")
+            finally:
+                if writer is not None:
+                    writer.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+
+    async def start(self):
+        if self._listen_task is None and self._handlers:
+            self._listen_task = asyncio.create_task(self._listen())
+
+    async def _stop_listener(self):
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            try:
+                await self._listen_task
+            except asyncio.CancelledError:
+                pass
+            self._listen_task = None
+
+    async def stop(self):
+        await self._stop_listener()
+        self._close_publisher()
+
+
+def create_pubsub() -> MemoryPubSub:
+    settings = get_settings()
+    if settings.pubsub_backend == "redis":
+        return RedisPubSub(settings.pubsub_url)
+    return MemoryPubSub()
+
+
+# Instancia única: los canales se registran al importar sus servicios
+pubsub = create_pubsub()
@@ -0,0 +1,86 @@
+"""
+Broker pub/sub local (subconjunto de RESP: SUBSCRIBE, UNSUBSCRIBE, PUBLISH, PING, AUTH)
+
+Sustituto de Redis para desarrollo y pruebas sin conexión:
+
+    python -m app.services.core.pubsub_broker --port 6379
+
+    PUBSUB_BACKEND=redis PUBSUB_URL=redis://localhost:6379 uvicorn app.main:app --workers 4
+"""
+import argparse
+import asyncio
+from typing import Dict, Set
+from app.services.core.pubsub import read_reply
+
+
+def _encode_reply(value) -> bytes:
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_encode_reply(item) for item in value)
+    return b"+%s\r\n" % value.encode()
+
+
+class LocalBroker:
+    def __init__(self):
+        self.channels: Dict[bytes, Set[asyncio.StreamWriter]] = {}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        subscribed: Set[bytes] = set()
+        try:
+            while True:
+                command = await read_reply(reader)
+                if not isinstance(command, list) or not command:
+                    continue
+                name, args = command[0].upper(), command[1:]
+
+                if name == b"SUBSCRIBE":
+                    for channel in args:
+                        self.channels.setdefault(channel, set()).add(writer)
+                        subscribed.add(channel)
+                        writer.write(_encode_reply([b"subscribe", channel, len(subscribed)]))
+                elif name == b"UNSUBSCRIBE":
+                    for channel in args or list(subscribed):
+                        self.channels.get(channel, set()).discard(writer)
+                        subscribed.discard(channel)
+                        writer.write(_encode_reply([b"unsubscribe", channel, len(subscribed)]))
+                elif name == b"PUBLISH":
+                    channel, data = args
+                    receivers = list(self.channels.get(channel, ()))
+                    message = _encode_reply([b"message", channel, data])
+                    for receiver in receivers:
+                        receiver.write(message)
+                    writer.write(_encode_reply(len(receivers)))
+                elif name == b"PING":
+                    writer.write(_encode_reply("PONG"))
+                elif name in (b"AUTH", b"SELECT"):
+                    writer.write(_encode_reply("OK"))
+                else:
+                    writer.write(b"-ERR comando no soportado\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for channel in subscribed:
+                self.channels.get(channel, set()).discard(writer)
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"📡 Broker pub/sub local escuchando en {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Broker pub/sub local (RESP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    asyncio.run(LocalBroker().serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
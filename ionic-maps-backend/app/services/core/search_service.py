@@ -1,11 +1,16 @@
-import httpx
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any
+from app.services.core.nominatim_gateway import nominatim_gateway, NominatimGateway
+from app.services.core.poi_index_service import PoiIndexService, normalize_text
 
 class SearchService:
-    """Servicio para buscar lugares (POIs) usando OpenStreetMap (Nominatim)"""
+    """Servicio para buscar lugares (POIs): índice local primero, OpenStreetMap (Nominatim) como respaldo"""
     
-    BASE_URL = "https://nominatim.openstreetmap.org/search"
-    USER_AGENT = "IonicNotif-App/1.0"
+    GRID_DEGREES = 0.02  # Centro de búsqueda ajustado a una rejilla de ~2 km (clave de caché)
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Minúsculas, sin tildes y con espacios simples ("Farmacía  Arrocha" -> "farmacia arrocha")"""
+        return normalize_text(query)
 
     @classmethod
     async def find_nearby_places(
@@ -14,40 +19,48 @@ class SearchService:
         lat: float, 
         lng: float, 
         radius_km: float = 5.0,
-        limit: int = 5
+        limit: int = 5,
+        priority: int = NominatimGateway.INTERACTIVE
     ) -> List[Dict[str, Any]]:
         """
         Busca lugares cercanos a una ubicación.
         """
+        PoiIndexService.ensure_loaded()
+        local = PoiIndexService.search(query, lat, lng, radius_km, limit)
+        if local:
+            return local
+
         try:
-            # Nominatim usa un formato un poco diferente para búsqueda cercana
-            # Podríamos usar 'q' para la búsqueda general
+            # Caja de búsqueda alrededor del centro ajustado a la rejilla, así
+            # búsquedas desde puntos cercanos comparten resultado en caché
+            normalized = cls.normalize_query(query)
+            snapped_lat = round(lat / cls.GRID_DEGREES) * cls.GRID_DEGREES
+            snapped_lng = round(lng / cls.GRID_DEGREES) * cls.GRID_DEGREES
+            half_box = max(round(radius_km / 111.0, 2), cls.GRID_DEGREES)
+            
             params = {
-                "q": query,
+                "q": normalized,
                 "format": "jsonv2",
                 "limit": limit,
                 "addressdetails": 1,
-                "viewbox": f"{lng - 0.1},{lat + 0.1},{lng + 0.1},{lat - 0.1}", # Una caja de búsqueda aproximada
+                "viewbox": f"{snapped_lng - half_box:.4f},{snapped_lat + half_box:.4f},"
+                           f"{snapped_lng + half_box:.4f},{snapped_lat - half_box:.4f}",
                 "bounded": 1
             }
+            key = f"{normalized}|{params['viewbox']}|{limit}"
             
-            headers = {"User-Agent": cls.USER_AGENT}
+            data = await nominatim_gateway.search(key, params, priority)
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(cls.BASE_URL, params=params, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                
-                results = []
-                for item in data:
-                    results.append({
-                        "name": item.get("display_name"),
-                        "lat": float(item.get("lat")),
-                        "lng": float(item.get("lon")),
-                        "type": item.get("type"),
-                        "category": item.get("category")
-                    })
-                return results
+            results = []
+            for item in data:
+                results.append({
+                    "name": item.get("display_name"),
+                    "lat": float(item.get("lat")),
+                    "lng": float(item.get("lon")),
+                    "type": item.get("type"),
+                    "category": item.get("category")
+                })
+            return results
         except Exception as e:
             print(f"Error en SearchService: {e}")
             return []
@@ -1,20 +1,32 @@
 from app.database import get_database
 from app.models.schemas import UserSettings, VoiceMode
+from app.utils.cached_collection import CachedCollection
+
+
+async def _load_settings(_key=None) -> UserSettings:
+    db = get_database()
+    # Buscar el unico documento de settings (singleton)
+    settings_doc = await db.settings.find_one({})
+    
+    if not settings_doc:
+        # Crear por defecto si no existe
+        default_settings = UserSettings(voice_mode=VoiceMode.ALL)
+        await db.settings.insert_one(default_settings.dict())
+        return default_settings
+    
+    return UserSettings(**settings_doc)
+
+
+# Documento único: se lee en cada consulta de voz/UI y casi nunca cambia
+settings_cache: CachedCollection[UserSettings] = CachedCollection(
+    "settings", _load_settings, ttl=300, maxsize=1, collection="settings"
+)
+
 
 class SettingsService:
     @staticmethod
     async def get_settings() -> UserSettings:
-        db = get_database()
-        # Buscar el unico documento de settings (singleton)
-        settings_doc = await db.settings.find_one({})
-        
-        if not settings_doc:
-            # Crear por defecto si no existe
-            default_settings = UserSettings(voice_mode=VoiceMode.ALL)
-            await db.settings.insert_one(default_settings.dict())
-            return default_settings
-        
-        return UserSettings(**settings_doc)
+        return (await settings_cache.get()).model_copy()
 
     @staticmethod
     async def update_settings(settings: UserSettings) -> UserSettings:
@@ -29,5 +41,6 @@ class SettingsService:
             {"$set": settings.dict()},
             upsert=True
         )
+        settings_cache.invalidate()
         
         return settings
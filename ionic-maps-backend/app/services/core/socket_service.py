@@ -1,29 +1,195 @@
+import asyncio
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
 from fastapi import WebSocket
-from typing import List
+from typing import Dict, Optional, Set
+from app.services.core.pubsub import pubsub
+from app.utils import metrics
+
+messages_dropped = metrics.counter(
+    "websocket_messages_dropped_total",
+    "Mensajes descartados por clientes lentos",
+    ["reason"]
+)
+
+# Tópico de los broadcasts emitidos en el contexto actual (lo heredan las
+# tareas hijas, p. ej. las misiones lanzadas con asyncio.gather)
+current_topic: ContextVar[Optional[str]] = ContextVar("socket_topic", default=None)
+
+TOPIC_PREFIXES = ("job:", "user:", "convoy:")
+
+
+class ClientConnection:
+    """
+    Un cliente WebSocket con su propia cola de envío
+
+    El broadcast solo encola (no bloquea); una tarea por conexión vacía la
+    cola. Si el cliente no consume a tiempo la cola se llena y se aplica la
+    política: "drop_oldest" descarta el mensaje más viejo, "disconnect"
+    cierra la conexión.
+    """
+
+    def __init__(self, websocket: WebSocket, manager: "SocketManager"):
+        self.websocket = websocket
+        self.manager = manager
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=manager.MAX_QUEUE)
+        self.writer: Optional[asyncio.Task] = None
+        self.topics: Set[str] = set()
+
+    def start(self):
+        self.writer = asyncio.create_task(self._write_loop())
+
+    def stop(self):
+        if self.writer is not None and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+
+    def enqueue(self, message: str) -> bool:
+        """Encolar sin bloquear. False si la conexión debe cerrarse"""
+        if self.queue.full():
+            if self.manager.SLOW_CONSUMER_POLICY == "disconnect":
+                messages_dropped.inc(self.queue.qsize(), reason="disconnected")
+                return False
+            self.queue.get_nowait()
+            messages_dropped.inc(reason="queue_full")
+        self.queue.put_nowait(message)
+        return True
+
+    async def _write_loop(self):
+        try:
+            while True:
+                message = await self.queue.get()
+                await asyncio.wait_for(self.websocket.send_text(message), self.manager.SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Conexión cerrada o cliente bloqueado más de SEND_TIMEOUT
+            print(f"⚠️ Error enviando broadcast: {e!r}")
+            await self.manager.evict(self.websocket)
+
 
 class SocketManager:
+    """
+    Clientes de /ws/caitlyn
+
+    Un cliente puede suscribirse a tópicos (job:<id>, user:<id>, convoy:<id>)
+    enviando {"action": "subscribe", "topic": ...}. Los mensajes con tópico
+    solo llegan a sus suscriptores; los mensajes sin tópico llegan a todos.
+    Un cliente sin suscripciones no ve el progreso de ningún job: debe
+    suscribirse a job:<id> antes de lanzar la búsqueda.
+    """
+    CHANNEL = "caitlyn"
+
+    MAX_QUEUE = 256                         # Mensajes pendientes por cliente
+    SEND_TIMEOUT = 10.0                     # segundos por envío
+    SLOW_CONSUMER_POLICY = "drop_oldest"    # o "disconnect"
+
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        self.subscribers: Dict[str, Set[ClientConnection]] = {}
+        pubsub.subscribe(self.CHANNEL, self._deliver)
+        metrics.gauge(
+            "websocket_connections", "Clientes conectados a /ws/caitlyn",
+            callback=lambda: {(): len(self.active_connections)}
+        )
+        metrics.gauge(
+            "websocket_send_queue_depth", "Mensajes en cola de envío (total y máximo por cliente)",
+            ["stat"], callback=self._queue_depths
+        )
+
+    def _queue_depths(self) -> dict:
+        depths = [c.queue.qsize() for c in self.active_connections.values()]
+        return {("total",): sum(depths), ("max",): max(depths, default=0)}
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        connection = ClientConnection(websocket, self)
+        self.active_connections[websocket] = connection
+        connection.start()
         print(f"🔌 Cliente conectado al socket de Caitlyn. Total: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        connection = self.active_connections.pop(websocket, None)
+        if connection is not None:
+            connection.stop()
+            for topic in list(connection.topics):
+                self.unsubscribe(connection, topic)
             print(f"🔌 Cliente desconectado. Total: {len(self.active_connections)}")
 
-    async def broadcast(self, message: str):
-        """Envía un mensaje a todos los clientes conectados."""
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except Exception as e:
-                # Si falla, probablemente la conexión se cerró
-                print(f"⚠️ Error enviando broadcast: {e}")
-                self.active_connections.remove(connection)
+    async def evict(self, websocket: WebSocket):
+        """Cerrar un cliente lento o caído"""
+        self.disconnect(websocket)
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+    # ============== TÓPICOS ==============
+
+    def subscribe(self, connection: ClientConnection, topic: str):
+        connection.topics.add(topic)
+        self.subscribers.setdefault(topic, set()).add(connection)
+
+    def unsubscribe(self, connection: ClientConnection, topic: str):
+        connection.topics.discard(topic)
+        subscribers = self.subscribers.get(topic)
+        if subscribers is not None:
+            subscribers.discard(connection)
+            if not subscribers:
+                del self.subscribers[topic]
+
+    async def handle_client_message(self, websocket: WebSocket, text: str):
+        """Procesa {"action": "subscribe"|"unsubscribe", "topic": ...}; ignora el resto (keepalive)"""
+        connection = self.active_connections.get(websocket)
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return
+        if connection is None or not isinstance(message, dict):
+            return
+
+        action, topic = message.get("action"), message.get("topic")
+        if action not in ("subscribe", "unsubscribe") or not isinstance(topic, str) \
+                or not topic.startswith(TOPIC_PREFIXES):
+            return
+
+        if action == "subscribe":
+            self.subscribe(connection, topic)
+        else:
+            self.unsubscribe(connection, topic)
+        connection.enqueue(json.dumps({"type": f"{action}d", "topic": topic}))
+
+    @contextmanager
+    def topic(self, topic: str):
+        """Los broadcasts dentro del bloque (y sus tareas hijas) van solo a `topic`"""
+        token = current_topic.set(topic)
+        try:
+            yield
+        finally:
+            current_topic.reset(token)
+
+    # ============== ENVÍO ==============
+
+    async def broadcast(self, message: str, topic: Optional[str] = None):
+        """Envía un mensaje a los clientes interesados (en todos los workers)."""
+        topic = topic or current_topic.get()
+        await pubsub.publish(self.CHANNEL, json.dumps({"topic": topic, "text": message}))
+
+    def _targets(self, topic: Optional[str]):
+        if topic is None:
+            return list(self.active_connections.values())
+        return list(self.subscribers.get(topic, ()))
+
+    async def _deliver(self, data: str):
+        """Encola el mensaje para los clientes de este worker (no espera a ningún envío)."""
+        envelope = json.loads(data)
+        message = envelope["text"]
+        slow = [
+            connection.websocket for connection in self._targets(envelope["topic"])
+            if not connection.enqueue(message)
+        ]
+        for websocket in slow:
+            await self.evict(websocket)
 
 # Instancia única para toda la app
 socket_manager = SocketManager()
@@ -1,15 +1,30 @@
-import httpx
-from typing import Optional
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
 from app.config import get_settings
 from app.models.schemas import WeatherInfo, WeatherCondition
+from app.utils import geohash
+from app.utils.http import get_http_client
+from app.utils.ttl_cache import TTLCache
+from app.utils.tracing import traced
 
 settings = get_settings()
 
 
 class WeatherService:
-    """Servicio para obtener información del clima usando OpenWeatherMap"""
+    """
+    Servicio para obtener información del clima usando OpenWeatherMap
+    
+    Las consultas se agrupan por celda geohash y franja de tiempo: todas las
+    coordenadas de una celda comparten el clima de su centro durante
+    WEATHER_CACHE_TTL segundos.
+    """
     
     BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
+    FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"  # Pasos de 3 h, 5 días
+    
+    _cache = TTLCache("weather", ttl=settings.weather_cache_ttl, maxsize=settings.weather_cache_size)
+    _forecast_cache = TTLCache("weather_forecast", ttl=settings.weather_cache_ttl, maxsize=settings.weather_cache_size)
     
     @staticmethod
     def _map_condition(weather_main: str) -> WeatherCondition:
@@ -28,6 +43,71 @@ class WeatherService:
         }
         return mapping.get(weather_main, WeatherCondition.CLEAR)
     
+    @classmethod
+    @traced("weather")
+    async def _request(cls, url: str, cell: str) -> dict:
+        """Consultar OpenWeatherMap en el centro de la celda"""
+        lat, lng = geohash.center(cell)
+        response = await get_http_client().get(
+            url,
+            params={
+                "lat": lat,
+                "lon": lng,
+                "appid": settings.openweather_api_key,
+                "units": "metric",
+                "lang": "es"
+            }
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    @classmethod
+    def _parse(cls, data: dict) -> WeatherInfo:
+        weather_main = data["weather"][0]["main"]
+        
+        return WeatherInfo(
+            condition=cls._map_condition(weather_main),
+            temperature=data["main"]["temp"],
+            humidity=data["main"]["humidity"],
+            visibility=data.get("visibility", 10000),
+            wind_speed=data["wind"]["speed"],
+            description=data["weather"][0]["description"]
+        )
+    
+    @classmethod
+    async def _fetch_cell(cls, cell: str) -> WeatherInfo:
+        return cls._parse(await cls._request(cls.BASE_URL, cell))
+    
+    @classmethod
+    async def _fetch_forecast_cell(cls, cell: str) -> List[Tuple[float, WeatherInfo]]:
+        data = await cls._request(cls.FORECAST_URL, cell)
+        return [(float(item["dt"]), cls._parse(item)) for item in data.get("list", [])]
+    
+    @classmethod
+    async def get_forecast(cls, lat: float, lng: float, at: datetime) -> Optional[WeatherInfo]:
+        """
+        Pronóstico para una ubicación y hora (el paso de 3 h más cercano)
+        
+        Retorna None sin API key o si falla, para que el llamador use el clima actual.
+        """
+        if not settings.openweather_api_key:
+            return None
+        
+        cell = geohash.encode(lat, lng, settings.weather_geohash_precision)
+        bucket = int(time.time() // settings.weather_cache_ttl)
+        try:
+            forecast = await cls._forecast_cache.get_or_load(
+                (cell, bucket), lambda: cls._fetch_forecast_cell(cell)
+            )
+        except Exception as e:
+            print(f"Error obteniendo pronóstico: {e}")
+            return None
+        if not forecast:
+            return None
+        
+        target = at.timestamp()
+        return min(forecast, key=lambda slot: abs(slot[0] - target))[1]
+    
     @classmethod
     async def get_weather(cls, lat: float, lng: float) -> Optional[WeatherInfo]:
         """Obtener clima para una ubicación"""
@@ -42,31 +122,10 @@ class WeatherService:
                 description="Clima no disponible (sin API key)"
             )
         
+        cell = geohash.encode(lat, lng, settings.weather_geohash_precision)
+        bucket = int(time.time() // settings.weather_cache_ttl)
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    cls.BASE_URL,
-                    params={
-                        "lat": lat,
-                        "lon": lng,
-                        "appid": settings.openweather_api_key,
-                        "units": "metric",
-                        "lang": "es"
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                weather_main = data["weather"][0]["main"]
-                
-                return WeatherInfo(
-                    condition=cls._map_condition(weather_main),
-                    temperature=data["main"]["temp"],
-                    humidity=data["main"]["humidity"],
-                    visibility=data.get("visibility", 10000),
-                    wind_speed=data["wind"]["speed"],
-                    description=data["weather"][0]["description"]
-                )
+            return await cls._cache.get_or_load((cell, bucket), lambda: cls._fetch_cell(cell))
         except Exception as e:
             print(f"Error obteniendo clima: {e}")
             return WeatherInfo(
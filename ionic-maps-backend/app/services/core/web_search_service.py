@@ -1,6 +1,7 @@
 
 from duckduckgo_search import DDGS
 import json
+from app.utils.tracing import traced
 
 class WebSearchService:
     """
@@ -9,6 +10,7 @@ class WebSearchService:
     """
 
     @staticmethod
+    @traced("web_search")
     def search_panama_prices(query: str, max_results: int = 5):
         print(f"🔎 [FALLBACK-SEARCH] Intentando búsqueda en internet: {query}")
         
@@ -11,6 +11,7 @@ import httpx
 import cohere
 from app.database import get_database
 from app.config import get_settings, GEMINI_MODELS, COHERE_MODELS
+from app.utils.tracing import span
 import math
 from typing import Optional, List, Dict, Any
 from google import genai
@@ -295,11 +296,12 @@ class BusinessService:
                     "No inventes datos, usa los que te pasé. Si el precio sugerido matemático es mayor al actual, sugiérelo con tacto."
                 )
                 
-                ai_response = await client.chat(
-                    model=COHERE_MODELS[1], # Usamos Command-R (08-2024) para estrategia
-                    message=prompt,
-                    preamble=cls.SYSTEM_PROMPT,
-                )
+                with span("llm"):
+                    ai_response = await client.chat(
+                        model=COHERE_MODELS[1], # Usamos Command-R (08-2024) para estrategia
+                        message=prompt,
+                        preamble=cls.SYSTEM_PROMPT,
+                    )
                 advice_text = ai_response.text.strip()
                 
                 # 🧠 APRENDIZAJE ETERNO: Guardar el PATRÓN en MongoDB
@@ -379,11 +381,12 @@ class BusinessService:
 
         try:
             client = cls._get_client()
-            response = await client.chat(
-                model=COHERE_MODELS[1],
-                message=prompt,
-                preamble=cls.SYSTEM_PROMPT,
-            )
+            with span("llm"):
+                response = await client.chat(
+                    model=COHERE_MODELS[1],
+                    message=prompt,
+                    preamble=cls.SYSTEM_PROMPT,
+                )
             raw_text = response.text.strip()
             # Limpieza ultra-agresiva de JSON (Para dueños de restaurantes: no queremos basura de texto)
             if "{" in raw_text:
@@ -553,11 +556,12 @@ class BusinessService:
             # Reemplazo total a la API de Cohere
             client = cls._get_client()
             prompt = f"Datos de {product_name}:\n{costing_data}\nConsejo pro?"
-            ai_response = await client.chat(
-                model=COHERE_MODELS[1],
-                message=prompt,
-                preamble=cls.SYSTEM_PROMPT,
-            )
+            with span("llm"):
+                ai_response = await client.chat(
+                    model=COHERE_MODELS[1],
+                    message=prompt,
+                    preamble=cls.SYSTEM_PROMPT,
+                )
             return {"success": True, "message": ai_response.text.strip(), "data": costing_data}
         except Exception as e:
             return {"success": False, "message": "Error", "error": str(e)}
@@ -612,10 +616,11 @@ class BusinessService:
                 
                 client = cls._get_gemini_client()
                 # Gemini 3.1 Flash-Lite para máxima velocidad y ahorro
-                response = client.models.generate_content(
-                    model=GEMINI_MODELS[0], # Usamos 2.5-flash
-                    contents=prompt
-                )
+                with span("llm"):
+                    response = await client.aio.models.generate_content(
+                        model=GEMINI_MODELS[0], # Usamos 2.5-flash
+                        contents=prompt
+                    )
                 
                 summary_text = response.text.strip()
                 
@@ -728,11 +733,12 @@ class BusinessService:
             )
 
             client = cls._get_client()
-            ai_response = await client.chat(
-                model=COHERE_MODELS[1],
-                message=prompt,
-                preamble=cls.SYSTEM_PROMPT,
-            )
+            with span("llm"):
+                ai_response = await client.chat(
+                    model=COHERE_MODELS[1],
+                    message=prompt,
+                    preamble=cls.SYSTEM_PROMPT,
+                )
             
             # Limpieza ultra-agresiva para evitar el error de 'Extra Data'
             raw_text = ai_response.text.strip()
@@ -12,6 +12,7 @@ from google.genai import types
 from typing import Optional
 from app.services.ai.caitlyn_vision_service import CaitlynVisionService
 from app.config import GEMINI_MODELS
+from app.utils.tracing import span
 
 
 class InvoiceService:
@@ -110,15 +111,16 @@ class InvoiceService:
             for model_name in cls.GEMINI_MODELS:
                 try:
                     print(f"🤖 Intentando con modelo: {model_name}")
-                    response = await client.aio.models.generate_content(
-                        model=model_name,
-                        contents=[
-                            types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
-                        ],
-                        config=types.GenerateContentConfig(
-                            system_instruction=system_instruction,
+                    with span("llm"):
+                        response = await client.aio.models.generate_content(
+                            model=model_name,
+                            contents=[
+                                types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
+                            ],
+                            config=types.GenerateContentConfig(
+                                system_instruction=system_instruction,
+                            )
                         )
-                    )
                     
                     raw_text = response.text.strip()
                     
@@ -1,6 +1,7 @@
 
 import os
 import json
+import asyncio
 from datetime import datetime
 from google import genai
 from google.genai import types
@@ -9,6 +10,20 @@ from app.services.kitchy.invoice_service import InvoiceService
 from app.services.core.web_search_service import WebSearchService
 from app.config import get_settings, GEMINI_MODELS
 from app.database import get_database
+from app.utils.cached_collection import CachedCollection
+from app.utils.tracing import span
+
+
+async def _load_market_source(tipo: str) -> Optional[dict]:
+    db = get_database(get_settings().kitchy_database_name)
+    return await db["market_sources"].find_one({"tipo": tipo})
+
+
+# Fuentes aprendidas por tipo de mercado (solo cambian cuando Caitlyn aprende una URL)
+market_sources_cache: CachedCollection[Optional[dict]] = CachedCollection(
+    "market_sources", _load_market_source, ttl=3600,
+    collection="market_sources", database=get_settings().kitchy_database_name, key_field="tipo"
+)
 
 class MarketService:
     """Servicio para que Caitlyn analice capturas de pantalla de mercados y combustible."""
@@ -94,14 +109,15 @@ class MarketService:
                 
                 for model_name in GEMINI_MODELS:
                     try:
-                        response = client.models.generate_content(
-                            model=model_name,
-                            contents=[prompt, types.Part.from_bytes(data=image_bytes, mime_type=mime_type)],
-                            config=types.GenerateContentConfig(
-                                system_instruction=system_instruction,
-                                response_mime_type="application/json"
+                        with span("llm"):
+                            response = await client.aio.models.generate_content(
+                                model=model_name,
+                                contents=[prompt, types.Part.from_bytes(data=image_bytes, mime_type=mime_type)],
+                                config=types.GenerateContentConfig(
+                                    system_instruction=system_instruction,
+                                    response_mime_type="application/json"
+                                )
                             )
-                        )
                         data = json.loads(response.text)
                         return {"success": True, "data": data, "metodo": f"gemini_vision_{model_name}"}
                     except Exception as model_err:
@@ -121,8 +137,7 @@ class MarketService:
                 # 🎯 PASO A: Intentar con FUENTES DIRECTAS (Memoria + Oficiales)
                 print(f"🧠 Caitlyn consultando fuentes directas para {tipo}...")
                 try:
-                    db = get_database(get_settings().kitchy_database_name)
-                    source_doc = await db["market_sources"].find_one({"tipo": tipo})
+                    source_doc = await market_sources_cache.get(tipo)
                     
                     from app.services.logistics.direct_scraper_service import DirectScraperService
                     
@@ -134,7 +149,11 @@ class MarketService:
 
                     for url in candidate_urls:
                         print(f"📸 Flashazo a: {url}")
-                        scraper_result = DirectScraperService.get_page_content(tipo) if url == default_url else {"text": DirectScraperService.fetch_custom_url(url), "pdf_links": []}
+                        # Los scrapers usan requests (bloqueante): en un hilo para no frenar el event loop
+                        if url == default_url:
+                            scraper_result = await asyncio.to_thread(DirectScraperService.get_page_content, tipo)
+                        else:
+                            scraper_result = {"text": await asyncio.to_thread(DirectScraperService.fetch_custom_url, url), "pdf_links": []}
                         
                         if scraper_result:
                             raw_web_content = scraper_result.get("text", "")
@@ -157,7 +176,8 @@ class MarketService:
                                         f"Prioriza {current_month} {current_year}. Si no existe, elige el más cercano anterior. "
                                         "Responde solo la URL o 'null'."
                                     )
-                                    sel_resp = client.models.generate_content(model=GEMINI_MODELS[0], contents=selection_prompt)
+                                    with span("llm"):
+                                        sel_resp = await client.aio.models.generate_content(model=GEMINI_MODELS[0], contents=selection_prompt)
                                     best_pdf_link = sel_resp.text.strip()
                                     # Si lo que devolvió Gemini no parece una URL, forzamos error para ir al fallback
                                     if "http" not in best_pdf_link and not best_pdf_link.startswith('/'):
@@ -191,17 +211,18 @@ class MarketService:
                                 if best_pdf_link.startswith('/'):
                                     best_pdf_link = "https://www.acodeco.gob.pa" + best_pdf_link
                                     
-                                pdf_bytes = DirectScraperService.download_file(best_pdf_link)
+                                pdf_bytes = await asyncio.to_thread(DirectScraperService.download_file, best_pdf_link)
                                 if pdf_bytes:
                                     try:
                                         print(f"🤖 Caitlyn intentando leer PDF con Gemini ({len(pdf_bytes)} bytes)...")
-                                        response = client.models.generate_content(
-                                            model=GEMINI_MODELS[0],
-                                            contents=[
-                                                types.Part.from_bytes(data=pdf_bytes, mime_type="application/pdf"),
-                                                f"Extrae los precios de {tipo} para Panamá hoy. Responde solo JSON."
-                                            ]
-                                        )
+                                        with span("llm"):
+                                            response = await client.aio.models.generate_content(
+                                                model=GEMINI_MODELS[0],
+                                                contents=[
+                                                    types.Part.from_bytes(data=pdf_bytes, mime_type="application/pdf"),
+                                                    f"Extrae los precios de {tipo} para Panamá hoy. Responde solo JSON."
+                                                ]
+                                            )
                                         data = json.loads(response.text[response.text.find('{'):response.text.rfind('}')+1])
                                         if any(data.values()):
                                             await cls.learn_source(tipo, [best_pdf_link])
@@ -209,7 +230,7 @@ class MarketService:
                                             return {"success": True, "data": data, "metodo": "direct_flash_pdf_gemini"}
                                     except Exception as gemini_err:
                                         print(f"⚠️ Falló lectura de PDF con Gemini: {gemini_err}. Usando MODO SUPERVIVENCIA...")
-                                        local_text = DirectScraperService.extract_text_from_pdf(pdf_bytes)
+                                        local_text = await asyncio.to_thread(DirectScraperService.extract_text_from_pdf, pdf_bytes)
                                         from app.services.ai.caitlyn_vision_service import CaitlynVisionService
                                         local_items = CaitlynVisionService._extract_products_from_text(local_text)
                                         if local_items:
@@ -221,10 +242,11 @@ class MarketService:
                             # Si no hay PDF o falló el procesamiento PDF, intentar con el texto de la web
                             if raw_web_content:
                                 try:
-                                    response = client.models.generate_content(
-                                        model=GEMINI_MODELS[0],
-                                        contents=f"Extrae precios de {tipo} de este texto:\n\n{raw_web_content[:8000]}\n\n{system_instruction}"
-                                    )
+                                    with span("llm"):
+                                        response = await client.aio.models.generate_content(
+                                            model=GEMINI_MODELS[0],
+                                            contents=f"Extrae precios de {tipo} de este texto:\n\n{raw_web_content[:8000]}\n\n{system_instruction}"
+                                        )
                                     data = json.loads(response.text[response.text.find('{'):response.text.rfind('}')+1])
                                     if any(data.values()):
                                         await cls.save_to_cache(tipo, data)
@@ -242,14 +264,15 @@ class MarketService:
                     try:
                         print(f"🤖 Investigando con {model_name}...")
                         try:
-                            response = client.models.generate_content(
-                                model=model_name,
-                                contents=search_query,
-                                config=types.GenerateContentConfig(
-                                    system_instruction=system_instruction,
-                                    tools=[types.Tool(google_search=types.GoogleSearch())],
+                            with span("llm"):
+                                response = await client.aio.models.generate_content(
+                                    model=model_name,
+                                    contents=search_query,
+                                    config=types.GenerateContentConfig(
+                                        system_instruction=system_instruction,
+                                        tools=[types.Tool(google_search=types.GoogleSearch())],
+                                    )
                                 )
-                            )
                         except Exception as e:
                             last_error = str(e)
                             print(f"⚠️ Error en {model_name}: {last_error}")
@@ -281,16 +304,17 @@ class MarketService:
                 # --- PASO C: Fallback a DuckDuckGo ---
                 print(f"🦆 [FALLBACK] Google falló. Usando DuckDuckGo para {tipo}...")
                 simple_query = f"precios {tipo} Panama hoy"
-                web_results = WebSearchService.search_panama_prices(simple_query)
+                web_results = await asyncio.to_thread(WebSearchService.search_panama_prices, simple_query)
                 if web_results:
                     try:
-                        response = client.models.generate_content(
-                            model=GEMINI_MODELS[0],
-                            contents=(
-                                f"Resultados de DuckDuckGo sobre {tipo}:\n{json.dumps(web_results)}\n\n"
-                                f"{system_instruction}\nExtrae el JSON."
+                        with span("llm"):
+                            response = await client.aio.models.generate_content(
+                                model=GEMINI_MODELS[0],
+                                contents=(
+                                    f"Resultados de DuckDuckGo sobre {tipo}:\n{json.dumps(web_results)}\n\n"
+                                    f"{system_instruction}\nExtrae el JSON."
+                                )
                             )
-                        )
                         raw_text = response.text
                         data = json.loads(raw_text[raw_text.find('{'):raw_text.rfind('}')+1])
                         await cls.save_to_cache(tipo, data)
@@ -314,6 +338,7 @@ class MarketService:
                 {"$addToSet": {"urls": {"$each": urls}}},
                 upsert=True
             )
+            market_sources_cache.invalidate(tipo)
             print(f"🎓 [APRENDIZAJE] Caitlyn memorizó nuevas fuentes para {tipo}: {urls}")
         except Exception as e:
             print(f"⚠️ [APRENDIZAJE] No se pudo memorizar la fuente: {e}")
@@ -6,6 +6,7 @@ from google.genai import types
 from typing import List, Dict, Optional
 from app.database import get_database
 from app.config import get_settings, GEMINI_MODELS
+from app.utils.tracing import span
 
 class ShoppingService:
     """
@@ -70,13 +71,14 @@ class ShoppingService:
             contents.append(text)
 
         try:
-            response = await client.aio.models.generate_content(
-                model=GEMINI_MODELS[0], # Estable para producción
-                contents=contents,
-                config=types.GenerateContentConfig(
-                    system_instruction=cls.SYSTEM_PROMPT,
+            with span("llm"):
+                response = await client.aio.models.generate_content(
+                    model=GEMINI_MODELS[0], # Estable para producción
+                    contents=contents,
+                    config=types.GenerateContentConfig(
+                        system_instruction=cls.SYSTEM_PROMPT,
+                    )
                 )
-            )
             
             # Limpiar y parsear JSON
             raw_text = response.text.strip()
@@ -11,6 +11,7 @@ from google import genai
 from google.genai import types
 from typing import Optional, List, Dict
 from app.config import GEMINI_MODELS
+from app.utils.tracing import span
 
 class VentasNotebookService:
     """Servicio dedicado a la extracción de ventas desde fotos de cuadernos o libretas."""
@@ -96,15 +97,16 @@ class VentasNotebookService:
             print(f"📖 VentasNotebookService: Procesando cuaderno ({len(image_bytes)} bytes) con {mime_type}")
             
             # Usar el mismo modelo que InvoiceService
-            response = await client.aio.models.generate_content(
-                model=GEMINI_MODELS[0],
-                contents=[
-                    types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
-                ],
-                config=types.GenerateContentConfig(
-                    system_instruction=cls.SYSTEM_PROMPT,
+            with span("llm"):
+                response = await client.aio.models.generate_content(
+                    model=GEMINI_MODELS[0],
+                    contents=[
+                        types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
+                    ],
+                    config=types.GenerateContentConfig(
+                        system_instruction=cls.SYSTEM_PROMPT,
+                    )
                 )
-            )
             
             raw_text = response.text.strip()
             extracted_data = cls._parse_response(raw_text)
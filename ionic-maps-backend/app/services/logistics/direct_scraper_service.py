@@ -2,6 +2,7 @@
 import requests
 from bs4 import BeautifulSoup
 import json
+from app.utils.tracing import traced
 
 class DirectScraperService:
     """
@@ -16,6 +17,7 @@ class DirectScraperService:
     }
 
     @classmethod
+    @traced("scraper_http")
     def get_page_content(cls, tipo: str):
         url = cls.SOURCES.get(tipo)
         if not url:
@@ -59,6 +61,7 @@ class DirectScraperService:
             return None
 
     @classmethod
+    @traced("scraper_http")
     def fetch_custom_url(cls, url: str):
         """Dada una URL aprendida, intenta extraer su texto."""
         print(f"📸 [DIRECT-SCRAPER] Flashazo a URL personalizada: {url}")
@@ -81,6 +84,7 @@ class DirectScraperService:
             return None
 
     @classmethod
+    @traced("scraper_http")
     def download_file(cls, url: str):
         """Descarga un archivo (PDF) y devuelve sus bytes."""
         print(f"📥 [DIRECT-SCRAPER] Descargando archivo: {url}")
@@ -6,9 +6,23 @@ import logging
 import json
 from datetime import datetime, timedelta
 from app.database import get_database
+from app.utils.cached_collection import CachedCollection
 
 logger = logging.getLogger(__name__)
 
+CARRIERS_PATH = os.path.join(os.getcwd(), "app/ai/carriers.json")
+
+
+async def _read_carriers(_mtime: float) -> list:
+    def read():
+        with open(CARRIERS_PATH, "r") as f:
+            return json.load(f)
+    return await asyncio.to_thread(read)
+
+
+# La clave es la fecha de modificación: editar el JSON invalida la caché sola
+carriers_cache = CachedCollection("carriers", _read_carriers, ttl=24 * 3600, maxsize=2)
+
 class LogisticsService:
     """
     Servicio de alto nivel para Muelle. 
@@ -16,12 +30,10 @@ class LogisticsService:
     """
 
     @classmethod
-    def _load_config(cls):
-        """Carga la configuración de navieras desde el JSON."""
+    async def _load_config(cls):
+        """Carga la configuración de navieras desde el JSON (cacheada hasta que el archivo cambie)."""
         try:
-            config_path = os.path.join(os.getcwd(), "app/ai/carriers.json")
-            with open(config_path, "r") as f:
-                return json.load(f)
+            return await carriers_cache.get(os.path.getmtime(CARRIERS_PATH))
         except Exception as e:
             logger.error(f"❌ Error cargando carriers.json: {e}")
             return []
@@ -101,7 +113,7 @@ class LogisticsService:
                 await socket_manager.broadcast(f"🔄 [CAITLYN] La memoria de esta ruta caducó. Volviendo a cazar...")
         
         # 1. Cargamos y filtramos las navieras activas
-        misiones_activas = [m for m in cls._load_config() if m.get("active")]
+        misiones_activas = [m for m in await cls._load_config() if m.get("active")]
         
         # Lanzamos las misiones en paralelo con red de seguridad
         tareas = [
@@ -0,0 +1,156 @@
+import asyncio
+import math
+import time
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from app.database import get_database
+from app.models.schemas import Convoy, LatLng, MemberEta
+from app.services.ai.ml_service import MLService
+from app.services.maps.routing_service import RoutingService
+from app.services.maps.convoy_live_service import convoy_hub
+from app.utils.holidays import is_holiday
+
+
+class _EtaEntry:
+    __slots__ = ("positions", "etas", "computed_at", "has_destination")
+
+    def __init__(self, positions: Dict[str, Tuple[float, float]], etas: List[MemberEta], has_destination: bool = True):
+        self.positions = positions
+        self.etas = etas
+        self.computed_at = time.monotonic()
+        self.has_destination = has_destination
+
+
+class ConvoyEtaService:
+    """
+    ETA de todos los miembros de un convoy hacia su destino
+
+    Una sola llamada a la tabla de OSRM (miembros x destino) y una sola
+    predicción por lotes de MLService por recálculo. El resultado queda en
+    caché y solo se recalcula cuando algún miembro se movió más de
+    RECOMPUTE_DISTANCE_M desde el último cálculo (o pasó MAX_AGE_S).
+
+    Los convoyes sin destino también quedan en caché (sin ETAs) para no
+    consultarlos en cada ubicación; fijar el destino o cerrar el convoy
+    (barrido de presencia) los invalida (forget).
+    """
+
+    RECOMPUTE_DISTANCE_M = 250.0
+    MAX_AGE_S = 300.0  # El tráfico cambia aunque nadie se mueva
+
+    _cache: Dict[str, _EtaEntry] = {}
+    _pending: Set[str] = set()
+    _background_tasks: Set[asyncio.Task] = set()  # Referencias para que el GC no cancele los recálculos
+
+    @staticmethod
+    def _distance_m(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+        x = math.radians(b[1] - a[1]) * math.cos(math.radians((a[0] + b[0]) / 2))
+        y = math.radians(b[0] - a[0])
+        return 6371000.0 * math.hypot(x, y)
+
+    @classmethod
+    def get_etas(cls, convoy_id: str) -> List[MemberEta]:
+        entry = cls._cache.get(convoy_id)
+        return entry.etas if entry else []
+
+    @classmethod
+    def on_member_moved(cls, convoy_id: str, user_id: str, location: LatLng):
+        """
+        Llamar tras cada ubicación aceptada: O(1) y sin I/O. Programa un
+        recálculo en segundo plano solo si el movimiento es significativo.
+        """
+        entry = cls._cache.get(convoy_id)
+        if entry is not None:
+            previous = entry.positions.get(user_id)
+            fresh = time.monotonic() - entry.computed_at < cls.MAX_AGE_S
+            if fresh and not entry.has_destination:
+                return
+            if fresh and previous is not None and \
+                    cls._distance_m(previous, (location.lat, location.lng)) < cls.RECOMPUTE_DISTANCE_M:
+                return
+        cls.schedule(convoy_id)
+
+    @classmethod
+    def schedule(cls, convoy_id: str):
+        """Recalcular en segundo plano (como máximo uno en curso por convoy)"""
+        if convoy_id in cls._pending:
+            return
+        cls._pending.add(convoy_id)
+        task = asyncio.create_task(cls._refresh_task(convoy_id))
+        cls._background_tasks.add(task)
+        task.add_done_callback(cls._background_tasks.discard)
+
+    @classmethod
+    async def _refresh_task(cls, convoy_id: str):
+        try:
+            convoy = convoy_hub.get_convoy(convoy_id)
+            if convoy is None:
+                doc = await get_database().convoys.find_one({"_id": convoy_id, "is_active": True})
+                convoy = Convoy(**doc) if doc else None
+            if convoy is None:
+                cls._cache.pop(convoy_id, None)
+                return
+            if convoy.destination is None:
+                cls._cache[convoy_id] = _EtaEntry({}, [], has_destination=False)
+                return
+
+            etas = await cls.refresh(convoy)
+            if etas is not None:
+                await convoy_hub.broadcast(convoy_id, {
+                    "type": "etas",
+                    "etas": [eta.model_dump(mode="json") for eta in etas],
+                })
+        except Exception as e:
+            print(f"⚠️ Error calculando ETAs del convoy: {e}")
+        finally:
+            cls._pending.discard(convoy_id)
+
+    @classmethod
+    async def refresh(cls, convoy: Convoy) -> Optional[List[MemberEta]]:
+        """Recalcular y cachear las ETAs de todos los miembros"""
+        if convoy.destination is None or not convoy.members:
+            return None
+
+        members = convoy.members
+        table = await RoutingService.get_table([m.location for m in members], convoy.destination)
+        if table is None:
+            return None
+
+        durations = np.array([np.nan if d is None else d for d in table[0]], dtype=float)
+        distances = np.array([np.nan if d is None else d for d in table[1]], dtype=float)
+        reachable = ~np.isnan(durations)
+
+        # Un solo predict del modelo para todos los miembros
+        now = datetime.now()
+        adjusted = np.full(len(members), np.nan)
+        if reachable.any():
+            count = int(reachable.sum())
+            factors, _ = MLService.predict_batch(
+                base_duration=durations[reachable],
+                distance=np.nan_to_num(distances[reachable]),
+                hours=np.full(count, now.hour),
+                days_of_week=np.full(count, now.weekday()),
+                holidays=np.full(count, is_holiday(now.date()))
+            )
+            adjusted[reachable] = durations[reachable] * factors
+
+        etas = [
+            MemberEta(
+                user_id=member.user_id,
+                eta_seconds=None if np.isnan(eta) else round(float(eta), 1),
+                distance_meters=None if np.isnan(dist) else float(dist),
+                arrival_time=None if np.isnan(eta) else now + timedelta(seconds=float(eta)),
+            )
+            for member, eta, dist in zip(members, adjusted, distances)
+        ]
+
+        cls._cache[convoy.id] = _EtaEntry(
+            {m.user_id: (m.location.lat, m.location.lng) for m in members},
+            etas
+        )
+        return etas
+
+    @classmethod
+    def forget(cls, convoy_id: str):
+        cls._cache.pop(convoy_id, None)
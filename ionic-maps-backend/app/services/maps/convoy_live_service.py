@@ -0,0 +1,295 @@
+import json
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+from fastapi import WebSocket
+from pymongo import UpdateOne
+from app.database import get_database
+from app.models.schemas import Convoy, ConvoyMember, ConvoyMemberStatus, LatLng
+from app.services.maps.location_gate import location_gate
+from app.services.core.pubsub import pubsub
+
+
+class LiveConvoy:
+    """Estado en memoria de un convoy con miembros conectados"""
+
+    def __init__(self, doc: dict):
+        self.doc = {k: v for k, v in doc.items() if k != "members"}
+        self.members: Dict[str, dict] = {m["user_id"]: dict(m) for m in doc.get("members", [])}
+        self.sockets: Dict[str, WebSocket] = {}
+        self.dirty: Set[str] = set()
+
+    def to_model(self) -> Convoy:
+        return Convoy(**self.doc, members=list(self.members.values()))
+
+
+class ConvoyHub:
+    """
+    Canal en tiempo real de convoyes
+
+    El estado de los convoyes con sockets abiertos vive en memoria y es la
+    fuente de verdad: cada ubicación se aplica en memoria y se reenvía como
+    delta al resto de miembros, sin tocar MongoDB. Un flush periódico
+    escribe los miembros modificados en un solo bulk_write (write-behind).
+
+    Con varios workers, los deltas viajan por el pub/sub: cada worker los
+    aplica a su copia en memoria y los entrega a sus propios sockets. Solo
+    el worker que recibió la ubicación la marca para persistir.
+    """
+
+    FLUSH_INTERVAL = 2.0  # segundos
+    CHANNEL = "convoy"
+
+    def __init__(self):
+        self.convoys: Dict[str, LiveConvoy] = {}
+        self._lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        pubsub.subscribe(self.CHANNEL, self._on_message)
+
+    # ============== CICLO DE VIDA ==============
+
+    def start(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    def is_live(self, convoy_id: str) -> bool:
+        return convoy_id in self.convoys
+
+    async def _load(self, convoy_id: str) -> Optional[LiveConvoy]:
+        async with self._lock:
+            live = self.convoys.get(convoy_id)
+            if live is None:
+                doc = await get_database().convoys.find_one({"_id": convoy_id, "is_active": True})
+                if not doc:
+                    return None
+                live = self.convoys[convoy_id] = LiveConvoy(doc)
+            return live
+
+    # ============== CONEXIONES ==============
+
+    async def connect(self, convoy_id: str, user_id: str, websocket: WebSocket) -> bool:
+        """Registrar el socket de un miembro y enviarle el estado completo"""
+        live = await self._load(convoy_id)
+        if live is None or user_id not in live.members:
+            return False
+
+        # Registrar antes del primer await para que el flush no lo libere
+        previous = live.sockets.get(user_id)
+        live.sockets[user_id] = websocket
+        await websocket.accept()
+        if previous is not None:
+            await self._close_quietly(previous)
+
+        await websocket.send_text(json.dumps({
+            "type": "snapshot",
+            "convoy": live.to_model().model_dump(mode="json", by_alias=True)
+        }))
+        return True
+
+    async def disconnect(self, convoy_id: str, user_id: str, websocket: WebSocket):
+        live = self.convoys.get(convoy_id)
+        if live and live.sockets.get(user_id) is websocket:
+            del live.sockets[user_id]
+
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket):
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+    async def _publish(self, convoy_id: str, message: dict, exclude: Optional[str] = None):
+        """Difundir un mensaje del convoy a todos los workers (incluido este)"""
+        await pubsub.publish(self.CHANNEL, json.dumps(
+            {"convoy_id": convoy_id, "exclude": exclude, "message": message}, default=str
+        ))
+
+    async def _on_message(self, data: str):
+        envelope = json.loads(data)
+        live = self.convoys.get(envelope["convoy_id"])
+        if live is None:
+            return
+        self._apply(live, envelope["message"])
+        await self._send(live, envelope["message"], exclude=envelope["exclude"])
+
+    @staticmethod
+    def _apply(live: LiveConvoy, message: dict):
+        """Reflejar en memoria un delta (idempotente: también llega al worker que lo generó)"""
+        kind = message["type"]
+        if kind == "member_joined":
+            member = dict(message["member"])
+            member["last_update"] = datetime.fromisoformat(member["last_update"])
+            live.members.setdefault(member["user_id"], member)
+        elif kind == "destination":
+            live.doc["destination"] = message["destination"]
+        elif kind in ("member_update", "member_status"):
+            member = live.members.get(message["user_id"])
+            if member is None:
+                return
+            member["status"] = message["status"]
+            if kind == "member_update":
+                member["location"] = {"lat": message["lat"], "lng": message["lng"]}
+                member["last_update"] = datetime.fromisoformat(message["last_update"])
+
+    async def _send(self, live: LiveConvoy, message: dict, exclude: Optional[str] = None):
+        """Enviar un mensaje a los sockets del convoy en este worker (menos `exclude`)"""
+        text = json.dumps(message, default=str)
+        targets = [(uid, ws) for uid, ws in live.sockets.items() if uid != exclude]
+        results = await asyncio.gather(
+            *(ws.send_text(text) for _, ws in targets), return_exceptions=True
+        )
+        for (uid, ws), result in zip(targets, results):
+            if isinstance(result, Exception) and live.sockets.get(uid) is ws:
+                del live.sockets[uid]
+
+    # ============== ESTADO ==============
+
+    async def update_location(self, convoy_id: str, user_id: str, location: LatLng) -> Optional[dict]:
+        """
+        Aplicar una ubicación en memoria y difundir el delta (0 round-trips a la DB)
+        
+        Returns:
+            {live: LiveConvoy, accepted: bool, next_update_ms: int} o None
+        """
+        live = self.convoys.get(convoy_id)
+        if live is None or user_id not in live.members:
+            return None
+
+        decision = location_gate.check(convoy_id, user_id, location, len(live.members))
+        result = {"live": live, "accepted": decision.accepted, "next_update_ms": decision.next_update_ms}
+        if not decision.accepted:
+            return result
+
+        now = datetime.utcnow()
+        member = live.members[user_id]
+        member["location"] = location.model_dump()
+        member["last_update"] = now
+        member["status"] = ConvoyMemberStatus.ONLINE.value
+        live.dirty.add(user_id)
+
+        await self.relay_location(convoy_id, user_id, location, now)
+        return result
+
+    async def relay_location(self, convoy_id: str, user_id: str, location: LatLng, last_update: datetime):
+        """Difundir una ubicación ya aplicada (en memoria o, sin canal en vivo, en la DB)"""
+        await self._publish(convoy_id, {
+            "type": "member_update",
+            "user_id": user_id,
+            "lat": location.lat,
+            "lng": location.lng,
+            "last_update": last_update.isoformat(),
+            "status": ConvoyMemberStatus.ONLINE.value,
+        }, exclude=user_id)
+
+    async def send_rate(self, convoy_id: str, user_id: str, next_update_ms: int):
+        """Indicar a un miembro cada cuánto debe enviar su ubicación"""
+        live = self.convoys.get(convoy_id)
+        websocket = live.sockets.get(user_id) if live else None
+        if websocket is None:
+            return
+        try:
+            await websocket.send_text(json.dumps({"type": "rate", "next_update_ms": next_update_ms}))
+        except Exception:
+            pass
+
+    async def add_member(self, convoy_id: str, member: ConvoyMember):
+        """Reflejar en memoria un miembro que se unió por REST (en todos los workers)"""
+        live = self.convoys.get(convoy_id)
+        if live is not None:
+            live.members[member.user_id] = member.model_dump()
+        await self._publish(convoy_id, {
+            "type": "member_joined",
+            "member": member.model_dump(mode="json"),
+        })
+
+    async def broadcast(self, convoy_id: str, message: dict):
+        """Enviar un mensaje a todos los sockets de un convoy en vivo"""
+        await self._publish(convoy_id, message)
+
+    async def set_destination(self, convoy_id: str, destination: LatLng):
+        live = self.convoys.get(convoy_id)
+        if live is not None:
+            live.doc["destination"] = destination.model_dump()
+        await self._publish(convoy_id, {"type": "destination", "destination": destination.model_dump()})
+
+    async def mark_offline(self, cutoff: datetime) -> int:
+        """Pasar a OFFLINE (en memoria) a los miembros sin ubicación desde `cutoff`"""
+        # Primero marcar y después publicar: durante cada await pueden unirse
+        # miembros (add_member) y cambiar los diccionarios que se recorren
+        changed = []
+        for live in list(self.convoys.values()):
+            for user_id, member in live.members.items():
+                if member["status"] != ConvoyMemberStatus.ONLINE.value or member["last_update"] >= cutoff:
+                    continue
+                member["status"] = ConvoyMemberStatus.OFFLINE.value
+                live.dirty.add(user_id)
+                changed.append((live.doc["_id"], user_id))
+
+        for convoy_id, user_id in changed:
+            await self._publish(convoy_id, {
+                "type": "member_status",
+                "user_id": user_id,
+                "status": ConvoyMemberStatus.OFFLINE.value,
+            })
+        return len(changed)
+
+    def live_ids(self) -> List[str]:
+        return list(self.convoys)
+
+    def get_convoy(self, convoy_id: str) -> Optional[Convoy]:
+        live = self.convoys.get(convoy_id)
+        return live.to_model() if live else None
+
+    # ============== PERSISTENCIA (WRITE-BEHIND) ==============
+
+    async def flush(self):
+        """Escribir en MongoDB los miembros modificados de todos los convoyes"""
+        db = get_database()
+        if db is None:
+            return
+
+        operations, flushed = [], []
+        for convoy_id, live in list(self.convoys.items()):
+            if live.dirty:
+                dirty, live.dirty = live.dirty, set()
+                flushed.append((live, dirty))
+                updates, array_filters = {}, []
+                for i, user_id in enumerate(dirty):
+                    member = live.members[user_id]
+                    updates[f"members.$[m{i}].location"] = member["location"]
+                    updates[f"members.$[m{i}].last_update"] = member["last_update"]
+                    updates[f"members.$[m{i}].status"] = member["status"]
+                    array_filters.append({f"m{i}.user_id": user_id})
+                operations.append(UpdateOne({"_id": convoy_id}, {"$set": updates}, array_filters=array_filters))
+
+        if operations:
+            try:
+                await db.convoys.bulk_write(operations, ordered=False)
+            except Exception:
+                # Reintentar en el próximo flush
+                for live, dirty in flushed:
+                    live.dirty |= dirty
+                raise
+
+        # Convoyes sin sockets y ya persistidos: liberar memoria
+        for convoy_id, live in list(self.convoys.items()):
+            if not live.sockets and not live.dirty:
+                self.convoys.pop(convoy_id, None)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"⚠️ Error persistiendo convoyes: {e}")
+
+
+# Instancia única para toda la app
+convoy_hub = ConvoyHub()
@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo import UpdateMany
+from app.database import get_database
+from app.models.schemas import ConvoyMemberStatus
+from app.services.maps.convoy_live_service import convoy_hub
+from app.services.maps.convoy_eta_service import ConvoyEtaService
+from app.services.maps.location_gate import location_gate
+
+
+class ConvoyPresenceService:
+    """
+    Barrido periódico de presencia en los convoyes
+
+    Cada SWEEP_INTERVAL segundos:
+    - Los miembros sin ubicación en OFFLINE_AFTER pasan a OFFLINE. Los
+      convoyes en vivo se actualizan en memoria (y avisan por WebSocket);
+      el resto con un update_many con array_filters.
+    - Los convoyes sin ninguna ubicación en CLOSE_AFTER se cierran (y se
+      olvidan sus ETAs en caché).
+
+    Ambas escrituras van en un único bulk_write por barrido.
+    """
+
+    SWEEP_INTERVAL = 60.0                 # segundos
+    OFFLINE_AFTER = timedelta(minutes=5)
+    CLOSE_AFTER = timedelta(hours=6)
+
+    _sweep_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def sweep(cls) -> dict:
+        """
+        Un barrido de presencia
+
+        Returns:
+            {"live_offline": miembros en vivo marcados, "modified": convoyes modificados en DB}
+        """
+        db = get_database()
+        if db is None:
+            return {"live_offline": 0, "modified": 0}
+
+        now = datetime.utcnow()
+        offline_cutoff = now - cls.OFFLINE_AFTER
+        close_cutoff = now - cls.CLOSE_AFTER
+
+        # Convoyes en vivo: la memoria es la fuente de verdad (el flush del hub persiste)
+        live_offline = await convoy_hub.mark_offline(offline_cutoff)
+        live_ids = convoy_hub.live_ids()
+
+        # Ids de los convoyes a cerrar, para olvidar sus ETAs en caché
+        close_filter = {
+            "_id": {"$nin": live_ids},
+            "is_active": True,
+            "members": {"$not": {"$elemMatch": {"last_update": {"$gte": close_cutoff}}}}
+        }
+        closing = [doc["_id"] async for doc in db.convoys.find(close_filter, {"_id": 1})]
+
+        stale = {"last_update": {"$lt": offline_cutoff}, "status": ConvoyMemberStatus.ONLINE.value}
+        operations = [
+            UpdateMany(
+                {"_id": {"$nin": live_ids}, "is_active": True, "members": {"$elemMatch": stale}},
+                {"$set": {"members.$[m].status": ConvoyMemberStatus.OFFLINE.value}},
+                array_filters=[{f"m.{field}": value for field, value in stale.items()}]
+            ),
+        ]
+        if closing:
+            operations.append(UpdateMany(
+                {**close_filter, "_id": {"$in": closing}},
+                {"$set": {"is_active": False, "closed_at": now}}
+            ))
+        result = await db.convoys.bulk_write(operations, ordered=True)
+        for convoy_id in closing:
+            ConvoyEtaService.forget(convoy_id)
+
+        # El estado del gate de miembros inactivos ya no sirve
+        location_gate.prune(cls.OFFLINE_AFTER.total_seconds())
+
+        return {
+            "live_offline": live_offline,
+            "modified": result.modified_count,
+        }
+
+    @classmethod
+    async def _sweep_loop(cls):
+        while True:
+            await asyncio.sleep(cls.SWEEP_INTERVAL)
+            try:
+                stats = await cls.sweep()
+                if stats["live_offline"] or stats["modified"]:
+                    print(f"👻 Presencia de convoyes: {stats}")
+            except Exception as e:
+                print(f"⚠️ Error en barrido de presencia: {e}")
+
+    @classmethod
+    def start(cls):
+        """Iniciar el barrido periódico en segundo plano"""
+        if cls._sweep_task is None:
+            cls._sweep_task = asyncio.create_task(cls._sweep_loop())
+
+    @classmethod
+    async def stop(cls):
+        if cls._sweep_task:
+            cls._sweep_task.cancel()
+            cls._sweep_task = None
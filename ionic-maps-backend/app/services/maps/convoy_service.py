@@ -4,7 +4,9 @@ import string
 import uuid
 from typing import Optional, List
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 from app.models.schemas import Convoy, ConvoyCreate, ConvoyJoin, ConvoyMember, ConvoyMemberStatus, LatLng
+from app.services.maps.location_gate import location_gate
 
 class ConvoyService:
     def __init__(self, db: AsyncIOMotorDatabase):
@@ -72,28 +74,58 @@ class ConvoyService:
             "user_id": new_user_id
         }
 
-    async def update_member_location(self, convoy_id: str, user_id: str, location: LatLng) -> Optional[Convoy]:
-        """Actualiza la ubicación de un miembro y retorna el convoy actualizado"""
-        # Actualizar location y timestamp del miembro específico
-        result = await self.collection.update_one(
-            {"_id": convoy_id, "members.user_id": user_id},
-            {
-                "$set": {
-                    "members.$.location": location.dict(),
-                    "members.$.last_update": datetime.utcnow(),
-                    "members.$.status": ConvoyMemberStatus.ONLINE
-                }
-            }
-        )
+    async def update_member_location(self, convoy_id: str, user_id: str, location: LatLng) -> Optional[dict]:
+        """
+        Actualiza la ubicación de un miembro
+        
+        Los fixes que no aportan (ver LocationGate) no se escriben: se
+        devuelve el estado actual con una sola lectura.
+        
+        Returns:
+            {convoy: Convoy, accepted: bool, next_update_ms: int} o None si no existe
+        """
+        accepted = location_gate.accept(convoy_id, user_id, location)
+        
+        if accepted:
+            # Escritura + lectura del estado actualizado en un solo round-trip
+            updated_doc = await self.collection.find_one_and_update(
+                {"_id": convoy_id, "members.user_id": user_id},
+                {
+                    "$set": {
+                        "members.$.location": location.dict(),
+                        "members.$.last_update": datetime.utcnow(),
+                        "members.$.status": ConvoyMemberStatus.ONLINE
+                    }
+                },
+                return_document=ReturnDocument.AFTER
+            )
+        else:
+            updated_doc = await self.collection.find_one({"_id": convoy_id, "members.user_id": user_id})
         
-        if result.modified_count == 0:
+        if not updated_doc:
+            location_gate.forget(convoy_id, user_id)
             return None
-            
-        # Opcional: Marcar como offline a miembros inactivos por > 5 min
-        # Esto podría hacerse en un background task, pero por ahora lo dejamos simple
         
-        updated_doc = await self.collection.find_one({"_id": convoy_id})
-        return Convoy(**updated_doc)
+        # Los miembros inactivos pasan a OFFLINE en ConvoyPresenceService
+        return {
+            "convoy": Convoy(**updated_doc),
+            "accepted": accepted,
+            "next_update_ms": location_gate.next_update_ms(convoy_id, user_id, len(updated_doc["members"]))
+        }
+
+    async def set_destination(self, convoy_id: str, user_id: str, destination: LatLng) -> Optional[bool]:
+        """Fija el destino común. None si el convoy no existe, False si no es el anfitrión"""
+        doc = await self.collection.find_one({"_id": convoy_id, "is_active": True}, {"host_id": 1})
+        if not doc:
+            return None
+        if doc["host_id"] != user_id:
+            return False
+            
+        await self.collection.update_one(
+            {"_id": convoy_id},
+            {"$set": {"destination": destination.dict()}}
+        )
+        return True
 
     async def get_convoy(self, convoy_id: str) -> Optional[Convoy]:
         doc = await self.collection.find_one({"_id": convoy_id})
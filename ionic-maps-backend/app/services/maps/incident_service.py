@@ -1,7 +1,9 @@
 from datetime import datetime, timedelta
 from typing import List, Optional
+import numpy as np
 from bson import ObjectId
 from app.database import get_database
+from app.utils.tracing import traced
 from app.models.schemas import (
     Incident, 
     IncidentCreate, 
@@ -16,6 +18,12 @@ class IncidentService:
     
     COLLECTION = "incidents"
     
+    # Solo los campos del modelo Incident
+    PROJECTION = {
+        "location": 1, "type": 1, "severity": 1, "description": 1,
+        "created_at": 1, "expires_at": 1, "confirmations": 1, "is_active": 1
+    }
+    
     @classmethod
     async def create_incident(cls, incident: IncidentCreate) -> Incident:
         """Crear nueva incidencia"""
@@ -41,12 +49,18 @@ class IncidentService:
         return Incident(**doc)
     
     @classmethod
+    @traced("incidents")
     async def get_active_incidents(
         cls,
         near_location: Optional[LatLng] = None,
         radius_km: float = 10.0
-    ) -> List[Incident]:
-        """Obtener incidencias activas"""
+    ) -> List[dict]:
+        """
+        Obtener incidencias activas
+        
+        Devuelve los documentos crudos (con la forma de Incident): el
+        response_model del endpoint los valida una sola vez al serializar.
+        """
         db = get_database()
         
         query = {
@@ -57,27 +71,27 @@ class IncidentService:
         # Si hay ubicación, filtrar por cercanía
         # (Para búsqueda geoespacial real, necesitarías índice 2dsphere)
         
-        cursor = db[cls.COLLECTION].find(query).sort("created_at", -1)
+        cursor = db[cls.COLLECTION].find(query, cls.PROJECTION).sort("created_at", -1)
         incidents = []
         
         async for doc in cursor:
             doc["_id"] = str(doc["_id"])
-            incident = Incident(**doc)
             
             if near_location:
                 # Filtrar por distancia
                 distance = cls._haversine(
                     near_location.lat, near_location.lng,
-                    incident.location.lat, incident.location.lng
+                    doc["location"]["lat"], doc["location"]["lng"]
                 )
                 if distance <= radius_km:
-                    incidents.append(incident)
+                    incidents.append(doc)
             else:
-                incidents.append(incident)
+                incidents.append(doc)
         
         return incidents
     
     @classmethod
+    @traced("incidents")
     async def get_incidents_on_route(
         cls,
         route_coords: List[List[float]],
@@ -91,23 +105,24 @@ class IncidentService:
             "expires_at": {"$gt": datetime.utcnow()}
         }
         
-        cursor = db[cls.COLLECTION].find(query)
-        incidents_on_route = []
+        docs = await db[cls.COLLECTION].find(query, cls.PROJECTION).to_list(length=None)
+        if not docs or not route_coords:
+            return []
         
-        async for doc in cursor:
+        # Distancia de cada incidencia a cada 10º punto de la ruta (matriz incidencias x puntos)
+        route = np.radians(np.asarray(route_coords[::10], dtype=float)[:, :2])
+        points = np.radians([[doc["location"]["lng"], doc["location"]["lat"]] for doc in docs])
+        dlat = points[:, None, 1] - route[None, :, 1]
+        dlng = points[:, None, 0] - route[None, :, 0]
+        a = np.sin(dlat / 2) ** 2 + np.cos(points[:, None, 1]) * np.cos(route[None, :, 1]) * np.sin(dlng / 2) ** 2
+        distances = 6371 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        on_route = (distances <= threshold_km).any(axis=1)
+        
+        # Solo se construye el modelo de las incidencias que afectan la ruta
+        incidents_on_route = []
+        for doc in (doc for doc, hit in zip(docs, on_route) if hit):
             doc["_id"] = str(doc["_id"])
-            incident = Incident(**doc)
-            
-            # Verificar si la incidencia está cerca de algún punto de la ruta
-            for coord in route_coords[::10]:  # Revisar cada 10 puntos para eficiencia
-                lng, lat = coord[0], coord[1]
-                distance = cls._haversine(
-                    lat, lng,
-                    incident.location.lat, incident.location.lng
-                )
-                if distance <= threshold_km:
-                    incidents_on_route.append(incident)
-                    break
+            incidents_on_route.append(Incident(**doc))
         
         return incidents_on_route
     
@@ -0,0 +1,136 @@
+import math
+import time
+from typing import Dict, NamedTuple, Tuple
+from app.models.schemas import LatLng
+from app.utils import metrics
+
+location_updates = metrics.counter(
+    "convoy_location_updates_total",
+    "Updates de ubicación de convoy recibidos, por resultado del gate",
+    ["result"]
+)
+
+
+class GateDecision(NamedTuple):
+    accepted: bool
+    next_update_ms: int  # Intervalo recomendado para el próximo envío
+
+
+class _MemberState:
+    __slots__ = ("lat", "lng", "ts", "heading", "speed")
+
+    def __init__(self, lat: float, lng: float, ts: float):
+        self.lat, self.lng, self.ts = lat, lng, ts
+        self.heading = None
+        self.speed = 0.0
+
+
+class LocationGate:
+    """
+    Gate por miembro para las ubicaciones de convoy
+
+    Descarta los fixes que no aportan (poco desplazamiento, mismo rumbo y
+    poco tiempo desde el último aceptado): el siguiente fix aceptado los
+    reemplaza. Como máximo cada MAX_SILENCE_S se acepta uno igualmente, para
+    mantener la presencia (last_update) al día. También calcula el intervalo
+    de envío recomendado según la velocidad del miembro y el tamaño del convoy.
+    """
+
+    MIN_DISTANCE_M = 15.0       # Desplazamiento que siempre se acepta
+    MIN_HEADING_DEG = 30.0      # Giro que se acepta aunque el desplazamiento sea corto
+    MIN_TURN_DISTANCE_M = 5.0   # ...siempre que supere este desplazamiento
+    MAX_SILENCE_S = 20.0        # Heartbeat: aceptar al menos cada N segundos
+
+    TARGET_SPACING_M = 25.0     # Distancia deseada entre fixes enviados
+    MIN_INTERVAL_S = 1.0
+    MAX_INTERVAL_S = 15.0
+
+    def __init__(self):
+        self._members: Dict[Tuple[str, str], _MemberState] = {}
+
+    @staticmethod
+    def _distance_and_bearing(lat1: float, lng1: float, lat2: float, lng2: float) -> Tuple[float, float]:
+        """Distancia (m, aproximación equirectangular) y rumbo (grados)"""
+        x = math.radians(lng2 - lng1) * math.cos(math.radians((lat1 + lat2) / 2))
+        y = math.radians(lat2 - lat1)
+        distance = 6371000.0 * math.hypot(x, y)
+        bearing = (math.degrees(math.atan2(x, y)) + 360.0) % 360.0
+        return distance, bearing
+
+    def recommended_interval_ms(self, speed: float, convoy_size: int) -> int:
+        """Intervalo según velocidad (más rápido = más seguido) y tamaño del convoy"""
+        interval = self.TARGET_SPACING_M / max(speed, 0.5)
+        # Convoyes grandes: cada fix se reenvía a más sockets, espaciar más
+        interval *= 1.0 + 0.25 * math.log2(max(convoy_size, 2) / 2)
+        interval = min(max(interval, self.MIN_INTERVAL_S), self.MAX_INTERVAL_S)
+        return int(interval * 1000)
+
+    def accept(self, convoy_id: str, user_id: str, location: LatLng) -> bool:
+        """Decidir si el fix aporta lo suficiente como para aplicarlo"""
+        now = time.monotonic()
+        key = (convoy_id, user_id)
+        state = self._members.get(key)
+
+        if state is None:
+            self._members[key] = _MemberState(location.lat, location.lng, now)
+            location_updates.inc(result="accepted")
+            return True
+
+        distance, bearing = self._distance_and_bearing(state.lat, state.lng, location.lat, location.lng)
+        elapsed = now - state.ts
+
+        turned = (
+            state.heading is not None
+            and distance >= self.MIN_TURN_DISTANCE_M
+            and abs((bearing - state.heading + 180.0) % 360.0 - 180.0) >= self.MIN_HEADING_DEG
+        )
+        accepted = (
+            distance >= self.MIN_DISTANCE_M
+            or turned
+            or elapsed >= self.MAX_SILENCE_S
+        )
+
+        if accepted:
+            if elapsed > 0:
+                state.speed = distance / elapsed
+            if distance >= self.MIN_TURN_DISTANCE_M:
+                state.heading = bearing
+            state.lat, state.lng, state.ts = location.lat, location.lng, now
+            location_updates.inc(result="accepted")
+        else:
+            location_updates.inc(result="dropped")
+        return accepted
+
+    def next_update_ms(self, convoy_id: str, user_id: str, convoy_size: int) -> int:
+        """Intervalo recomendado para el próximo envío de este miembro"""
+        state = self._members.get((convoy_id, user_id))
+        return self.recommended_interval_ms(state.speed if state else 0.0, convoy_size)
+
+    def check(self, convoy_id: str, user_id: str, location: LatLng, convoy_size: int) -> GateDecision:
+        """accept() + next_update_ms() cuando ya se conoce el tamaño del convoy"""
+        accepted = self.accept(convoy_id, user_id, location)
+        return GateDecision(accepted, self.next_update_ms(convoy_id, user_id, convoy_size))
+
+    def forget(self, convoy_id: str, user_id: str):
+        self._members.pop((convoy_id, user_id), None)
+
+    def prune(self, max_age_s: float):
+        """Olvidar miembros sin fixes aceptados en `max_age_s` segundos"""
+        cutoff = time.monotonic() - max_age_s
+        for key in [key for key, state in self._members.items() if state.ts < cutoff]:
+            del self._members[key]
+
+    @staticmethod
+    def stats() -> dict:
+        accepted = location_updates.get(result="accepted")
+        dropped = location_updates.get(result="dropped")
+        total = accepted + dropped
+        return {
+            "accepted": int(accepted),
+            "dropped": int(dropped),
+            "accepted_ratio": accepted / total if total else 1.0,
+        }
+
+
+# Instancia única: el estado del gate debe sobrevivir entre requests
+location_gate = LocationGate()
@@ -0,0 +1,120 @@
+from datetime import datetime
+from typing import Optional
+import numpy as np
+from pymongo import UpdateOne
+from app.database import get_database
+
+
+class RouteStatsService:
+    """
+    Agregados incrementales por ruta frecuente (feature store)
+
+    Por cada (route_hash, franja horaria, fin de semana) se mantienen los
+    momentos del ratio real/estimado (n, Σx, Σx²) con un solo $inc por viaje,
+    así la media y la varianza se leen en O(1) por _id.
+    """
+
+    COLLECTION = "route_stats"
+    HOURS_PER_BUCKET = 3  # 8 franjas por día
+
+    @classmethod
+    def hour_bucket(cls, hour: int) -> int:
+        return (hour % 24) // cls.HOURS_PER_BUCKET
+
+    @classmethod
+    def _key(cls, route_hash: str, hour: int, is_weekend: bool) -> str:
+        return f"{route_hash}:{cls.hour_bucket(hour)}:{int(is_weekend)}"
+
+    @classmethod
+    async def record(cls, route_hash: str, hour: int, is_weekend: bool, ratio: float):
+        """Acumular el ratio de un viaje en sus agregados"""
+        db = get_database()
+        if db is None:
+            return
+
+        await db[cls.COLLECTION].update_one(
+            {"_id": cls._key(route_hash, hour, is_weekend)},
+            {
+                "$inc": {"count": 1, "sum": ratio, "sum_sq": ratio * ratio},
+                "$set": {
+                    "route_hash": route_hash,
+                    "hour_bucket": cls.hour_bucket(hour),
+                    "is_weekend": is_weekend,
+                    "updated_at": datetime.utcnow()
+                }
+            },
+            upsert=True
+        )
+
+    @classmethod
+    async def record_many(
+        cls,
+        route_hashes: np.ndarray,
+        hours: np.ndarray,
+        is_weekend: np.ndarray,
+        ratios: np.ndarray
+    ) -> int:
+        """
+        Acumular muchos viajes a la vez: se agrupan en memoria por clave y se
+        aplica un solo $inc por grupo con bulk_write
+
+        Returns:
+            Cantidad de claves (grupos) actualizadas
+        """
+        db = get_database()
+        if db is None or len(ratios) == 0:
+            return 0
+
+        buckets = (np.asarray(hours) % 24) // cls.HOURS_PER_BUCKET
+        weekend = np.asarray(is_weekend, dtype=bool)
+        keys = np.char.add(
+            np.char.add(np.asarray(route_hashes, dtype=str), ":"),
+            np.char.add(np.char.add(buckets.astype(str), ":"), weekend.astype(int).astype(str))
+        )
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse)
+        sums = np.bincount(inverse, weights=ratios)
+        sums_sq = np.bincount(inverse, weights=ratios * ratios)
+
+        now = datetime.utcnow()
+        first = np.unique(inverse, return_index=True)[1]
+        operations = [
+            UpdateOne(
+                {"_id": str(key)},
+                {
+                    "$inc": {"count": int(counts[i]), "sum": float(sums[i]), "sum_sq": float(sums_sq[i])},
+                    "$set": {
+                        "route_hash": str(route_hashes[first[i]]),
+                        "hour_bucket": int(buckets[first[i]]),
+                        "is_weekend": bool(weekend[first[i]]),
+                        "updated_at": now
+                    }
+                },
+                upsert=True
+            )
+            for i, key in enumerate(unique_keys)
+        ]
+        await db[cls.COLLECTION].bulk_write(operations, ordered=False)
+        return len(operations)
+
+    @classmethod
+    async def get_stats(cls, route_hash: str, hour: int, is_weekend: bool) -> Optional[dict]:
+        """
+        Obtener {count, mean, variance} del ratio real/estimado para la ruta
+        en esa franja, o None si no hay historial
+        """
+        db = get_database()
+        if db is None:
+            return None
+
+        doc = await db[cls.COLLECTION].find_one({"_id": cls._key(route_hash, hour, is_weekend)})
+        if not doc or not doc.get("count"):
+            return None
+
+        return cls._moments(doc["count"], doc["sum"], doc["sum_sq"])
+
+    @staticmethod
+    def _moments(count: int, total: float, total_sq: float) -> dict:
+        mean = total / count
+        variance = max(total_sq / count - mean * mean, 0.0)
+        return {"count": count, "mean": mean, "variance": variance}
@@ -0,0 +1,101 @@
+import asyncio
+import math
+import numpy as np
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from app.config import get_settings
+from app.models.schemas import LatLng, RouteWeatherSample
+from app.services.core.weather_service import WeatherService
+from app.utils import geohash
+
+settings = get_settings()
+
+
+class RouteWeatherService:
+    """
+    Clima a lo largo de la ruta, a la hora estimada de paso
+
+    La ruta se divide en tramos de igual duración (uno cada
+    SAMPLE_INTERVAL_S, máximo MAX_SAMPLES) y se consulta el pronóstico en el
+    punto medio de cada tramo. Los puntos que caen en la misma celda
+    geohash comparten consulta; todas las consultas van en paralelo y pasan
+    por la caché de WeatherService.
+    """
+
+    SAMPLE_INTERVAL_S = 600.0  # Un tramo cada ~10 min de viaje
+    MAX_SAMPLES = 8
+
+    @classmethod
+    def sample_points(
+        cls,
+        coordinates: List[List[float]],
+        duration: float
+    ) -> List[Tuple[float, float, float, float]]:
+        """
+        Puntos de muestreo sobre la geometría (velocidad constante)
+
+        Returns:
+            [(offset_segundos, lat, lng, fracción_del_viaje)]
+        """
+        if len(coordinates) < 2 or duration <= 0:
+            return []
+
+        coords = np.asarray(coordinates, dtype=float)
+        lng, lat = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+        x = np.diff(lng) * np.cos((lat[:-1] + lat[1:]) / 2)
+        y = np.diff(lat)
+        cumulative = np.concatenate([[0.0], np.cumsum(np.hypot(x, y))])
+        if cumulative[-1] == 0:
+            return []
+
+        n = min(max(math.ceil(duration / cls.SAMPLE_INTERVAL_S), 1), cls.MAX_SAMPLES)
+        fractions = (np.arange(n) + 0.5) / n
+        targets = fractions * cumulative[-1]
+        sample_lats = np.interp(targets, cumulative, coords[:, 1])
+        sample_lngs = np.interp(targets, cumulative, coords[:, 0])
+
+        return [
+            (float(fraction * duration), float(sample_lat), float(sample_lng), 1.0 / n)
+            for fraction, sample_lat, sample_lng in zip(fractions, sample_lats, sample_lngs)
+        ]
+
+    @classmethod
+    async def along_route(
+        cls,
+        coordinates: List[List[float]],
+        duration: float,
+        departure: Optional[datetime] = None
+    ) -> List[RouteWeatherSample]:
+        """Pronóstico por tramo a la hora estimada de paso (vacío si no hay datos)"""
+        departure = departure or datetime.now()
+        points = cls.sample_points(coordinates, duration)
+
+        # Una consulta por (celda, paso de pronóstico de 3 h)
+        keys, requests = [], {}
+        for offset, lat, lng, _ in points:
+            at = departure + timedelta(seconds=offset)
+            key = (geohash.encode(lat, lng, settings.weather_geohash_precision), round(at.timestamp() / 10800))
+            keys.append(key)
+            requests.setdefault(key, (lat, lng, at))
+
+        results = await asyncio.gather(
+            *(WeatherService.get_forecast(lat, lng, at) for lat, lng, at in requests.values())
+        )
+        by_key = dict(zip(requests, results))
+
+        samples = []
+        for (offset, lat, lng, fraction), key in zip(points, keys):
+            weather = by_key[key]
+            if weather is not None:
+                samples.append(RouteWeatherSample(
+                    offset_seconds=offset,
+                    location=LatLng(lat=lat, lng=lng),
+                    fraction=fraction,
+                    weather=weather
+                ))
+        return samples
+
+    @staticmethod
+    def segments(samples: List[RouteWeatherSample]) -> List[Tuple[float, str]]:
+        """(fracción, condición) por tramo, para MLService.predict(route_weather=...)"""
+        return [(sample.fraction, sample.weather.condition.value) for sample in samples]
@@ -2,6 +2,7 @@ import httpx
 from typing import Optional, List, Tuple
 from app.config import get_settings
 from app.models.schemas import LatLng
+from app.utils.tracing import traced
 
 settings = get_settings()
 
@@ -10,26 +11,34 @@ class RoutingService:
     """Servicio para obtener rutas usando OSRM"""
     
     @classmethod
+    @traced("osrm")
     async def get_route(
         cls,
         start: LatLng,
-        end: LatLng
+        end: LatLng,
+        annotations: bool = False
     ) -> Optional[dict]:
-        """Obtener ruta entre dos puntos"""
+        """
+        Obtener ruta entre dos puntos
+        
+        Con annotations=True cada leg incluye los ids de nodos OSM y la
+        distancia/duración por segmento (usado por los perfiles de velocidad).
+        """
         try:
             coordinates = f"{start.lng},{start.lat};{end.lng},{end.lat}"
             url = f"{settings.osrm_base_url}/route/v1/driving/{coordinates}"
             
+            params = {
+                "overview": "full",
+                "geometries": "geojson",
+                "steps": "true",
+                "alternatives": "true"  # Obtener rutas alternativas
+            }
+            if annotations:
+                params["annotations"] = "nodes,distance,duration"
+            
             async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    url,
-                    params={
-                        "overview": "full",
-                        "geometries": "geojson",
-                        "steps": "true",
-                        "alternatives": "true"  # Obtener rutas alternativas
-                    }
-                )
+                response = await client.get(url, params=params)
                 response.raise_for_status()
                 data = response.json()
                 
@@ -41,6 +50,68 @@ class RoutingService:
             print(f"Error obteniendo ruta: {e}")
             return None
     
+    @classmethod
+    @traced("osrm_table")
+    async def get_table(
+        cls,
+        sources: List[LatLng],
+        destination: LatLng
+    ) -> Optional[Tuple[List[Optional[float]], List[Optional[float]]]]:
+        """
+        Duración (s) y distancia (m) de varios orígenes a un destino en una
+        sola llamada al servicio /table de OSRM
+        
+        Returns:
+            (duraciones, distancias) alineadas con `sources`; None si falla.
+            Un origen sin ruta queda como None.
+        """
+        try:
+            points = list(sources) + [destination]
+            coordinates = ";".join(f"{p.lng},{p.lat}" for p in points)
+            url = f"{settings.osrm_base_url}/table/v1/driving/{coordinates}"
+            
+            params = {
+                "sources": ";".join(str(i) for i in range(len(sources))),
+                "destinations": str(len(sources)),
+                "annotations": "duration,distance"
+            }
+            
+            async with httpx.AsyncClient() as client:
+                response = await client.get(url, params=params)
+                response.raise_for_status()
+                data = response.json()
+                
+                if data["code"] != "Ok":
+                    return None
+                
+                durations = [row[0] for row in data["durations"]]
+                distances = [row[0] for row in data.get("distances", [[None]] * len(sources))]
+                return durations, distances
+        except Exception as e:
+            print(f"Error obteniendo tabla de tiempos: {e}")
+            return None
+    
+    @staticmethod
+    def route_segments(route: dict) -> Optional[Tuple[List[int], List[float], List[float]]]:
+        """
+        Extraer (nodos, distancias, duraciones) por segmento de una ruta OSRM
+        pedida con annotations=True. Retorna None si no hay anotaciones.
+        """
+        nodes, distances, durations = [], [], []
+        for leg in route.get("legs", []):
+            annotation = leg.get("annotation")
+            if not annotation or not annotation.get("nodes"):
+                return None
+            # Entre legs el último nodo de uno es el primero del siguiente
+            leg_nodes = annotation["nodes"]
+            nodes.extend(leg_nodes if not nodes else leg_nodes[1:])
+            distances.extend(annotation["distance"])
+            durations.extend(annotation["duration"])
+        
+        if len(nodes) != len(distances) + 1:
+            return None
+        return nodes, distances, durations
+    
     @staticmethod
     def points_near_route(
         route_coords: List[List[float]],
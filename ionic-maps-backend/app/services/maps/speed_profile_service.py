@@ -0,0 +1,263 @@
+import io
+import asyncio
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from app.database import get_database
+from app.models.schemas import LatLng
+from app.services.maps.routing_service import RoutingService
+
+
+class SpeedProfileService:
+    """
+    Perfiles históricos de velocidad por segmento de vía (par de nodos OSM)
+
+    Cada viaje guardado se proyecta sobre la ruta OSRM equivalente y el ritmo
+    observado (segundos por metro) se acumula por (segmento, hora de la semana).
+    Los datos viven en arreglos numpy densos indexados por fila de segmento,
+    y se persisten en MongoDB por bloques binarios.
+    """
+
+    COLLECTION = "speed_profiles"
+    HOURS_PER_WEEK = 168
+    CHUNK_ROWS = 1024      # Segmentos por documento persistido (~1 MB)
+    FLUSH_INTERVAL = 60    # Segundos entre escrituras de bloques modificados
+    MIN_SAMPLES = 2        # Observaciones mínimas para confiar en una celda
+
+    _rows: Dict[Tuple[int, int], int] = {}
+    _from_nodes: np.ndarray = np.zeros(0, dtype=np.int64)
+    _to_nodes: np.ndarray = np.zeros(0, dtype=np.int64)
+    _pace_sum: np.ndarray = np.zeros((0, HOURS_PER_WEEK), dtype=np.float32)
+    _count: np.ndarray = np.zeros((0, HOURS_PER_WEEK), dtype=np.uint16)
+    _size: int = 0
+    _dirty_chunks: set = set()
+    _flush_task: Optional[asyncio.Task] = None
+
+    # ============== ALMACENAMIENTO ==============
+
+    @classmethod
+    def _ensure_capacity(cls, needed: int):
+        """Crecer los arreglos (duplicando) para alojar `needed` segmentos"""
+        capacity = len(cls._from_nodes)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, cls.CHUNK_ROWS)
+        grow = new_capacity - capacity
+        cls._from_nodes = np.concatenate([cls._from_nodes, np.zeros(grow, dtype=np.int64)])
+        cls._to_nodes = np.concatenate([cls._to_nodes, np.zeros(grow, dtype=np.int64)])
+        cls._pace_sum = np.vstack([cls._pace_sum, np.zeros((grow, cls.HOURS_PER_WEEK), dtype=np.float32)])
+        cls._count = np.vstack([cls._count, np.zeros((grow, cls.HOURS_PER_WEEK), dtype=np.uint16)])
+
+    @classmethod
+    def _rows_for(cls, nodes: List[int], create: bool) -> np.ndarray:
+        """Obtener las filas de cada segmento (-1 si no existe y create=False)"""
+        rows = np.empty(len(nodes) - 1, dtype=np.int64)
+        for i, key in enumerate(zip(nodes[:-1], nodes[1:])):
+            row = cls._rows.get(key)
+            if row is None and create:
+                row = cls._size
+                cls._ensure_capacity(row + 1)
+                cls._from_nodes[row], cls._to_nodes[row] = key
+                cls._rows[key] = row
+                cls._size += 1
+            rows[i] = -1 if row is None else row
+        return rows
+
+    @staticmethod
+    def hour_of_week(day_of_week: int, hour: int) -> int:
+        return (day_of_week % 7) * 24 + (hour % 24)
+
+    # ============== APRENDIZAJE ==============
+
+    @classmethod
+    def observe(
+        cls,
+        nodes: List[int],
+        distances: List[float],
+        durations: List[float],
+        hour_of_week: int,
+        ratio: float
+    ) -> int:
+        """
+        Acumular una observación por segmento
+
+        Solo conocemos el total del viaje, así que el ratio real/estimado se
+        reparte uniformemente sobre la duración OSRM de cada segmento.
+
+        Returns:
+            Cantidad de segmentos actualizados
+        """
+        distances = np.asarray(distances, dtype=np.float64)
+        durations = np.asarray(durations, dtype=np.float64)
+        valid = distances > 1.0  # Ignorar segmentos degenerados
+        if not valid.any() or ratio <= 0:
+            return 0
+
+        rows = cls._rows_for(nodes, create=True)[valid]
+        pace = (durations[valid] * ratio) / distances[valid]
+
+        np.add.at(cls._pace_sum[:, hour_of_week], rows, pace.astype(np.float32))
+        counts = cls._count[:, hour_of_week]
+        np.add.at(counts, rows, (counts[rows] < np.iinfo(np.uint16).max).astype(np.uint16))
+
+        cls._dirty_chunks.update((rows // cls.CHUNK_ROWS).tolist())
+        return int(len(rows))
+
+    @classmethod
+    async def learn_from_trip(cls, trip: dict) -> int:
+        """Proyectar un viaje guardado sobre OSRM y acumular sus velocidades"""
+        if trip.get("estimated_duration", 0) <= 0:
+            return 0
+
+        route_data = await RoutingService.get_route(
+            LatLng(**trip["start"]), LatLng(**trip["end"]), annotations=True
+        )
+        if not route_data:
+            return 0
+
+        segments = RoutingService.route_segments(route_data["routes"][0])
+        if not segments:
+            return 0
+
+        nodes, distances, durations = segments
+        ratio = trip["actual_duration"] / trip["estimated_duration"]
+        return cls.observe(
+            nodes, distances, durations,
+            cls.hour_of_week(trip["day_of_week"], trip["hour"]),
+            ratio
+        )
+
+    # ============== PREDICCIÓN ==============
+
+    @classmethod
+    def estimate_eta(
+        cls,
+        nodes: List[int],
+        distances: List[float],
+        durations: List[float],
+        hour_of_week: int
+    ) -> Tuple[float, float, float]:
+        """
+        ETA a nivel de segmento para una ruta
+
+        Los segmentos con historial usan su ritmo medio observado en esa hora
+        de la semana; del resto solo se suma su duración de OSRM, por
+        separado, para que el llamador la ajuste (p. ej. con el factor ML).
+
+        Returns:
+            (segundos aprendidos de los segmentos cubiertos,
+             segundos OSRM de los segmentos sin historial,
+             cobertura 0-1 por distancia con historial)
+        """
+        distances = np.asarray(distances, dtype=np.float64)
+        durations = np.asarray(durations, dtype=np.float64)
+        total_distance = distances.sum()
+        if total_distance <= 0:
+            return 0.0, float(durations.sum()), 0.0
+
+        rows = cls._rows_for(nodes, create=False)
+        known = rows >= 0
+        counts = np.zeros(len(rows))
+        pace_sum = np.zeros(len(rows))
+        counts[known] = cls._count[rows[known], hour_of_week]
+        pace_sum[known] = cls._pace_sum[rows[known], hour_of_week]
+
+        covered = counts >= cls.MIN_SAMPLES
+        covered_seconds = (distances[covered] * pace_sum[covered] / counts[covered]).sum()
+        uncovered_seconds = durations[~covered].sum()
+        coverage = distances[covered].sum() / total_distance
+        return float(covered_seconds), float(uncovered_seconds), float(coverage)
+
+    # ============== PERSISTENCIA ==============
+
+    @staticmethod
+    def _to_bytes(array: np.ndarray) -> bytes:
+        buffer = io.BytesIO()
+        np.save(buffer, array, allow_pickle=False)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _from_bytes(data: bytes) -> np.ndarray:
+        return np.load(io.BytesIO(data), allow_pickle=False)
+
+    @classmethod
+    async def load(cls):
+        """Cargar los perfiles desde MongoDB"""
+        db = get_database()
+        if db is None:
+            return
+
+        try:
+            cursor = db[cls.COLLECTION].find().sort("chunk", 1)
+            async for doc in cursor:
+                from_nodes = cls._from_bytes(doc["from_nodes"])
+                to_nodes = cls._from_bytes(doc["to_nodes"])
+                start = doc["chunk"] * cls.CHUNK_ROWS
+                end = start + len(from_nodes)
+
+                cls._ensure_capacity(end)
+                cls._from_nodes[start:end] = from_nodes
+                cls._to_nodes[start:end] = to_nodes
+                cls._pace_sum[start:end] = cls._from_bytes(doc["pace_sum"])
+                cls._count[start:end] = cls._from_bytes(doc["count"])
+                cls._size = max(cls._size, end)
+
+            cls._rows = {
+                (int(a), int(b)): row
+                for row, (a, b) in enumerate(zip(cls._from_nodes[:cls._size], cls._to_nodes[:cls._size]))
+            }
+            if cls._size:
+                print(f"✅ Perfiles de velocidad cargados: {cls._size} segmentos")
+        except Exception as e:
+            print(f"❌ Error cargando perfiles de velocidad: {e}")
+
+    @classmethod
+    async def flush(cls):
+        """Persistir solo los bloques modificados desde la última escritura"""
+        db = get_database()
+        if db is None or not cls._dirty_chunks:
+            return
+
+        chunks, cls._dirty_chunks = sorted(cls._dirty_chunks), set()
+        for i, chunk in enumerate(chunks):
+            start = chunk * cls.CHUNK_ROWS
+            end = min(start + cls.CHUNK_ROWS, cls._size)
+            try:
+                await db[cls.COLLECTION].update_one(
+                    {"chunk": chunk},
+                    {"$set": {
+                        "from_nodes": cls._to_bytes(cls._from_nodes[start:end]),
+                        "to_nodes": cls._to_bytes(cls._to_nodes[start:end]),
+                        "pace_sum": cls._to_bytes(cls._pace_sum[start:end]),
+                        "count": cls._to_bytes(cls._count[start:end]),
+                        "updated_at": datetime.utcnow()
+                    }},
+                    upsert=True
+                )
+            except BaseException:
+                # Reintentar en el próximo flush los bloques que no se escribieron
+                cls._dirty_chunks.update(chunks[i:])
+                raise
+
+    @classmethod
+    async def _flush_loop(cls):
+        while True:
+            await asyncio.sleep(cls.FLUSH_INTERVAL)
+            try:
+                await cls.flush()
+            except Exception as e:
+                print(f"⚠️ Error persistiendo perfiles de velocidad: {e}")
+
+    @classmethod
+    def start(cls):
+        """Iniciar la persistencia periódica en segundo plano"""
+        if cls._flush_task is None:
+            cls._flush_task = asyncio.create_task(cls._flush_loop())
+
+    @classmethod
+    async def stop(cls):
+        """Detener la tarea de fondo y hacer una última escritura"""
+        if cls._flush_task:
+            cls._flush_task.cancel()
+            cls._flush_task = None
+        await cls.flush()
@@ -1,10 +1,16 @@
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import List, Optional, Set, Tuple
 import hashlib
+import asyncio
+import numpy as np
 from bson import ObjectId
+from pymongo.errors import BulkWriteError
 from app.database import get_database
-from app.models.schemas import Trip, TripCreate, LatLng
-from app.utils.holidays import is_holiday_from_datetime
+from app.models.schemas import Trip, TripCreate, TripBulkRow, LatLng
+from app.utils.holidays import is_holiday_from_datetime, holiday_mask
+from app.services.maps.speed_profile_service import SpeedProfileService
+from app.services.maps.route_stats_service import RouteStatsService
+from app.services.core.autocomplete_service import AutocompleteService
 
 
 class TripService:
@@ -12,6 +18,17 @@ class TripService:
     
     COLLECTION = "trips"
     
+    # Solo los campos del modelo Trip (GET /trips/ devuelve los documentos crudos)
+    PROJECTION = {
+        "start": 1, "end": 1, "start_name": 1, "end_name": 1, "distance": 1,
+        "estimated_duration": 1, "actual_duration": 1, "hour": 1, "day_of_week": 1,
+        "is_weekend": 1, "is_holiday": 1, "weather_condition": 1, "temperature": 1,
+        "had_incidents": 1, "incident_types": 1, "created_at": 1
+    }
+    
+    # Referencias a las tareas en segundo plano (asyncio solo guarda referencias débiles)
+    _background_tasks: Set[asyncio.Task] = set()
+    
     @classmethod
     async def save_trip(cls, trip: TripCreate) -> Trip:
         """Guardar un viaje completado"""
@@ -22,8 +39,7 @@ class TripService:
         day_of_week = trip.day_of_week if trip.day_of_week is not None else now.weekday()
         
         # Generar hash de ruta para identificar rutas frecuentes
-        route_key = f"{trip.start.lat:.4f},{trip.start.lng:.4f}-{trip.end.lat:.4f},{trip.end.lng:.4f}"
-        route_hash = hashlib.md5(route_key.encode()).hexdigest()[:12]
+        route_hash = cls.route_hash(trip.start, trip.end)
         
         doc = {
             "start": trip.start.model_dump(),
@@ -54,14 +70,137 @@ class TripService:
         result = await db[cls.COLLECTION].insert_one(doc)
         doc["_id"] = str(result.inserted_id)
         
+        # Actualizar agregados de la ruta (feature store)
+        if trip.estimated_duration > 0:
+            await RouteStatsService.record(
+                route_hash, hour, doc["is_weekend"],
+                trip.actual_duration / trip.estimated_duration
+            )
+        
+        AutocompleteService.on_trip_saved(trip.end_name, doc["end"])
+        
+        # Alimentar los perfiles de velocidad sin bloquear la respuesta
+        task = asyncio.create_task(cls._learn_speed_profile(doc))
+        cls._background_tasks.add(task)
+        task.add_done_callback(cls._background_tasks.discard)
+        
         return Trip(**doc)
     
+    @classmethod
+    async def save_trips_bulk(cls, rows: List[Tuple[int, TripBulkRow]]) -> Tuple[int, List[dict]]:
+        """
+        Guardar un lote de viajes ya validados (carga masiva)
+        
+        Las features derivadas se calculan en bloque con numpy y el lote se
+        escribe con un solo insert_many(ordered=False): una fila rechazada no
+        detiene al resto.
+        
+        Args:
+            rows: Lista de (número de línea, fila validada)
+        
+        Returns:
+            (cantidad insertada, errores [{"line": n, "error": "..."}])
+        """
+        if not rows:
+            return 0, []
+        
+        db = get_database()
+        lines = [line for line, _ in rows]
+        trips = [trip for _, trip in rows]
+        
+        now = datetime.utcnow()
+        created_at = np.array(
+            [cls._naive_utc(trip.created_at) if trip.created_at else now for trip in trips],
+            dtype="datetime64[ms]"
+        )
+        
+        # Features de calendario (vectorizadas)
+        given_hour = np.array([-1 if t.hour is None else t.hour for t in trips])
+        given_dow = np.array([-1 if t.day_of_week is None else t.day_of_week for t in trips])
+        hours = np.where(given_hour >= 0, given_hour, created_at.astype("datetime64[h]").astype(np.int64) % 24)
+        days_of_week = np.where(given_dow >= 0, given_dow, (created_at.astype("datetime64[D]").astype(np.int64) + 3) % 7)
+        is_weekend = days_of_week >= 5
+        is_holiday = holiday_mask(created_at)
+        
+        # Ratio real/estimado e intensidad de tráfico
+        estimated = np.array([t.estimated_duration for t in trips], dtype=float)
+        actual = np.array([t.actual_duration for t in trips], dtype=float)
+        ratios = np.divide(actual, estimated, out=np.ones_like(actual), where=estimated > 0)
+        given_intensity = np.array([t.traffic_intensity or 0.0 for t in trips], dtype=float)
+        traffic_intensity = np.where(given_intensity != 0, given_intensity, ratios)
+        
+        route_hashes = np.array([cls.route_hash(t.start, t.end) for t in trips])
+        created_list = created_at.astype(datetime).tolist()
+        
+        docs = [
+            {
+                "start": trip.start.model_dump(),
+                "end": trip.end.model_dump(),
+                "start_name": trip.start_name,
+                "end_name": trip.end_name,
+                "distance": trip.distance,
+                "estimated_duration": trip.estimated_duration,
+                "actual_duration": trip.actual_duration,
+                "hour": int(hours[i]),
+                "day_of_week": int(days_of_week[i]),
+                "is_weekend": bool(is_weekend[i]),
+                "is_holiday": bool(is_holiday[i]),
+                "weather_condition": trip.weather_condition,
+                "temperature": trip.temperature,
+                "traffic_intensity": float(traffic_intensity[i]),
+                "had_incidents": trip.had_incidents,
+                "incident_types": trip.incident_types,
+                "route_hash": str(route_hashes[i]),
+                "created_at": created_list[i]
+            }
+            for i, trip in enumerate(trips)
+        ]
+        
+        errors = []
+        failed = np.zeros(len(docs), dtype=bool)
+        try:
+            await db[cls.COLLECTION].insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                index = write_error["index"]
+                failed[index] = True
+                errors.append({"line": lines[index], "error": write_error.get("errmsg", "Error de escritura")})
+        
+        # Agregados de ruta solo para las filas efectivamente insertadas
+        ok = ~failed & (estimated > 0)
+        await RouteStatsService.record_many(route_hashes[ok], hours[ok], is_weekend[ok], ratios[ok])
+        
+        for i in np.flatnonzero(~failed):
+            AutocompleteService.on_trip_saved(docs[i]["end_name"], docs[i]["end"])
+        
+        return int((~failed).sum()), errors
+    
+    @staticmethod
+    def _naive_utc(dt: datetime) -> datetime:
+        """Normalizar a UTC sin tzinfo (como se guarda created_at)"""
+        if dt.tzinfo is None:
+            return dt
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    @staticmethod
+    async def _learn_speed_profile(doc: dict):
+        try:
+            await SpeedProfileService.learn_from_trip(doc)
+        except Exception as e:
+            print(f"⚠️ Error actualizando perfiles de velocidad: {e}")
+    
+    @staticmethod
+    def route_hash(start: LatLng, end: LatLng) -> str:
+        """Hash corto de origen/destino (redondeados a ~10 m) para agrupar rutas"""
+        route_key = f"{start.lat:.4f},{start.lng:.4f}-{end.lat:.4f},{end.lng:.4f}"
+        return hashlib.md5(route_key.encode()).hexdigest()[:12]
+    
     @classmethod
     async def get_all_trips(cls, limit: int = 1000) -> List[dict]:
-        """Obtener todos los viajes para entrenamiento"""
+        """Obtener los viajes más recientes (campos de Trip, sin validar)"""
         db = get_database()
         
-        cursor = db[cls.COLLECTION].find().sort("created_at", -1).limit(limit)
+        cursor = db[cls.COLLECTION].find({}, cls.PROJECTION).sort("created_at", -1).limit(limit)
         trips = []
         
         async for doc in cursor:
@@ -70,6 +209,30 @@ class TripService:
         
         return trips
     
+    @classmethod
+    async def get_training_trips(cls, limit: int = 5000) -> List[dict]:
+        """
+        Obtener solo los campos que usa el entrenamiento (proyección + lotes
+        grandes) para poder cargar cientos de miles de viajes
+        """
+        db = get_database()
+        
+        projection = {
+            "_id": 0, "distance": 1, "estimated_duration": 1, "actual_duration": 1,
+            "hour": 1, "day_of_week": 1, "is_weekend": 1, "is_holiday": 1,
+            "had_incidents": 1, "weather_condition": 1, "temperature": 1, "created_at": 1
+        }
+        cursor = db[cls.COLLECTION].find({}, projection, batch_size=10000).sort("created_at", -1).limit(limit)
+        return await cursor.to_list(length=limit)
+    
+    @classmethod
+    async def trip_exists(cls, trip_id: str) -> bool:
+        """Verificar que un viaje existe (id inválido = no existe)"""
+        if not ObjectId.is_valid(trip_id):
+            return False
+        db = get_database()
+        return await db[cls.COLLECTION].count_documents({"_id": ObjectId(trip_id)}, limit=1) > 0
+    
     @classmethod
     async def get_trips_count(cls) -> int:
         """Obtener cantidad de viajes registrados"""
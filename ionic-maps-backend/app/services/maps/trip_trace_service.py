@@ -0,0 +1,120 @@
+import numpy as np
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+from bson import Binary
+from app.database import get_database
+from app.utils.trace_codec import encode_trace, decode_trace
+
+
+class TripTraceService:
+    """
+    Trazas GPS de los viajes en una colección time-series de MongoDB
+
+    Cada documento es un bloque de hasta CHUNK_POINTS puntos codificados con
+    deltas + varint (ver app.utils.trace_codec). Sirve para derivar
+    velocidades por segmento o repetir el map matching más adelante.
+    """
+
+    COLLECTION = "trip_traces"
+    CHUNK_POINTS = 600  # ~10 min a 1 Hz por documento
+
+    @classmethod
+    async def ensure_collection(cls):
+        """Crear la colección time-series si aún no existe"""
+        db = get_database()
+        if db is None:
+            return
+
+        try:
+            if cls.COLLECTION not in await db.list_collection_names():
+                await db.create_collection(
+                    cls.COLLECTION,
+                    timeseries={"timeField": "ts", "metaField": "trip_id", "granularity": "seconds"}
+                )
+                print(f"✅ Colección time-series '{cls.COLLECTION}' creada")
+        except Exception as e:
+            print(f"⚠️ No se pudo crear la colección de trazas: {e}")
+
+    @classmethod
+    async def save_trace(cls, trip_id: str, points: List[List[float]]) -> dict:
+        """
+        Guardar (o ampliar) la traza de un viaje
+
+        Args:
+            points: Lista de [lat, lng, timestamp_unix_segundos]
+
+        Returns:
+            {"points": n, "chunks": k, "bytes": tamaño codificado}
+        """
+        db = get_database()
+
+        data = np.asarray(points, dtype=np.float64)
+        data = data[np.argsort(data[:, 2], kind="stable")]
+
+        docs = []
+        for start in range(0, len(data), cls.CHUNK_POINTS):
+            block = data[start:start + cls.CHUNK_POINTS]
+            encoded = encode_trace(block[:, 2], block[:, 0], block[:, 1])
+            docs.append({
+                "ts": datetime.utcfromtimestamp(block[0, 2]),
+                "trip_id": trip_id,
+                "n": len(block),
+                "data": Binary(encoded),
+            })
+
+        if docs:
+            await db[cls.COLLECTION].insert_many(docs)
+
+        return {
+            "points": len(data),
+            "chunks": len(docs),
+            "bytes": sum(len(doc["data"]) for doc in docs),
+        }
+
+    @classmethod
+    async def iter_trace(cls, trip_id: str) -> AsyncIterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Decodificar la traza de un viaje bloque a bloque
+
+        Yields:
+            (timestamps, lats, lngs) como arreglos numpy por bloque
+        """
+        db = get_database()
+        cursor = db[cls.COLLECTION].find({"trip_id": trip_id}, {"data": 1}).sort("ts", 1)
+        async for doc in cursor:
+            yield decode_trace(bytes(doc["data"]))
+
+    @classmethod
+    async def iter_traces(
+        cls,
+        since: Optional[datetime] = None,
+        batch_size: int = 500
+    ) -> AsyncIterator[Tuple[str, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Recorrer las trazas de todos los viajes para analítica/entrenamiento
+        sin cargarlas completas en memoria
+
+        Yields:
+            (trip_id, timestamps, lats, lngs) por bloque, ordenado por viaje y tiempo
+        """
+        db = get_database()
+        query = {"ts": {"$gte": since}} if since else {}
+        cursor = db[cls.COLLECTION].find(query, {"trip_id": 1, "data": 1}, batch_size=batch_size) \
+            .sort([("trip_id", 1), ("ts", 1)])
+        async for doc in cursor:
+            yield (doc["trip_id"], *decode_trace(bytes(doc["data"])))
+
+    @classmethod
+    async def get_trace(cls, trip_id: str) -> Optional[dict]:
+        """Traza completa de un viaje como columnas (para el cliente)"""
+        chunks = [chunk async for chunk in cls.iter_trace(trip_id)]
+        if not chunks:
+            return None
+
+        timestamps, lats, lngs = (np.concatenate(column) for column in zip(*chunks))
+        return {
+            "trip_id": trip_id,
+            "timestamps": timestamps.tolist(),
+            "lats": lats.tolist(),
+            "lngs": lngs.tolist(),
+        }
@@ -5,6 +5,7 @@ import httpx
 from app.services.translator.php_translator import PHPTranslator
 from app.services.translator.js_to_ts_translator import JSToTSConverter
 from app.services.translator.verso_cache import VersoCache
+from app.utils.tracing import span
 from app.config import get_settings, GEMINI_MODELS, COHERE_MODELS
 
 RUST_CORE_URL = os.getenv("RUST_CORE_URL", "http://localhost:8002")
@@ -103,15 +104,16 @@ class HybridTranslator:
                 for model in GEMINI_MODELS:
                     try:
                         logger.info("rust call: gemini %s %s -> %s", model, source_lang, target_lang)
-                        resp = await client.post(f"{RUST_CORE_URL}/translate", json={
-                            "source": source,
-                            "source_lang": source_lang,
-                            "target_lang": target_lang,
-                            "source_version": source_version or None,
-                            "target_version": target_version or None,
-                            "gemini_key": gemini_key,
-                            "gemini_model": model,
-                        }, timeout=120.0)
+                        with span("llm"):
+                            resp = await client.post(f"{RUST_CORE_URL}/translate", json={
+                                "source": source,
+                                "source_lang": source_lang,
+                                "target_lang": target_lang,
+                                "source_version": source_version or None,
+                                "target_version": target_version or None,
+                                "gemini_key": gemini_key,
+                                "gemini_model": model,
+                            }, timeout=120.0)
                         if resp.is_success:
                             data = resp.json()
                             if data.get("result"):
@@ -126,15 +128,16 @@ class HybridTranslator:
                 for model in COHERE_MODELS:
                     try:
                         logger.info("rust call: cohere %s %s -> %s", model, source_lang, target_lang)
-                        resp = await client.post(f"{RUST_CORE_URL}/translate", json={
-                            "source": source,
-                            "source_lang": source_lang,
-                            "target_lang": target_lang,
-                            "source_version": source_version or None,
-                            "target_version": target_version or None,
-                            "cohere_key": cohere_key,
-                            "cohere_model": model,
-                        }, timeout=120.0)
+                        with span("llm"):
+                            resp = await client.post(f"{RUST_CORE_URL}/translate", json={
+                                "source": source,
+                                "source_lang": source_lang,
+                                "target_lang": target_lang,
+                                "source_version": source_version or None,
+                                "target_version": target_version or None,
+                                "cohere_key": cohere_key,
+                                "cohere_model": model,
+                            }, timeout=120.0)
                         if resp.is_success:
                             data = resp.json()
                             if data.get("result"):
@@ -0,0 +1,50 @@
+"""
+Subsistemas de la API y sus fronteras de importación
+
+Cada subsistema agrupa routers cuyos imports arrastran dependencias
+pesadas que el resto no necesita:
+
+- maps: rutas, clima, incidencias, viajes, convoy, búsqueda (sklearn/pandas)
+- kitchy: facturas, negocio, compras, mercado (google-genai, cohere, EasyOCR/torch, cv2)
+- muelle: itinerarios logísticos (playwright, EasyOCR, google-genai)
+- translator: traductor de repositorios y scraper de docs (tree-sitter, playwright)
+
+ENABLED_SUBSYSTEMS decide cuáles se montan. Los routers se importan aquí,
+solo si su subsistema está activo, así que ningún módulo común (main,
+utils, core) debe importar servicios de kitchy, muelle o translator.
+
+    python -X importtime -c "import app.main" 2> importtime.log
+    python benchmark_imports.py     # resumen por subsistema
+"""
+import importlib
+from typing import Dict, List
+from fastapi import FastAPI
+from app.config import get_settings
+
+SUBSYSTEM_ROUTERS: Dict[str, List[str]] = {
+    "maps": ["trips", "weather", "routes", "incidents", "favorites", "settings", "convoy", "search", "agent"],
+    "kitchy": ["kitchy"],
+    "muelle": ["muelle"],
+    "translator": ["translator", "scraper"],
+}
+
+
+def enabled_subsystems() -> List[str]:
+    """Subsistemas de ENABLED_SUBSYSTEMS, en el orden de SUBSYSTEM_ROUTERS"""
+    requested = {name.strip().lower() for name in get_settings().enabled_subsystems.split(",") if name.strip()}
+    unknown = requested - SUBSYSTEM_ROUTERS.keys()
+    if unknown:
+        raise ValueError(
+            f"ENABLED_SUBSYSTEMS contiene subsistemas desconocidos: {', '.join(sorted(unknown))} "
+            f"(válidos: {', '.join(SUBSYSTEM_ROUTERS)})"
+        )
+    return [name for name in SUBSYSTEM_ROUTERS if name in requested]
+
+
+def include_routers(app: FastAPI, subsystems: List[str]):
+    """Importar y montar los routers de los subsistemas indicados"""
+    for subsystem in subsystems:
+        for module_name in SUBSYSTEM_ROUTERS[subsystem]:
+            module = importlib.import_module(f"app.routers.{module_name}")
+            app.include_router(module.router)
+    print(f"🧩 Subsistemas activos: {', '.join(subsystems) or 'ninguno'}")
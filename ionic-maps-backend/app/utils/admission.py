@@ -0,0 +1,159 @@
+"""
+Control de admisión para endpoints caros
+
+    @router.post("/logistics", dependencies=[Depends(browser_lane.slot)])
+
+Cada clase de endpoint (carril) admite como mucho `max_concurrent`
+requests a la vez y deja esperar a otros `max_queue` en orden de llegada.
+Con la cola llena, o tras esperar más de ADMISSION_MAX_WAIT segundos, el
+request se rechaza con 429 y un Retry-After estimado a partir de lo que
+tardan los requests de ese carril.
+
+Los endpoints de navegación (rutas, búsqueda, clima, incidencias, convoy)
+son el carril prioritario: no pasan por ningún limitador, así que nunca
+esperan detrás de un Chrome, un OCR o una traducción de repositorio.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, List
+from fastapi import HTTPException
+from app.config import get_settings
+from app.utils import metrics
+from app.utils.tracing import span
+
+settings = get_settings()
+
+queue_seconds = metrics.histogram(
+    "admission_queue_seconds",
+    "Tiempo de espera en cola antes de entrar a un carril limitado",
+    ["lane"]
+)
+rejected = metrics.counter(
+    "admission_rejected_total",
+    "Requests rechazados con 429, por carril y motivo (cola llena o espera agotada)",
+    ["lane", "reason"]
+)
+
+
+class AdmissionLimiter:
+    _registry: List["AdmissionLimiter"] = []
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, expected_seconds: float):
+        """
+        Args:
+            expected_seconds: duración típica de un request del carril; es la
+                estimación inicial del Retry-After hasta tener mediciones
+        """
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._avg_seconds = expected_seconds  # Media móvil exponencial
+        AdmissionLimiter._registry.append(self)
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Segundos hasta que probablemente haya hueco para un request más"""
+        rounds = (self.queued + 1) / self.max_concurrent
+        return min(300, max(1, math.ceil(self._avg_seconds * rounds)))
+
+    def _reject(self, reason: str, message: str):
+        rejected.inc(lane=self.name, reason=reason)
+        retry = self.retry_after()
+        raise HTTPException(
+            status_code=429,
+            detail=f"{message}; reintenta en {retry} s",
+            headers={"Retry-After": str(retry)}
+        )
+
+    async def acquire(self):
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            queue_seconds.observe(0.0, lane=self.name)
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self._reject("queue_full", f"Hay demasiadas solicitudes de '{self.name}' en curso")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            with span("queue"):
+                # shield: al agotar la espera no se cancela el future, así se
+                # puede saber si el hueco llegó justo en ese momento
+                await asyncio.wait_for(asyncio.shield(waiter), settings.admission_max_wait)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # Nos cedieron el hueco mientras nos rendíamos
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject("timeout", f"La cola de '{self.name}' no avanzó a tiempo")
+            raise
+        finally:
+            queue_seconds.observe(time.perf_counter() - start, lane=self.name)
+
+    def release(self):
+        # El hueco pasa directamente al siguiente en cola (active no cambia)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    async def slot(self):
+        """Dependencia de FastAPI: ocupa un hueco del carril durante el request"""
+        await self.acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.perf_counter() - start)
+            self.release()
+
+    @classmethod
+    def stats(cls) -> Dict[str, dict]:
+        return {
+            lane.name: {
+                "active": lane.active,
+                "queued": lane.queued,
+                "max_concurrent": lane.max_concurrent,
+                "max_queue": lane.max_queue,
+                "avg_seconds": round(lane._avg_seconds, 2),
+            }
+            for lane in cls._registry
+        }
+
+
+# Carriles de los endpoints caros
+browser_lane = AdmissionLimiter(  # /agent/logistics: un Chrome por naviera
+    "browser", settings.admission_browser_concurrency, settings.admission_browser_queue, expected_seconds=60
+)
+vision_lane = AdmissionLimiter(  # /agent/invoice, /agent/emergency-ocr, /agent/market/parse, /agent/logistics/parse-doc
+    "vision", settings.admission_vision_concurrency, settings.admission_vision_queue, expected_seconds=10
+)
+translate_lane = AdmissionLimiter(  # /api/translator/translate-repo: cientos de archivos por request
+    "translate", settings.admission_translate_concurrency, settings.admission_translate_queue, expected_seconds=60
+)
+
+metrics.gauge(
+    "admission_active",
+    "Requests en ejecución dentro de cada carril limitado",
+    ["lane"],
+    callback=lambda: {(lane.name,): lane.active for lane in AdmissionLimiter._registry}
+)
+metrics.gauge(
+    "admission_queued",
+    "Requests esperando en la cola de cada carril limitado",
+    ["lane"],
+    callback=lambda: {(lane.name,): lane.queued for lane in AdmissionLimiter._registry}
+)
@@ -0,0 +1,133 @@
+"""
+Caché read-through para colecciones que casi no cambian
+
+    favorites_cache = CachedCollection("favorites", load_favorites, ttl=60, collection="favorites")
+    favs = await favorites_cache.get()         # Una clave (colección entera)
+    source = await sources_cache.get("gas")    # O una entrada por clave
+
+El loader recibe la clave y devuelve el valor (documento, lista, modelo o
+lo que lea de cualquier fuente, p. ej. un JSON en disco). Las entradas
+caducan por TTL y se invalidan:
+- Por write-through: quien escribe llama a invalidate(key) / clear().
+- Por change streams: si se indica `collection`, start_watchers() escucha
+  los cambios de MongoDB (solo en replica sets; en un mongod standalone
+  quedan el TTL y el write-through).
+
+El porcentaje de aciertos de cada caché se expone en /metrics.
+"""
+import asyncio
+import sys
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+from pymongo.errors import OperationFailure
+from app.database import get_database
+from app.utils import metrics
+from app.utils.ttl_cache import TTLCache
+
+T = TypeVar("T")
+
+
+class CachedCollection(Generic[T]):
+    _registry: List["CachedCollection"] = []
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[Optional[Hashable]], Awaitable[T]],
+        ttl: float,
+        maxsize: int = 256,
+        collection: Optional[str] = None,
+        database: Optional[str] = None,
+        key_field: Optional[str] = None
+    ):
+        """
+        Args:
+            collection/database: colección a vigilar con change streams
+            key_field: campo del documento que es la clave de la caché; sin
+                él, cualquier cambio en la colección vacía la caché entera
+        """
+        self.name = name
+        self.loader = loader
+        self.cache = TTLCache(name, ttl=ttl, maxsize=maxsize)
+        self.collection = collection
+        self.database = database
+        self.key_field = key_field
+        self._watcher: Optional[asyncio.Task] = None
+        CachedCollection._registry.append(self)
+
+    async def get(self, key: Optional[Hashable] = None) -> T:
+        return await self.cache.get_or_load(key, lambda: self.loader(key))
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        self.cache.invalidate(key)
+
+    def clear(self):
+        self.cache.clear()
+
+    def hit_ratio(self) -> float:
+        return self.cache.hit_ratio()
+
+    # ============== CHANGE STREAMS ==============
+
+    def _on_change(self, change: dict):
+        document = change.get("fullDocument") or {}
+        if self.key_field and self.key_field in document:
+            self.invalidate(document[self.key_field])
+        else:
+            # Borrados o caché de colección entera: no sabemos qué clave era
+            self.clear()
+
+    async def _watch(self):
+        while True:
+            db = get_database(self.database)
+            if db is None:
+                return
+            try:
+                async with db[self.collection].watch(full_document="updateLookup") as stream:
+                    # Lo que cambió antes de abrir el stream pudo quedar en caché
+                    self.clear()
+                    async for change in stream:
+                        self._on_change(change)
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                print(f"ℹ️ Caché '{self.name}' sin change streams ({e.code}): solo TTL y write-through", file=sys.stderr)
+                return
+            except Exception as e:
+                print(f"⚠️ Change stream de '{self.name}' interrumpido: {e}", file=sys.stderr)
+                await asyncio.sleep(5)
+
+    @classmethod
+    def start_watchers(cls):
+        for cached in cls._registry:
+            if cached.collection and (cached._watcher is None or cached._watcher.done()):
+                cached._watcher = asyncio.create_task(cached._watch())
+
+    @classmethod
+    async def stop_watchers(cls):
+        for cached in cls._registry:
+            if cached._watcher is not None:
+                cached._watcher.cancel()
+                try:
+                    await cached._watcher
+                except (asyncio.CancelledError, Exception):
+                    pass
+                cached._watcher = None
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, Any]]:
+        return {
+            cached.name: {
+                "entries": len(cached.cache),
+                "hit_ratio": round(cached.hit_ratio(), 4),
+                "watching": cached._watcher is not None and not cached._watcher.done(),
+            }
+            for cached in cls._registry
+        }
+
+
+metrics.gauge(
+    "cached_collection_hit_ratio",
+    "Fracción de lecturas servidas desde caché, por colección cacheada",
+    ["cache"],
+    callback=lambda: {(cached.name,): cached.hit_ratio() for cached in CachedCollection._registry}
+)
@@ -0,0 +1,56 @@
+"""
+Geohash: celdas rectangulares para agrupar coordenadas cercanas
+
+Precisión aproximada de la celda (en el ecuador):
+    4 -> 39 x 19.5 km   5 -> 4.9 x 4.9 km   6 -> 1.2 x 0.6 km   7 -> 153 x 153 m
+"""
+from typing import Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+
+def encode(lat: float, lng: float, precision: int = 5) -> str:
+    """Celda geohash de una coordenada"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+
+    while len(chars) < precision:
+        interval, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+
+    return "".join(chars)
+
+
+def bounds(cell: str) -> Tuple[float, float, float, float]:
+    """(lat_min, lat_max, lng_min, lng_max) de una celda"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in cell:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            interval = lng_range if even else lat_range
+            mid = (interval[0] + interval[1]) / 2
+            if (value >> shift) & 1:
+                interval[0] = mid
+            else:
+                interval[1] = mid
+            even = not even
+    return lat_range[0], lat_range[1], lng_range[0], lng_range[1]
+
+
+def center(cell: str) -> Tuple[float, float]:
+    """(lat, lng) del centro de una celda"""
+    lat_min, lat_max, lng_min, lng_max = bounds(cell)
+    return (lat_min + lat_max) / 2, (lng_min + lng_max) / 2
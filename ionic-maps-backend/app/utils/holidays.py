@@ -3,6 +3,7 @@ Utilidades para detectar días festivos en Panamá
 """
 from datetime import date, datetime
 from typing import Optional
+import numpy as np
 
 # Festivos fijos de Panamá (mes, día)
 FIXED_HOLIDAYS = [
@@ -74,3 +75,28 @@ def is_holiday_from_datetime(dt: Optional[datetime] = None) -> bool:
     if dt is None:
         dt = datetime.now()
     return is_holiday(dt.date())
+
+
+def holiday_mask(dates) -> np.ndarray:
+    """
+    Versión vectorizada de is_holiday para un arreglo de fechas/datetimes.
+    
+    Args:
+        dates: Secuencia de date/datetime o arreglo numpy datetime64
+    
+    Returns:
+        Arreglo booleano con True en las posiciones que son festivo
+    """
+    days = np.asarray(dates, dtype="datetime64[D]")
+    if days.size == 0:
+        return np.zeros(0, dtype=bool)
+    
+    # Construir el calendario de festivos solo para los años del rango
+    years = np.unique(days.astype("datetime64[Y]").astype(int) + 1970)
+    calendar = [
+        np.datetime64(f"{year:04d}-{month:02d}-{day:02d}", "D")
+        for year in years
+        for month, day in FIXED_HOLIDAYS + VARIABLE_HOLIDAYS_BY_YEAR.get(int(year), [])
+    ]
+    
+    return np.isin(days, np.array(calendar, dtype="datetime64[D]"))
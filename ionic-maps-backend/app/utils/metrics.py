@@ -0,0 +1,158 @@
+"""
+Registro mínimo de métricas en formato Prometheus (sin dependencias)
+
+    requests = counter("convoy_location_updates_total", "Updates de ubicación", ["result"])
+    requests.inc(result="accepted")
+
+Se exponen todas en texto plano en GET /metrics. Se actualizan también
+desde hilos (p. ej. los del driver de Mongo): escribir y copiar los
+valores siempre bajo _lock; el formateo se hace fuera.
+"""
+import bisect
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_registry: Dict[str, "_Metric"] = {}
+
+
+def _label_key(labelnames: Sequence[str], labels: dict) -> Tuple[str, ...]:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames: Sequence[str], key: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(labelnames, key)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(self.labelnames, labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(_label_key(self.labelnames, labels), 0.0)
+
+    def render(self) -> List[str]:
+        with _lock:
+            items = sorted(self.values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    """Valor que sube y baja; también acepta una función para leerlo al exportar"""
+    kind = "gauge"
+
+    def __init__(self, *args, callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.callback = callback
+
+    def set(self, value: float, **labels):
+        with _lock:
+            self.values[_label_key(self.labelnames, labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self) -> List[str]:
+        if self.callback:
+            values = dict(self.callback())
+            with _lock:
+                self.values = values
+        return super().render()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[Tuple[str, ...], list] = {}  # key -> [counts por bucket, suma, total]
+
+    def observe(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self, **labels) -> Optional[dict]:
+        with _lock:
+            series = self.series.get(_label_key(self.labelnames, labels))
+            if not series:
+                return None
+            return {"count": series[2], "sum": series[1]}
+
+    def render(self) -> List[str]:
+        with _lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self.series.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+def _register(cls, name: str, *args, **kwargs):
+    with _lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, *args, **kwargs)
+        return metric
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return _register(Counter, name, documentation, labelnames)
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = (), callback=None) -> Gauge:
+    return _register(Gauge, name, documentation, labelnames, callback=callback)
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+
+def render_latest() -> str:
+    """Todas las métricas en formato de exposición de Prometheus"""
+    lines: List[str] = []
+    for metric in list(_registry.values()):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,55 @@
+"""
+Respuesta JSON rápida (clase por defecto de la app)
+
+Usa orjson si está instalado y, si no, json de la librería estándar en
+modo compacto. En ambos casos serializa directamente ObjectId, datetime,
+Enum, arrays de numpy y modelos de Pydantic, así que los endpoints con
+respuestas grandes pueden devolver `FastJSONResponse(dict_crudo)` y
+saltarse jsonable_encoder (que recorre y copia cada valor).
+"""
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any
+import numpy as np
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _default(obj: Any) -> Any:
+    """Tipos que ni orjson ni json saben serializar por sí solos"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Tipo no serializable a JSON: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, separators=(",", ":"), allow_nan=False
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
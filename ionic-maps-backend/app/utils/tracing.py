@@ -0,0 +1,170 @@
+"""
+Trazas ligeras por request (contextvars)
+
+    with span("osrm"):
+        data = await client.get(...)
+
+    @traced("ml")
+    def predict(...): ...
+
+Cada span alimenta el histograma stage_duration_seconds{stage} de
+/metrics, haya o no request en curso (tareas en segundo plano incluidas).
+Dentro de un request, TracingMiddleware acumula los spans y:
+- Añade la cabecera Server-Timing (tiempo total por etapa).
+- Registra http_request_duration_seconds{method, route, status}.
+- Guarda la traza completa en un buffer circular (/debug/traces) para una
+  fracción TRACE_SAMPLE_RATE de los requests.
+
+Las tareas lanzadas con asyncio.gather heredan la traza del request, así
+que sus spans también cuentan (en paralelo: la suma puede superar el total).
+"""
+import asyncio
+import functools
+import itertools
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from app.config import get_settings
+from app.utils import metrics
+
+settings = get_settings()
+
+stage_seconds = metrics.histogram(
+    "stage_duration_seconds",
+    "Duración de cada etapa instrumentada (OSRM, clima, Mongo, ML, LLM, scrapers)",
+    ["stage"]
+)
+request_seconds = metrics.histogram(
+    "http_request_duration_seconds",
+    "Duración de los requests HTTP por método, ruta y estado",
+    ["method", "route", "status"]
+)
+
+
+class Trace:
+    _ids = itertools.count(1)
+
+    def __init__(self, method: str, path: str, sampled: bool):
+        self.id = next(self._ids)
+        self.method = method
+        self.path = path
+        self.sampled = sampled
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.totals: Dict[str, List[float]] = {}  # etapa -> [segundos, llamadas]
+        self.spans: List[dict] = []
+
+    def add(self, stage: str, start: float, seconds: float, error: bool):
+        total = self.totals.setdefault(stage, [0.0, 0])
+        total[0] += seconds
+        total[1] += 1
+        if self.sampled:
+            self.spans.append({
+                "stage": stage,
+                "offset_ms": round((start - self.start) * 1000, 2),
+                "duration_ms": round(seconds * 1000, 2),
+                "error": error,
+            })
+
+    def server_timing(self, total_seconds: float) -> str:
+        parts = [
+            f'{stage};dur={seconds * 1000:.1f};desc="{count}x"'
+            for stage, (seconds, count) in self.totals.items()
+        ]
+        parts.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(parts)
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+sampled_traces: deque = deque(maxlen=settings.trace_buffer_size)
+
+
+@contextmanager
+def span(stage: str):
+    """Medir un bloque (sirve igual en código síncrono y dentro de corrutinas)"""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        stage_seconds.observe(seconds, stage=stage)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add(stage, start, seconds, error)
+
+
+def traced(stage: str):
+    """Decorador: toda la función (síncrona o async) es un span"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def recent_traces(limit: int = 50) -> List[dict]:
+    """Trazas muestreadas, las más recientes primero"""
+    return list(itertools.islice(reversed(sampled_traces), limit))
+
+
+class TracingMiddleware:
+    """Middleware ASGI (sin BaseHTTPMiddleware, que añade una tarea por request)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(scope["method"], scope["path"], random.random() < settings.trace_sample_rate)
+        token = current_trace.set(trace)
+        status: Dict[str, Any] = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                total = time.perf_counter() - trace.start
+                headers.append((b"server-timing", trace.server_timing(total).encode("latin-1")))
+                # Sin esto el navegador oculta Server-Timing a la app (otro origen)
+                headers.append((b"timing-allow-origin", b"*"))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_trace.reset(token)
+            total = time.perf_counter() - trace.start
+            # Plantilla de la ruta (no la URL concreta) para no disparar la cardinalidad
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_seconds.observe(total, method=trace.method, route=route, status=str(status["code"]))
+            if trace.sampled:
+                sampled_traces.append({
+                    "id": trace.id,
+                    "method": trace.method,
+                    "path": trace.path,
+                    "route": route,
+                    "status": status["code"],
+                    "started_at": trace.started_at,
+                    "duration_ms": round(total * 1000, 2),
+                    "spans": trace.spans,
+                })
@@ -0,0 +1,116 @@
+"""
+Caché en memoria con TTL, límite LRU y single-flight
+
+    cache = TTLCache("weather", ttl=600, maxsize=4096)
+    value = await cache.get_or_load(key, lambda: fetch(key))
+
+Si varias corrutinas piden la misma clave ausente a la vez, solo una
+ejecuta `loader`; el resto espera ese mismo resultado. Los errores no se
+cachean. Una carga en curso cuando se llama a invalidate()/clear() no
+guarda su resultado (leyó antes de la escritura que invalidó). Si se
+cancela la corrutina que cargaba (cliente desconectado, wait_for), los que
+esperaban no heredan la cancelación: uno de ellos vuelve a cargar. Aciertos
+y fallos se exponen en /metrics.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from app.utils import metrics
+
+cache_requests = metrics.counter(
+    "cache_requests_total",
+    "Consultas a cachés en memoria, por caché y resultado",
+    ["cache", "result"]
+)
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, name: str, ttl: float, maxsize: int):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expira, valor)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # Generación de las claves con carga en curso; clear() cambia la época
+        self._generations: Dict[Hashable, int] = {}
+        self._epoch = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        if entry[0] < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self._data.pop(key, None)
+        if self._inflight.pop(key, None) is not None:
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self):
+        self._data.clear()
+        self._inflight.clear()
+        self._generations.clear()
+        self._epoch += 1
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            cache_requests.inc(cache=self.name, result="hit")
+            return value
+
+        future = self._inflight.get(key)
+        if future is not None:
+            cache_requests.inc(cache=self.name, result="coalesced")
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # Cancelaron a este llamador
+                # Cancelaron al que cargaba: reintentar (uno cargará, el resto espera)
+                return await self.get_or_load(key, loader)
+
+        cache_requests.inc(cache=self.name, result="miss")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation, epoch = self._generations.get(key, 0), self._epoch
+        try:
+            value = await loader()
+            if self._generations.get(key, 0) == generation and self._epoch == epoch:
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Evitar "exception was never retrieved" si nadie más esperaba
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if key not in self._inflight:
+                self._generations.pop(key, None)
+
+    def hit_ratio(self) -> float:
+        hits = cache_requests.get(cache=self.name, result="hit") + \
+            cache_requests.get(cache=self.name, result="coalesced")
+        total = hits + cache_requests.get(cache=self.name, result="miss")
+        return hits / total if total else 0.0
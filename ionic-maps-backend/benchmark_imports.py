@@ -0,0 +1,89 @@
+"""
+Benchmark de arranque: tiempo de importación y memoria por subsistema
+
+Importa app.main con `python -X importtime` en un proceso nuevo por cada
+combinación de ENABLED_SUBSYSTEMS y resume el informe: tiempo total de
+imports, pico de RSS y los paquetes que más tardan en importarse.
+
+    python benchmark_imports.py [--top 12] [--only maps kitchy]
+
+Una combinación cuyas dependencias no están instaladas se marca como
+fallida (con el módulo que falta) y no detiene el resto.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+from app.subsystems import SUBSYSTEM_ROUTERS
+
+CHILD_CODE = (
+    "import json, resource, time\n"
+    "start = time.perf_counter()\n"
+    "import app.main\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({'wall_s': elapsed, 'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))\n"
+)
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """Tiempo propio (s) de cada paquete raíz a partir del informe de -X importtime"""
+    by_package: Dict[str, float] = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, name = line[len("import time:"):].split("|", 2)
+        by_package[name.strip().split(".")[0]] += int(self_us) / 1e6
+    return by_package
+
+
+def profile(subsystems: List[str]) -> dict:
+    env = {**os.environ, "ENABLED_SUBSYSTEMS": ",".join(subsystems)}
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_CODE],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if out.returncode != 0:
+        errors = [l for l in out.stderr.splitlines() if not l.startswith("import time:")]
+        return {"error": errors[-1] if errors else f"código de salida {out.returncode}"}
+
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["packages"] = parse_importtime(out.stderr)
+    result["import_s"] = sum(result["packages"].values())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de importación y memoria de arranque por subsistema")
+    parser.add_argument("--top", type=int, default=12, help="Paquetes más lentos a mostrar por combinación")
+    parser.add_argument("--only", nargs="+", choices=list(SUBSYSTEM_ROUTERS), help="Medir solo estos subsistemas")
+    args = parser.parse_args()
+
+    names = args.only or list(SUBSYSTEM_ROUTERS)
+    combos = [[name] for name in names]
+    if len(names) > 1:
+        combos.append(names)
+
+    print(f"{'subsistemas':<34}{'imports s':>10}{'pared s':>10}{'pico RSS MB':>13}")
+    reports = []
+    for combo in combos:
+        r = profile(combo)
+        label = ",".join(combo)
+        if "error" in r:
+            print(f"{label:<34}  ❌ {r['error']}")
+            continue
+        print(f"{label:<34}{r['import_s']:>10.2f}{r['wall_s']:>10.2f}{r['rss_mb']:>13.0f}")
+        reports.append((label, r))
+
+    for label, r in reports:
+        print(f"\n{label}: paquetes más lentos (tiempo propio de import)")
+        slowest = sorted(r["packages"].items(), key=lambda item: item[1], reverse=True)[:args.top]
+        for package, seconds in slowest:
+            print(f"  {package:<28}{seconds * 1000:>9.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
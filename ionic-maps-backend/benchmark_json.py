@@ -0,0 +1,153 @@
+"""
+Benchmark de serialización JSON de respuestas grandes
+
+Compara, para cargas con la forma de las respuestas reales, el camino por
+defecto de FastAPI (jsonable_encoder + JSONResponse) con FastJSONResponse
+(orjson si está instalado, json compacto si no).
+
+    python benchmark_json.py [--runs 20]
+
+Cada combinación se mide en un proceso aparte para que el pico de RSS sea
+el de esa combinación y no el acumulado.
+"""
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+from bson import ObjectId
+
+
+def build_payload(name: str):
+    rng = np.random.default_rng(0)
+    now = datetime.utcnow()
+
+    if name == "alternatives":
+        # /routes/alternatives: 3 rutas con ~5000 puntos cada una
+        from app.models.schemas import WeatherInfo, WeatherCondition
+        weather = WeatherInfo(condition=WeatherCondition.CLEAR, temperature=28.0, humidity=70,
+                              visibility=10000, wind_speed=3.0, description="cielo claro")
+        return {
+            "weather": weather,
+            "alternatives": [
+                {
+                    "index": i, "is_main": i == 0, "distance": 12000.0, "duration": 900.0,
+                    "predicted_duration": 1100.0,
+                    "coordinates": (rng.random((5000, 2)) + [-79.5, 9.0]).tolist(),
+                    "incidents_count": 0, "confidence": 0.8, "factors": {"weather": 1.0, "time": 1.1},
+                }
+                for i in range(3)
+            ],
+            "recommended_index": 0,
+        }
+
+    if name == "trips":
+        # /trips/: 1000 documentos de viaje
+        return {
+            "trips": [
+                {
+                    "_id": str(ObjectId()),
+                    "start": {"lat": 9.0, "lng": -79.5}, "end": {"lat": 9.1, "lng": -79.4},
+                    "start_name": "Casa", "end_name": "Trabajo", "distance": 12000.0,
+                    "estimated_duration": 900.0, "actual_duration": 1020.0,
+                    "hour": 8, "day_of_week": 1, "is_weekend": False, "is_holiday": False,
+                    "weather_condition": "clear", "temperature": 28.0, "traffic_intensity": 1.13,
+                    "had_incidents": False, "incident_types": [], "route_hash": "abc123def456",
+                    "created_at": now - timedelta(minutes=i),
+                }
+                for i in range(1000)
+            ],
+            "count": 1000,
+        }
+
+    if name == "translate_repo":
+        # /api/translator/translate-repo: 200 archivos de ~20 KB, original + traducido
+        source = "def f(x):\n    return x * 2  # comentario con tildes: acción\n" * 400
+        return {
+            "repo_url": "https://github.com/org/repo", "total_files": 200, "translated": 200,
+            "skipped": 0, "errors": 0,
+            "files": [
+                {"path": f"src/file_{i}.php", "language": "PHP", "original": source,
+                 "translated": source, "method": "ast"}
+                for i in range(200)
+            ],
+        }
+
+    raise ValueError(name)
+
+
+def encode_default(content) -> bytes:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def encode_fast(content) -> bytes:
+    from app.utils.responses import FastJSONResponse
+    return FastJSONResponse(content).body
+
+
+def run_single(payload: str, method: str, runs: int) -> dict:
+    """Medición en este proceso (lo invoca el proceso padre)"""
+    encode = encode_default if method == "default" else encode_fast
+    content = build_payload(payload)
+    encode(content)  # Calentamiento (imports, cachés)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        body = encode(content)
+        times.append(time.perf_counter() - start)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    tracemalloc.start()
+    encode(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "median_ms": statistics.median(times) * 1000,
+        "body_kb": len(body) / 1024,
+        "alloc_peak_mb": peak / 2 ** 20,
+        "rss_growth_mb": (rss_after - rss_before) / 1024,  # ru_maxrss en KB (Linux)
+        "peak_rss_mb": rss_after / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de serialización JSON")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--single", nargs=2, metavar=("PAYLOAD", "METHOD"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_single(*args.single, args.runs)))
+        return
+
+    from app.utils.responses import ORJSON_AVAILABLE
+    print(f"FastJSONResponse con {'orjson' if ORJSON_AVAILABLE else 'json estándar (orjson no instalado)'}\n")
+    print(f"{'respuesta':<16}{'camino':<10}{'mediana ms':>12}{'cuerpo KB':>12}{'pico alloc MB':>15}{'pico RSS MB':>13}")
+
+    for payload in ("alternatives", "trips", "translate_repo"):
+        results = {}
+        for method in ("default", "fast"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--runs", str(args.runs), "--single", payload, method],
+                capture_output=True, text=True, check=True
+            )
+            results[method] = r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{payload:<16}{method:<10}{r['median_ms']:>12.2f}{r['body_kb']:>12.0f}"
+                  f"{r['alloc_peak_mb']:>15.1f}{r['peak_rss_mb']:>13.0f}")
+        speedup = results["default"]["median_ms"] / results["fast"]["median_ms"]
+        print(f"{'':<16}{'x' + format(speedup, '.1f') + ' más rápido':<10}\n")
+
+
+if __name__ == "__main__":
+    main()
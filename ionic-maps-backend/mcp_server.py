@@ -116,7 +116,8 @@ async def check_nearby_incidents(lat: float, lng: float, radius_km: float = 10.0
         return f"No hay incidentes en un radio de {radius_km} km."
     result = f"Se detectaron {len(incidents)} eventos:\n"
     for inc in incidents:
-        result += f"- {inc.type.value}: {inc.description}\n"
+        # get_active_incidents devuelve documentos crudos, no modelos Incident
+        result += f"- {inc['type']}: {inc.get('description') or 'sin descripción'}\n"
     return result
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils import admission
+from app.utils.admission import AdmissionLimiter
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def short_wait(monkeypatch):
+    monkeypatch.setattr(admission.settings, "admission_max_wait", 0.05)
+
+
+def test_admits_up_to_max_concurrent():
+    async def scenario():
+        lane = AdmissionLimiter("test_concurrent", max_concurrent=2, max_queue=0, expected_seconds=1)
+        await lane.acquire()
+        await lane.acquire()
+        with pytest.raises(HTTPException) as rejected:
+            await lane.acquire()
+        return lane, rejected.value
+
+    lane, error = run(scenario())
+    assert lane.active == 2
+    assert error.status_code == 429 and error.headers["Retry-After"] == "1"
+
+
+def test_release_hands_slot_to_next_in_fifo_order():
+    async def scenario():
+        lane = AdmissionLimiter("test_handoff", max_concurrent=1, max_queue=5, expected_seconds=1)
+        await lane.acquire()
+        order = []
+
+        async def waiter(name):
+            await lane.acquire()
+            order.append(name)
+
+        tasks = [asyncio.create_task(waiter(name)) for name in ("a", "b")]
+        await asyncio.sleep(0)
+        assert lane.queued == 2
+
+        lane.release()  # El hueco pasa a "a" sin bajar active
+        await asyncio.sleep(0.01)
+        assert order == ["a"] and lane.active == 1 and lane.queued == 1
+
+        lane.release()
+        await asyncio.gather(*tasks)
+        lane.release()
+        return order, lane.active, lane.queued
+
+    assert run(scenario()) == (["a", "b"], 0, 0)
+
+
+def test_wait_timeout_rejects_and_leaves_queue(short_wait):
+    async def scenario():
+        lane = AdmissionLimiter("test_timeout", max_concurrent=1, max_queue=5, expected_seconds=2)
+        await lane.acquire()
+        with pytest.raises(HTTPException) as rejected:
+            await lane.acquire()
+        return lane, rejected.value
+
+    lane, error = run(scenario())
+    assert error.status_code == 429 and "Retry-After" in error.headers
+    assert lane.queued == 0 and lane.active == 1
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def scenario():
+        lane = AdmissionLimiter("test_cancel", max_concurrent=1, max_queue=5, expected_seconds=1)
+        await lane.acquire()
+        task = asyncio.create_task(lane.acquire())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        queued = lane.queued
+        lane.release()
+        return queued, lane.active
+
+    assert run(scenario()) == (0, 0)
+
+
+def test_slot_dependency_releases_and_updates_average():
+    async def scenario():
+        lane = AdmissionLimiter("test_slot", max_concurrent=1, max_queue=0, expected_seconds=10)
+        slot = lane.slot()
+        await slot.__anext__()
+        active_inside = lane.active
+        with pytest.raises(StopAsyncIteration):
+            await slot.__anext__()
+        return active_inside, lane.active, lane.stats()["test_slot"]["avg_seconds"]
+
+    active_inside, active_after, avg = run(scenario())
+    assert active_inside == 1 and active_after == 0
+    assert avg == pytest.approx(8.0, abs=0.01)  # 0.8 * 10 + 0.2 * ~0
+
+
+def test_retry_after_grows_with_queue():
+    lane = AdmissionLimiter("test_retry", max_concurrent=2, max_queue=10, expected_seconds=4)
+    assert lane.retry_after() == 2  # (0 + 1) / 2 rondas de 4 s
+    lane._waiters.extend(object() for _ in range(3))
+    assert lane.retry_after() == 8
@@ -0,0 +1,30 @@
+import pytest
+
+from app.utils import geohash
+
+
+@pytest.mark.parametrize("lat, lng, precision, cell", [
+    (57.64911, 10.40744, 11, "u4pruydqqvj"),
+    (42.6, -5.6, 5, "ezs42"),
+    (-25.382708, -49.265506, 7, "6gkzwgj"),
+])
+def test_encode_known_cells(lat, lng, precision, cell):
+    assert geohash.encode(lat, lng, precision) == cell
+
+
+def test_prefix_of_longer_precision():
+    assert geohash.encode(8.98, -79.52, 7).startswith(geohash.encode(8.98, -79.52, 5))
+
+
+@pytest.mark.parametrize("lat, lng", [(8.98, -79.52), (-33.45, -70.66), (0.0, 0.0), (89.9, 179.9)])
+def test_bounds_contain_point_and_center_round_trips(lat, lng):
+    cell = geohash.encode(lat, lng, 6)
+    lat_min, lat_max, lng_min, lng_max = geohash.bounds(cell)
+    assert lat_min <= lat <= lat_max and lng_min <= lng <= lng_max
+    assert geohash.encode(*geohash.center(cell), 6) == cell
+
+
+def test_cell_size_at_precision_5():
+    lat_min, lat_max, lng_min, lng_max = geohash.bounds(geohash.encode(8.98, -79.52, 5))
+    assert lat_max - lat_min == pytest.approx(180 / 2**12)
+    assert lng_max - lng_min == pytest.approx(360 / 2**13)
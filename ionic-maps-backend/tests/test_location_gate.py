@@ -0,0 +1,99 @@
+import pytest
+
+from app.models.schemas import LatLng
+from app.services.maps import location_gate as gate_module
+from app.services.maps.location_gate import LocationGate
+
+# ~1.11 m por 1e-5 grados de latitud
+METERS = 1 / 111_195
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(gate_module.time, "monotonic", clock)
+    return clock
+
+
+def north(meters: float, lng: float = -79.52) -> LatLng:
+    return LatLng(lat=8.98 + meters * METERS, lng=lng)
+
+
+def test_first_fix_is_accepted(clock):
+    assert LocationGate().accept("c", "u", north(0))
+
+
+def test_small_moves_are_dropped_until_distance_or_heartbeat(clock):
+    gate = LocationGate()
+    gate.accept("c", "u", north(0))
+
+    clock.now += 1
+    assert not gate.accept("c", "u", north(5))
+    clock.now += 1
+    assert gate.accept("c", "u", north(LocationGate.MIN_DISTANCE_M + 1))
+
+    # Parado: solo el heartbeat
+    clock.now += LocationGate.MAX_SILENCE_S - 1
+    assert not gate.accept("c", "u", north(LocationGate.MIN_DISTANCE_M + 1))
+    clock.now += 1
+    assert gate.accept("c", "u", north(LocationGate.MIN_DISTANCE_M + 1))
+
+
+def test_turn_is_accepted_with_short_move(clock):
+    gate = LocationGate()
+    gate.accept("c", "u", north(0))
+    clock.now += 2
+    assert gate.accept("c", "u", north(20))  # Rumbo norte
+
+    clock.now += 1
+    east = LatLng(lat=north(20).lat, lng=-79.52 + 8 * METERS)  # ~8 m al este: giro de 90°
+    assert gate.accept("c", "u", east)
+
+    clock.now += 1
+    assert not gate.accept("c", "u", LatLng(lat=east.lat, lng=east.lng + 3 * METERS))  # Mismo rumbo, corto
+
+
+def test_members_are_independent(clock):
+    gate = LocationGate()
+    gate.accept("c", "a", north(0))
+    assert gate.accept("c", "b", north(1))
+    assert gate.accept("other", "a", north(1))
+
+
+def test_recommended_interval_bounds_and_convoy_size():
+    gate = LocationGate()
+    assert gate.recommended_interval_ms(0.0, 2) == LocationGate.MAX_INTERVAL_S * 1000
+    assert gate.recommended_interval_ms(100.0, 2) == LocationGate.MIN_INTERVAL_S * 1000
+    # 25 m / 5 m/s = 5 s; convoy más grande, más espaciado
+    assert gate.recommended_interval_ms(5.0, 2) == 5000
+    assert gate.recommended_interval_ms(5.0, 16) > 5000
+
+
+def test_check_uses_measured_speed(clock):
+    gate = LocationGate()
+    gate.accept("c", "u", north(0))
+    clock.now += 5
+    decision = gate.check("c", "u", north(50), convoy_size=2)  # 10 m/s
+    assert decision.accepted and decision.next_update_ms == 2500
+
+
+def test_forget_and_prune(clock):
+    gate = LocationGate()
+    gate.accept("c", "a", north(0))
+    gate.accept("c", "b", north(0))
+    gate.forget("c", "a")
+    assert gate.accept("c", "a", north(1))  # Sin estado: como un primer fix
+
+    clock.now += 100
+    gate.accept("c", "a", north(200))
+    gate.prune(50)
+    assert gate.accept("c", "b", north(1))  # "b" se olvidó
+    assert not gate.accept("c", "a", north(201))  # "a" conserva su estado
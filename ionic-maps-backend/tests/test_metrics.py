@@ -0,0 +1,54 @@
+import sys
+import threading
+
+from app.utils import metrics
+
+
+def test_counter_and_histogram_render():
+    counter = metrics.counter("test_render_total", "Prueba", ["result"])
+    counter.inc(result="ok")
+    counter.inc(2, result="ok")
+    assert 'test_render_total{result="ok"} 3.0' in counter.render()
+
+    histogram = metrics.histogram("test_render_seconds", "Prueba", ["stage"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5.0, stage="a")
+    lines = histogram.render()
+    assert 'test_render_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'test_render_seconds_bucket{stage="a",le="1.0"} 2' in lines
+    assert 'test_render_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'test_render_seconds_count{stage="a"} 3' in lines
+    assert histogram.snapshot(stage="a") == {"count": 3, "sum": 5.55}
+
+
+def test_gauge_callback():
+    gauge = metrics.gauge("test_render_gauge", "Prueba", ["lane"], callback=lambda: {("x",): 4})
+    assert 'test_render_gauge{lane="x"} 4' in gauge.render()
+
+
+def test_histogram_render_is_consistent_while_other_threads_observe():
+    # Los listeners de Mongo observan desde hilos del driver mientras se exporta /metrics
+    histogram = metrics.histogram("test_threads_seconds", "Prueba", ["key"], buckets=(0.1,))
+    stop = threading.Event()
+
+    def writer():
+        while not stop.is_set():
+            histogram.observe(0.01, key="a")
+
+    threads = [threading.Thread(target=writer) for _ in range(3)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Cambios de hilo frecuentes durante el render
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(200):
+            lines = histogram.render()
+            inf = next(l for l in lines if 'le="+Inf"' in l).rsplit(" ", 1)[1]
+            count = next(l for l in lines if l.startswith("test_threads_seconds_count")).rsplit(" ", 1)[1]
+            assert inf == count  # Sin buckets leídos a medias
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        sys.setswitchinterval(interval)
@@ -0,0 +1,70 @@
+import json
+from datetime import date, datetime
+from enum import Enum
+
+import numpy as np
+import pytest
+from bson import ObjectId
+
+from app.models.schemas import LatLng
+from app.utils import responses
+from app.utils.responses import FastJSONResponse
+
+
+class Color(str, Enum):
+    RED = "red"
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        if not responses.ORJSON_AVAILABLE:
+            pytest.skip("orjson no instalado")
+    else:
+        monkeypatch.setattr(responses, "ORJSON_AVAILABLE", False)
+    return request.param
+
+
+def test_encodes_mongo_numpy_and_pydantic_types(backend):
+    oid = ObjectId("65f0c0ffee00000000000001")
+    content = {
+        "_id": oid,
+        "created_at": datetime(2026, 1, 5, 8, 30, 15),
+        "day": date(2026, 1, 5),
+        "color": Color.RED,
+        "location": LatLng(lat=8.98, lng=-79.52),
+        "durations": np.array([1.5, 2.0]),
+        "matrix": np.arange(4, dtype=np.int64).reshape(2, 2),
+        "count": np.int64(3),
+        "ratio": np.float32(0.5),
+        "flag": np.bool_(True),
+        "tags": {"a"},
+        "name": "Panamá",
+    }
+
+    decoded = json.loads(FastJSONResponse(content).body)
+
+    assert decoded == {
+        "_id": str(oid),
+        "created_at": "2026-01-05T08:30:15",
+        "day": "2026-01-05",
+        "color": "red",
+        "location": {"lat": 8.98, "lng": -79.52},
+        "durations": [1.5, 2.0],
+        "matrix": [[0, 1], [2, 3]],
+        "count": 3,
+        "ratio": 0.5,
+        "flag": True,
+        "tags": ["a"],
+        "name": "Panamá",
+    }
+
+
+def test_output_is_compact_utf8(backend):
+    body = FastJSONResponse({"a": [1, 2], "b": "ñ"}).body
+    assert body == '{"a":[1,2],"b":"ñ"}'.encode("utf-8")
+
+
+def test_unknown_type_raises_type_error(backend):
+    with pytest.raises(TypeError):
+        responses.dumps({"value": object()})
@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+from app.services.core.socket_service import SocketManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.sent.append(message)
+
+
+def test_topic_messages_reach_only_subscribers():
+    async def scenario():
+        manager = SocketManager()
+        subscriber, bystander = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(subscriber)
+        await manager.connect(bystander)
+        await manager.handle_client_message(subscriber, json.dumps({"action": "subscribe", "topic": "job:1"}))
+
+        await manager.broadcast("progreso", topic="job:1")
+        with manager.topic("job:2"):
+            await manager.broadcast("otro job")
+        await manager.broadcast("para todos")
+        await asyncio.sleep(0.01)  # Dejar que las tareas de envío vacíen las colas
+
+        manager.disconnect(subscriber)
+        manager.disconnect(bystander)
+        return subscriber.sent, bystander.sent, manager.subscribers
+
+    subscriber, bystander, subscribers = asyncio.run(scenario())
+    assert subscriber == ['{"type": "subscribed", "topic": "job:1"}', "progreso", "para todos"]
+    assert bystander == ["para todos"]
+    assert subscribers == {}
+
+
+def test_invalid_subscriptions_are_ignored():
+    async def scenario():
+        manager = SocketManager()
+        websocket = FakeWebSocket()
+        await manager.connect(websocket)
+        for text in ("no es json", "[]", json.dumps({"action": "subscribe", "topic": "admin"})):
+            await manager.handle_client_message(websocket, text)
+        await asyncio.sleep(0.01)
+        connection = manager.active_connections[websocket]
+        manager.disconnect(websocket)
+        return websocket.sent, connection.topics
+
+    assert asyncio.run(scenario()) == ([], set())
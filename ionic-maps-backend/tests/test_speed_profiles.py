@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from app.services.maps.speed_profile_service import SpeedProfileService
+
+
+@pytest.fixture(autouse=True)
+def empty_profiles(monkeypatch):
+    hours = SpeedProfileService.HOURS_PER_WEEK
+    monkeypatch.setattr(SpeedProfileService, "_rows", {})
+    monkeypatch.setattr(SpeedProfileService, "_from_nodes", np.zeros(0, dtype=np.int64))
+    monkeypatch.setattr(SpeedProfileService, "_to_nodes", np.zeros(0, dtype=np.int64))
+    monkeypatch.setattr(SpeedProfileService, "_pace_sum", np.zeros((0, hours), dtype=np.float32))
+    monkeypatch.setattr(SpeedProfileService, "_count", np.zeros((0, hours), dtype=np.uint16))
+    monkeypatch.setattr(SpeedProfileService, "_size", 0)
+    monkeypatch.setattr(SpeedProfileService, "_dirty_chunks", set())
+
+
+def test_estimate_eta_splits_covered_and_uncovered_seconds():
+    # Dos viajes al doble de lo estimado por OSRM sobre los segmentos 1-2 y 2-3
+    for _ in range(SpeedProfileService.MIN_SAMPLES):
+        SpeedProfileService.observe([1, 2, 3], [100.0, 100.0], [10.0, 10.0], hour_of_week=5, ratio=2.0)
+
+    covered, uncovered, coverage = SpeedProfileService.estimate_eta(
+        [1, 2, 3, 4], [100.0, 100.0, 100.0], [10.0, 10.0, 10.0], hour_of_week=5
+    )
+    assert covered == pytest.approx(40.0)   # Tiempo aprendido de los dos segmentos cubiertos
+    assert uncovered == pytest.approx(10.0)  # Solo la duración OSRM del segmento sin historial
+    assert coverage == pytest.approx(2 / 3)
+
+
+def test_estimate_eta_without_history():
+    SpeedProfileService.observe([1, 2], [100.0], [10.0], hour_of_week=5, ratio=2.0)  # Una sola muestra
+    assert SpeedProfileService.estimate_eta([1, 2], [100.0], [10.0], hour_of_week=5) == (0.0, 10.0, 0.0)
+    assert SpeedProfileService.estimate_eta([1, 2], [100.0], [10.0], hour_of_week=6) == (0.0, 10.0, 0.0)
+
+
+def test_observe_marks_dirty_chunks():
+    assert SpeedProfileService.observe([1, 2, 3], [100.0, 0.5], [10.0, 1.0], hour_of_week=0, ratio=1.0) == 1
+    assert SpeedProfileService._dirty_chunks == {0}
@@ -0,0 +1,77 @@
+import time
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.models.schemas import TraceUpload
+from app.utils.trace_codec import decode_trace, decode_varints, encode_trace, encode_varints
+
+
+def test_varints_round_trip():
+    values = np.array([0, 1, 127, 128, 300, 2**32, 2**63 - 1], dtype=np.uint64)
+    data = encode_varints(values)
+    decoded, offset = decode_varints(data, len(values))
+    assert decoded.tolist() == values.tolist()
+    assert offset == len(data)
+
+
+def test_single_byte_varints():
+    assert encode_varints(np.array([0, 5, 127], dtype=np.uint64)) == bytes([0, 5, 127])
+
+
+def test_truncated_varints():
+    data = encode_varints(np.array([300], dtype=np.uint64))
+    with pytest.raises(ValueError):
+        decode_varints(data[:-1], 1)
+
+
+def test_trace_round_trip():
+    rng = np.random.default_rng(0)
+    n = 600
+    timestamps = 1_760_000_000 + np.cumsum(rng.uniform(0.5, 2.0, n))
+    lats = 8.98 + np.cumsum(rng.normal(0, 1e-4, n))
+    lngs = -79.52 + np.cumsum(rng.normal(0, 1e-4, n))
+
+    data = encode_trace(timestamps, lats, lngs)
+    t, lat, lng = decode_trace(data)
+
+    np.testing.assert_allclose(t, timestamps, atol=5e-4)
+    np.testing.assert_allclose(lat, lats, atol=5e-7)
+    np.testing.assert_allclose(lng, lngs, atol=5e-7)
+    assert len(data) < n * 10  # Deltas pequeños: pocos bytes por punto
+
+
+def test_trace_with_backwards_deltas():
+    # Deltas negativos (zigzag) y un único punto
+    t, lat, lng = decode_trace(encode_trace([1_700_000_000.0], [-33.45], [-70.66]))
+    assert t.tolist() == [1_700_000_000.0] and lat.tolist() == [-33.45] and lng.tolist() == [-70.66]
+
+    t, lat, lng = decode_trace(encode_trace([10.0, 9.0, 11.0], [1.0, -1.0, 0.5], [179.9, -179.9, 0.0]))
+    assert t.tolist() == [10.0, 9.0, 11.0]
+    np.testing.assert_allclose(lng, [179.9, -179.9, 0.0])
+
+
+def test_empty_trace():
+    t, lat, lng = decode_trace(encode_trace([], [], []))
+    assert len(t) == len(lat) == len(lng) == 0
+
+
+@pytest.mark.parametrize("point", [
+    [91.0, -79.5, None],
+    [9.0, -181.0, None],
+    [9.0, -79.5, 1e20],
+    [9.0, -79.5, -1.0],
+    [9.0, float("nan"), None],
+    [9.0, -79.5],
+])
+def test_trace_upload_rejects_bad_points(point):
+    point = [time.time() if v is None else v for v in point]
+    with pytest.raises(ValidationError):
+        TraceUpload(points=[[9.0, -79.5, time.time()], point])
+
+
+def test_trace_upload_accepts_valid_points():
+    now = time.time()
+    upload = TraceUpload(points=[[9.0, -79.5, now - 60], [9.001, -79.501, now]])
+    assert len(upload.points) == 2
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from app.utils.ttl_cache import TTLCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class SlowLoader:
+    """Loader que cuenta sus llamadas y tarda `delay` segundos"""
+
+    def __init__(self, delay: float = 0.05):
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.delay)
+        return call  # Número de esta llamada
+
+
+def test_ttl_and_lru():
+    cache = TTLCache("test_lru", ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" pasa a ser la más reciente
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+
+    cache.set("d", 4, ttl=-1)
+    assert cache.get("d", "vencida") == "vencida"
+
+
+def test_single_flight_coalesces_concurrent_loads():
+    async def scenario():
+        cache, loader = TTLCache("test_single_flight", ttl=60, maxsize=10), SlowLoader()
+        results = await asyncio.gather(*(cache.get_or_load("k", loader) for _ in range(5)))
+        return results, loader.calls, await cache.get_or_load("k", loader)
+
+    results, calls, cached = run(scenario())
+    assert results == [1] * 5 and calls == 1 and cached == 1
+
+
+def test_errors_are_shared_but_not_cached():
+    async def scenario():
+        cache = TTLCache("test_errors", ttl=60, maxsize=10)
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ValueError("sin datos")
+
+        results = await asyncio.gather(
+            cache.get_or_load("k", failing), cache.get_or_load("k", failing), return_exceptions=True
+        )
+        return results, len(cache)
+
+    results, size = run(scenario())
+    assert all(isinstance(r, ValueError) for r in results) and size == 0
+
+
+def test_cancelled_loader_does_not_cancel_waiters():
+    async def scenario():
+        cache, loader = TTLCache("test_cancel_owner", ttl=60, maxsize=10), SlowLoader()
+        owner = asyncio.create_task(cache.get_or_load("k", loader))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(cache.get_or_load("k", loader)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        results = await asyncio.gather(*waiters)
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        return results, loader.calls
+
+    results, calls = run(scenario())
+    # Un solo reintento para los tres que esperaban
+    assert results == [2, 2, 2] and calls == 2
+
+
+def test_cancelled_waiter_does_not_cancel_loader():
+    async def scenario():
+        cache, loader = TTLCache("test_cancel_waiter", ttl=60, maxsize=10), SlowLoader()
+        owner = asyncio.create_task(cache.get_or_load("k", loader))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(cache.get_or_load("k", loader))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        return await owner, waiter, cache.get("k")
+
+    value, waiter, cached = run(scenario())
+    assert value == 1 and cached == 1 and waiter.cancelled()
+
+
+def test_invalidate_during_load_discards_stale_result():
+    async def scenario():
+        cache, loader = TTLCache("test_invalidate", ttl=60, maxsize=10), SlowLoader()
+        stale = asyncio.create_task(cache.get_or_load("k", loader))
+        await asyncio.sleep(0.01)
+        cache.invalidate("k")  # Escritura después de que la carga leyó
+        value = await stale
+        return value, cache.get("k"), await cache.get_or_load("k", loader)
+
+    value, cached, reloaded = run(scenario())
+    # Quien cargó recibe su valor, pero no queda en caché; la siguiente lectura recarga
+    assert value == 1 and cached is None and reloaded == 2
+
+
+def test_reload_after_invalidate_is_stored():
+    async def scenario():
+        cache, loader = TTLCache("test_reload", ttl=60, maxsize=10), SlowLoader()
+        stale = asyncio.create_task(cache.get_or_load("k", loader))
+        await asyncio.sleep(0.01)
+        cache.invalidate("k")
+        fresh = asyncio.create_task(cache.get_or_load("k", loader))  # Carga nueva, no se une a la vieja
+        results = await asyncio.gather(stale, fresh)
+        return results, cache.get("k")
+
+    results, cached = run(scenario())
+    assert results == [1, 2] and cached == 2
+
+
+def test_clear_during_load_discards_stale_result():
+    async def scenario():
+        cache, loader = TTLCache("test_clear", ttl=60, maxsize=10), SlowLoader()
+        stale = asyncio.create_task(cache.get_or_load("k", loader))
+        await asyncio.sleep(0.01)
+        cache.clear()
+        await stale
+        return cache.get("k")
+
+    assert run(scenario()) is None